@@ -5,7 +5,7 @@ from discord.commands import Option, SlashCommand, SlashCommandGroup, slash_comm
 from discord.commands.context import AutocompleteContext
 
 import traceback
-from data.services.guild_service import guild_service
+from data.services.guild_service import async_guild_service
 from utils.autocompleters import commands_list
 from utils.logger import logger
 from utils.config import cfg
@@ -35,7 +35,7 @@ class Utilities(commands.Cog):
                 is_admin = permissions.has(ctx.guild, ctx.author, 6)
                 is_mod = permissions.has(ctx.guild, ctx.author, 5)
                 is_genius = permissions.has(ctx.guild, ctx.author, 4)
-                submod = ctx.guild.get_role(guild_service.get_guild().role_sub_mod)
+                submod = ctx.guild.get_role((await async_guild_service.get_guild()).role_sub_mod)
                 
                 if not cog.get_commands() or (cog_name in self.mod_only and not is_mod):
                     continue
@@ -9,11 +9,12 @@ import traceback
 import psutil
 from datetime import datetime
 from math import floor
-from data.services.user_service import user_service
+from data.services.user_service import async_user_service
 from utils.config import cfg
-from utils.logger import logger
+from utils.logger import logger, webhook_handler
 from utils.context import BlooContext
-from utils.permissions.checks import PermissionsFailure, mod_and_up, whisper
+from utils.http_session import http_sessions
+from utils.permissions.checks import PermissionsFailure, admin_and_up, mod_and_up, whisper
 from utils.permissions.slash_perms import slash_perms
 
 
@@ -90,6 +91,12 @@ class Stats(commands.Cog):
         embed.add_field(name="Memory Usage",
                         value=f"{floor(process.memory_info().rss/1000/1000)} MB")
         embed.add_field(name="Python Version", value=platform.python_version())
+        for name, pool in self.bot.cpu_pool.stats.items():
+            embed.add_field(name=f"CPU {name} pool",
+                            value=f"{pool.in_flight - pool.queued}/{pool.workers} busy, {pool.queued} queued (max {pool.max_in_flight})\n{pool.completed} done, {pool.failed} failed, {pool.timed_out} timed out")
+        if webhook_handler is not None:
+            embed.add_field(name="Log webhook",
+                            value=f"{webhook_handler.sent} messages sent, {webhook_handler.failed} failed\n{webhook_handler.dropped} records dropped, {len(webhook_handler.pending)} waiting")
 
         await ctx.respond(embed=embed, ephemeral=ctx.whisper)
 
@@ -132,7 +139,7 @@ class Stats(commands.Cog):
 
         embed = discord.Embed(title="Raid Statistics",
                               color=discord.Color.blurple())
-        raids = user_service.fetch_raids()
+        raids = await async_user_service.fetch_raids()
 
         total = 0
         for raid_type, cases in raids.items():
@@ -156,7 +163,7 @@ class Stats(commands.Cog):
         embed.set_author(name=f"{mod}'s case statistics",
                          icon_url=mod.display_avatar)
 
-        raids = user_service.fetch_cases_by_mod(mod.id)
+        raids = await async_user_service.fetch_cases_by_mod(mod.id)
         embed.add_field(name="Total cases", value=raids.get("total"))
 
         string = ""
@@ -168,6 +175,47 @@ class Stats(commands.Cog):
 
         await ctx.respond_or_edit(embed=embed)
 
+    @admin_and_up()
+    @slash_command(guild_ids=[cfg.guild_id], description="Present timings of each stage that handles messages.", permissions=slash_perms.admin_and_up())
+    async def pipelinestats(self, ctx: BlooContext) -> None:
+        """Present timings of each stage that handles messages.
+        """
+
+        pipeline = self.bot.message_pipeline
+        embed = discord.Embed(title="Message Pipeline Statistics",
+                              color=discord.Color.blurple())
+        embed.description = f"{pipeline.messages} messages handled, {pipeline.consumed} stopped early."
+
+        logging_cog = self.bot.get_cog("Logging")
+        if logging_cog is not None:
+            embed.description += (f"\nReaction log: {logging_cog.reactions_batched} reactions batched with others, "
+                                  f"{logging_cog.reactions_deduplicated} duplicates ignored, {logging_cog.reactions_dropped} dropped.")
+
+        for stage in pipeline.metrics()[:25]:
+            embed.add_field(name=stage.name, value=f"Calls: {stage.calls}\nAverage: `{stage.average_time*1000:.2f}ms`\nMax: `{stage.max_time*1000:.2f}ms`\nConsumed: {stage.consumed}\nErrors: {stage.errors}")
+
+        await ctx.respond_or_edit(embed=embed, ephemeral=True)
+
+    @admin_and_up()
+    @slash_command(guild_ids=[cfg.guild_id], description="Present latency and connection reuse of outbound HTTP requests.", permissions=slash_perms.admin_and_up())
+    async def httpstats(self, ctx: BlooContext) -> None:
+        """Present latency and connection reuse of outbound HTTP requests, per host.
+        """
+
+        embed = discord.Embed(title="HTTP Statistics",
+                              color=discord.Color.blurple())
+
+        hosts = sorted(http_sessions.stats.items(), key=lambda item: item[1].requests, reverse=True)
+        for host, stats in hosts[:25]:
+            embed.add_field(name=host, value=f"Requests: {stats.requests} ({stats.errors} failed)\nAverage: `{stats.average_time*1000:.0f}ms`\nMax: `{stats.max_time*1000:.0f}ms`\nReused connections: {stats.reused_connections}/{stats.reused_connections + stats.new_connections}")
+
+        if not hosts:
+            embed.description = "No requests made yet."
+
+        await ctx.respond_or_edit(embed=embed, ephemeral=True)
+
+    @httpstats.error
+    @pipelinestats.error
     @casestats.error
     @raidstats.error
     @ping.error
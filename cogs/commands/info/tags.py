@@ -7,7 +7,7 @@ from aiohttp import request
 
 import discord
 from data.model.tag import Tag
-from data.services.guild_service import guild_service
+from data.services.guild_service import async_guild_service, guild_service
 from discord.commands import Option, slash_command, message_command, user_command
 from discord.ext import commands
 from discord.ext.commands.cooldowns import CooldownMapping
@@ -88,8 +88,7 @@ class Tags(commands.Cog):
         self.tag_cooldown = CooldownMapping.from_cooldown(
             1, 5, MessageTextBucket.custom)
 
-        self.support_tags = [tag.name for tag in guild_service.get_guild(
-        ).tags if tag.name in ["support"]]
+        self.support_tags = [name for name in guild_service.get_tag_names() if name in ["support"]]
 
     @slash_command(guild_ids=[cfg.guild_id], description="Display a tag")
     async def tag(self, ctx: BlooContext, name: Option(str, description="Tag name", autocomplete=tags_autocomplete), user_to_mention: Option(discord.Member, description="User to mention in the response", required=False)):
@@ -106,7 +105,7 @@ class Tags(commands.Cog):
 
         """
         name = name.lower()
-        tag = guild_service.get_tag(name)
+        tag = await async_guild_service.get_tag(name)
 
         if tag is None:
             raise commands.BadArgument("That tag does not exist.")
@@ -115,7 +114,7 @@ class Tags(commands.Cog):
         bucket = self.tag_cooldown.get_bucket(tag.name)
         current = datetime.now().timestamp()
         # ratelimit only if the invoker is not a moderator
-        if bucket.update_rate_limit(current) and not (permissions.has(ctx.guild, ctx.author, 5) or ctx.guild.get_role(guild_service.get_guild().role_sub_mod) in ctx.author.roles):
+        if bucket.update_rate_limit(current) and not (permissions.has(ctx.guild, ctx.author, 5) or ctx.guild.get_role((await async_guild_service.get_guild()).role_sub_mod) in ctx.author.roles):
             raise commands.BadArgument("That tag is on cooldown.")
 
         # if the Tag has an image, add it to the embed
@@ -160,7 +159,7 @@ class Tags(commands.Cog):
             return
         if not permissions.has(reacter.guild, reacter, 1):
             return
-        if reaction.message.channel.id != guild_service.get_guild().channel_general:
+        if reaction.message.channel.id != (await async_guild_service.get_guild()).channel_general:
             return
 
         await reaction.message.remove_reaction(reaction.emoji, reacter)
@@ -173,7 +172,7 @@ class Tags(commands.Cog):
             raise commands.BadArgument("No support tags found.")
 
         random_tag = random.choice(self.support_tags)
-        tag = guild_service.get_tag(random_tag)
+        tag = await async_guild_service.get_tag(random_tag)
 
         if tag is None:
             raise commands.BadArgument("That tag does not exist.")
@@ -182,7 +181,7 @@ class Tags(commands.Cog):
         bucket = self.tag_cooldown.get_bucket(tag.name)
         current = datetime.now().timestamp()
         # ratelimit only if the invoker is not a moderator
-        if bucket.update_rate_limit(current) and not (permissions.has(ctx.guild, ctx.author, 5) or ctx.guild.get_role(guild_service.get_guild().role_sub_mod) in ctx.author.roles):
+        if bucket.update_rate_limit(current) and not (permissions.has(ctx.guild, ctx.author, 5) or ctx.guild.get_role((await async_guild_service.get_guild()).role_sub_mod) in ctx.author.roles):
             if isinstance(ctx, BlooContext):
                 raise commands.BadArgument("That tag is on cooldown.")
             else:
@@ -217,7 +216,7 @@ class Tags(commands.Cog):
         """
 
         name = name.lower()
-        tag = guild_service.get_tag(name)
+        tag = await async_guild_service.get_tag(name)
 
         if tag is None:
             raise commands.BadArgument("That tag does not exist.")
@@ -243,7 +242,7 @@ class Tags(commands.Cog):
         """List all tags
         """
 
-        _tags = sorted(guild_service.get_guild().tags, key=lambda tag: tag.name)
+        _tags = await async_guild_service.get_tags()
 
         if len(_tags) == 0:
             raise commands.BadArgument("There are no tags defined.")
@@ -276,7 +275,7 @@ class Tags(commands.Cog):
             raise commands.BadArgument(
                 "Tag names can't be longer than 1 word.")
 
-        if (guild_service.get_tag(name.lower())) is not None:
+        if name.lower() in await async_guild_service.get_tag_names():
             raise commands.BadArgument("Tag with that name already exists.")
 
         content_type = None
@@ -301,7 +300,7 @@ class Tags(commands.Cog):
             tag.image.put(image, content_type=content_type)
 
         # store tag in database
-        guild_service.add_tag(tag)
+        await async_guild_service.add_tag(tag)
 
         _file = tag.image.read()
         if _file is not None:
@@ -331,7 +330,7 @@ class Tags(commands.Cog):
                 "Tag names can't be longer than 1 word.")
 
         name = name.lower()
-        tag = guild_service.get_tag(name)
+        tag = await async_guild_service.get_tag(name)
 
         if tag is None:
             raise commands.BadArgument("That tag does not exist.")
@@ -364,7 +363,7 @@ class Tags(commands.Cog):
         tag = modal.tag
 
         # store tag in database
-        guild_service.edit_tag(tag)
+        await async_guild_service.edit_tag(tag)
 
         _file = tag.image.read()
         if _file is not None:
@@ -392,14 +391,14 @@ class Tags(commands.Cog):
 
         name = name.lower()
 
-        tag = guild_service.get_tag(name)
+        tag = await async_guild_service.get_tag(name)
         if tag is None:
             raise commands.BadArgument("That tag does not exist.")
 
         if tag.image is not None:
             tag.image.delete()
 
-        guild_service.remove_tag(name)
+        await async_guild_service.remove_tag(name)
         await ctx.send_warning(f"Deleted tag `{tag.name}`.", delete_after=5)
 
     @edit.error
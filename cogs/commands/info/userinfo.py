@@ -6,11 +6,11 @@ from discord.utils import format_dt
 
 import traceback
 from datetime import datetime
-from math import floor
 from typing import Union
-from data.services.user_service import user_service
+from data.services.user_service import async_user_service
 from utils.config import cfg
 from utils.context import BlooContext
+from utils.levels import xp_for_level
 
 from utils.logger import logger
 from utils.permissions.checks import PermissionsFailure, whisper
@@ -78,7 +78,7 @@ def format_cases_page(ctx, entries, current_page, all_pages):
     page_count = 0
 
     user = ctx.case_user
-    u = user_service.get_user(user.id)
+    u = ctx.case_db_user
 
     for page in all_pages:
         for case in page:
@@ -200,7 +200,7 @@ class UserInfo(commands.Cog):
             roles = "No roles."
             joined = f"User not in {ctx.guild}"
 
-        results = user_service.get_user(user.id)
+        results = await async_user_service.get_user(user.id)
 
         embed = discord.Embed(title=f"User Information", color=user.color)
         embed.set_author(name=user)
@@ -243,7 +243,7 @@ class UserInfo(commands.Cog):
         if user is None:
             user = ctx.author
 
-        results = user_service.get_user(user.id)
+        results = await async_user_service.get_user(user.id)
 
         embed = discord.Embed(title="Level Statistics")
         embed.color = user.top_role.color
@@ -251,8 +251,8 @@ class UserInfo(commands.Cog):
         embed.add_field(
             name="Level", value=results.level if not results.is_clem else "0", inline=True)
         embed.add_field(
-            name="XP", value=f'{results.xp}/{xp_for_next_level(results.level)}' if not results.is_clem else "0/0", inline=True)
-        rank, overall = user_service.leaderboard_rank(results.xp)
+            name="XP", value=f'{results.xp}/{xp_for_level(results.level)}' if not results.is_clem else "0/0", inline=True)
+        rank, overall = await async_user_service.leaderboard_rank(results.xp)
         embed.add_field(
             name="Rank", value=f"{rank}/{overall}" if not results.is_clem else f"{overall}/{overall}", inline=True)
 
@@ -284,7 +284,7 @@ class UserInfo(commands.Cog):
                 f"You don't have permissions to check others' warnpoints.")
 
         # fetch user profile from database
-        results = user_service.get_user(user.id)
+        results = await async_user_service.get_user(user.id)
 
         embed = discord.Embed(title="Warn Points",
                               color=discord.Color.orange())
@@ -307,7 +307,7 @@ class UserInfo(commands.Cog):
 
         """
 
-        results = enumerate(user_service.leaderboard())
+        results = enumerate(await async_user_service.leaderboard())
         results = [(i, m) for (i, m) in results if ctx.guild.get_member(
             m._id) is not None][0:100]
 
@@ -344,7 +344,7 @@ class UserInfo(commands.Cog):
                 f"You don't have permissions to check others' warnpoints.")
 
         # fetch user's cases from our database
-        results = user_service.get_cases(user.id)
+        results = await async_user_service.get_cases(user.id)
         if len(results.cases) == 0:
             return await ctx.send_warning(f'{user.mention} has no cases.', delete_after=5)
 
@@ -354,6 +354,8 @@ class UserInfo(commands.Cog):
         cases.reverse()
 
         ctx.case_user = user
+        # the page formatter can't wait on the database
+        ctx.case_db_user = await async_user_service.get_user(user.id)
 
         menu = Menu(ctx, cases, per_page=10,
                     page_formatter=format_cases_page, whisper=ctx.whisper)
@@ -384,19 +386,5 @@ class UserInfo(commands.Cog):
             logger.error(traceback.format_exc())
 
 
-def xp_for_next_level(_next):
-    """Magic formula to determine XP thresholds for levels
-    """
-
-    level = 0
-    xp = 0
-
-    for _ in range(0, _next):
-        xp = xp + 45 * level * (floor(level / 10) + 1)
-        level += 1
-
-    return xp
-
-
 def setup(bot):
     bot.add_cog(UserInfo(bot))
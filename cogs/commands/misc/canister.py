@@ -1,19 +1,20 @@
 from faulthandler import disable
 import json
-import re
 import traceback
 import urllib
 
-import aiohttp
 import discord
-from data.services.guild_service import guild_service
+from data.services.guild_service import async_guild_service
 from discord.commands import Option, slash_command
 from discord.ext import commands
 from utils.autocompleters import fetch_repos, repo_autocomplete
 from utils.config import cfg
 from utils.context import BlooContext, BlooOldContext
+from utils.http_session import http_sessions
 from utils.logger import logger
+from utils.message_pipeline import MessageContext, message_stage
 from utils.menu import TweakMenu
+from utils.patterns import PACKAGE_SEARCH
 from utils.views.canister import TweakDropdown, default_repos
 from utils.permissions.checks import PermissionsFailure
 from utils.permissions.permissions import permissions
@@ -56,16 +57,17 @@ async def search(query):
         "List of packages that Canister found matching the query"
 
     """
-    async with aiohttp.ClientSession() as client:
-        async with client.get(f'https://api.canister.me/v1/community/packages/search?query={urllib.parse.quote(query)}&searchFields=identifier,name&responseFields=identifier,header,tintColor,name,price,description,packageIcon,repository.uri,repository.name,author,maintainer,latestVersion,nativeDepiction,depiction') as resp:
-            if resp.status == 200:
-                response = json.loads(await resp.text())
-                if response.get('status') == "Successful":
-                    return response.get('data')
-                else:
-                    return None
-            else:
-                return None
+    client = http_sessions.session
+    async with client.get(f'https://api.canister.me/v1/community/packages/search?query={urllib.parse.quote(query)}&searchFields=identifier,name&responseFields=identifier,header,tintColor,name,price,description,packageIcon,repository.uri,repository.name,author,maintainer,latestVersion,nativeDepiction,depiction') as resp:
+        # anything but a successful response from Canister means no results
+        if resp.status != 200:
+            return None
+
+        response = json.loads(await resp.text())
+        if response.get('status') != "Successful":
+            return None
+
+        return response.get('data')
 
 
 async def search_repo(query):
@@ -82,16 +84,17 @@ async def search_repo(query):
         "List of repos that Canister found matching the query"
 
     """
-    async with aiohttp.ClientSession() as client:
-        async with client.get(f'https://api.canister.me/v1/community/repositories/search?query={urllib.parse.quote(query)}') as resp:
-            if resp.status == 200:
-                response = json.loads(await resp.text())
-                if response.get('status') == "Successful":
-                    return response.get('data')
-                else:
-                    return None
-            else:
-                return None
+    client = http_sessions.session
+    async with client.get(f'https://api.canister.me/v1/community/repositories/search?query={urllib.parse.quote(query)}') as resp:
+        # anything but a successful response from Canister means no results
+        if resp.status != 200:
+            return None
+
+        response = json.loads(await resp.text())
+        if response.get('status') != "Successful":
+            return None
+
+        return response.get('data')
 
 
 async def canister_repo(ctx: BlooContext, interaction: bool, whisper: bool, result):
@@ -107,24 +110,19 @@ class Canister(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        if message.guild is None:
-            return
-
+    @message_stage(include_bots=True)
+    async def on_message(self, message, context: MessageContext):
         author = message.guild.get_member(message.author.id)
         if author is None:
             return
 
-        if not permissions.has(message.guild, author, 5) and message.channel.id == guild_service.get_guild().channel_general:
+        if context.level < 5 and message.channel.id == context.db_guild.channel_general:
             return
 
-        pattern = re.compile(
-            r".*?(?<!\[)+\[\[((?!\s+)([\w+\ \&\+\-\<\>\#\:\;\%\(\)]){2,})\]\](?!\])+.*")
-        if not pattern.match(message.content):
+        if not PACKAGE_SEARCH.match(message.content):
             return
 
-        matches = pattern.findall(message.content)
+        matches = PACKAGE_SEARCH.findall(message.content)
         if not matches:
             return
 
@@ -172,7 +170,7 @@ class Canister(commands.Cog):
             raise commands.BadArgument("Please enter a longer query.")
 
         should_whisper = False
-        if not permissions.has(ctx.guild, ctx.author, 5) and ctx.channel.id == guild_service.get_guild().channel_general:
+        if not permissions.has(ctx.guild, ctx.author, 5) and ctx.channel.id == (await async_guild_service.get_guild()).channel_general:
             should_whisper = True
 
         await ctx.defer(ephemeral=should_whisper)
@@ -208,7 +206,7 @@ class Canister(commands.Cog):
             await ctx.send_error("That repository isn't registered with Canister's database.")
             return
         should_whisper = False
-        if not permissions.has(ctx.guild, ctx.author, 5) and ctx.channel.id == guild_service.get_guild().channel_general:
+        if not permissions.has(ctx.guild, ctx.author, 5) and ctx.channel.id == (await async_guild_service.get_guild()).channel_general:
             should_whisper = True
 
         await ctx.defer(ephemeral=should_whisper)
@@ -7,7 +7,7 @@ from discord.ext import commands
 
 import datetime
 import traceback
-from data.services.guild_service import guild_service
+from data.services.guild_service import async_guild_service
 from utils.autocompleters import issue_autocomplete
 from utils.config import cfg
 from utils.logger import logger
@@ -74,7 +74,7 @@ class Genius(commands.Cog):
         """
         # get #common-issues channel
         channel = ctx.guild.get_channel(
-            guild_service.get_guild().channel_common_issues)
+            (await async_guild_service.get_guild()).channel_common_issues)
         if not channel:
             raise commands.BadArgument("common issues channel not found")
 
@@ -106,7 +106,7 @@ class Genius(commands.Cog):
     @commonissue.command(description="Submit a new common issue")
     async def edit(self, ctx: BlooContext, *, title: Option(str, description="Title of the issue", autocomplete=issue_autocomplete), image: Option(discord.Attachment, required=False, description="Image to show in issue")) -> None:
         channel = ctx.guild.get_channel(
-            guild_service.get_guild().channel_common_issues)
+            (await async_guild_service.get_guild()).channel_common_issues)
         if not channel:
             raise commands.BadArgument("common issues channel not found")
 
@@ -182,7 +182,7 @@ class Genius(commands.Cog):
     async def reindexissues(self, ctx: BlooContext):
         # get #common-issues channel
         channel: discord.TextChannel = ctx.guild.get_channel(
-            guild_service.get_guild().channel_common_issues)
+            (await async_guild_service.get_guild()).channel_common_issues)
         if not channel:
             raise commands.BadArgument("common issues channel not found")
 
@@ -10,7 +10,7 @@ import traceback
 import humanize
 import pytimeparse
 from data.model.giveaway import Giveaway as GiveawayDB
-from data.services.guild_service import guild_service
+from data.services.guild_service import async_guild_service
 from utils.logger import logger
 from utils.config import cfg
 from utils.context import BlooContext
@@ -81,7 +81,7 @@ class Giveaway(commands.Cog):
             winners=winners,
             end_time=end_time,
             sponsor=sponsor.id)
-        giveaway.save()
+        await async_guild_service.run(giveaway.save)
 
         await ctx.send_success(f"Giveaway created!", delete_after=5)
 
@@ -103,7 +103,7 @@ class Giveaway(commands.Cog):
             "ID of giveaway message"
             
         """
-        g = guild_service.get_giveaway(_id=int(message_id))
+        g = await async_guild_service.get_giveaway(_id=int(message_id))
 
         if g is None:
             raise commands.BadArgument(
@@ -125,7 +125,7 @@ class Giveaway(commands.Cog):
             the_winner = None
 
         g.previous_winners.append(the_winner.id)
-        g.save()
+        await async_guild_service.run(g.save)
 
         channel = ctx.guild.get_channel(g.channel)
 
@@ -147,7 +147,7 @@ class Giveaway(commands.Cog):
             "ID of giveaway message"
             
         """
-        giveaway = guild_service.get_giveaway(_id=int(message_id))
+        giveaway = await async_guild_service.get_giveaway(_id=int(message_id))
         if giveaway is None:
             raise commands.BadArgument(
                 "A giveaway with that ID was not found.")
@@ -2,7 +2,6 @@ import datetime
 import json
 import traceback
 
-import aiohttp
 import discord
 from aiocache.decorators import cached
 from discord.commands import slash_command, Option
@@ -13,6 +12,7 @@ from utils.autocompleters import (device_autocomplete, device_autocomplete_jb,
                                   ios_version_autocomplete, jb_autocomplete, transform_groups)
 from utils.config import cfg
 from utils.context import BlooContext
+from utils.http_session import http_sessions
 from utils.logger import logger
 from utils.menu import CIJMenu, get_signed_status, iterate_apps
 from utils.permissions.checks import PermissionsFailure, whisper, whisper_in_general
@@ -82,10 +82,10 @@ async def get_jailbreaks_jba():
         "Apps"
     """
     res_apps = []
-    async with aiohttp.ClientSession() as session:
-        async with session.get("https://jailbreaks.app/json/apps.json") as resp:
-            if resp.status == 200:
-                res_apps = await resp.json()
+    session = http_sessions.session
+    async with session.get("https://jailbreaks.app/json/apps.json") as resp:
+        if resp.status == 200:
+            res_apps = await resp.json()
     return res_apps
 
 
@@ -93,11 +93,11 @@ async def get_jailbreaks_jba():
 async def get_signed_status():
     """Gets Jailbreaks.app's signed status"""
     signed = []
-    async with aiohttp.ClientSession() as session:
-        async with session.get("https://jailbreaks.app/status.php") as resp:
-            if resp.status == 200:
-                res = await resp.text()
-                signed = json.loads(res)
+    session = http_sessions.session
+    async with session.get("https://jailbreaks.app/status.php") as resp:
+        if resp.status == 200:
+            res = await resp.text()
+            signed = json.loads(res)
     return signed
 
 
@@ -352,14 +352,14 @@ class iOSCFW(commands.Cog):
             "ios, jailbreaks, devices"
         """
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"https://api.ipsw.me/v4/ipsw/{version}") as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    return data
-
+        session = http_sessions.session
+        async with session.get(f"https://api.ipsw.me/v4/ipsw/{version}") as resp:
+            # like before, any error response means there's no firmware info
+            if resp.status != 200:
                 return []
 
+            return await resp.json()
+
     @whisper_in_general()
     @slash_command(guild_ids=[cfg.guild_id], description="Get info about an Apple device.")
     async def deviceinfo(self, ctx: BlooContext, device: Option(str, description="Name or board identifier", autocomplete=device_autocomplete, required=True)) -> None:
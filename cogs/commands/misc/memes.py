@@ -1,27 +1,30 @@
+import asyncio
 import random
-import re
 import traceback
-from asyncio import Lock
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from io import BytesIO
 from typing import List
 
-import aiofiles
 import aiohttp
 import discord
-import markovify
 from psutil import users
 from data.model.tag import Tag
-from data.services.guild_service import guild_service
+from data.services.guild_service import async_guild_service
 from discord.commands import Option, slash_command
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord.ext.commands.cooldowns import CooldownMapping
 from utils.autocompleters import memes_autocomplete
 from utils.config import cfg
 from utils.context import BlooContext, PromptData
+from utils.http_session import http_sessions
 from utils.logger import logger
+from utils.markov_corpus import MarkovCorpus
+from utils.markov_model import MARKOV_MODEL_PATH, MarkovModel
 from utils.message_cooldown import MessageTextBucket
+from utils.message_pipeline import MessageContext, message_stage
 from utils.mod.filter import find_triggered_filters, find_triggered_raid_phrases
+from utils.patterns import PRINTABLE_ASCII, extract
 from utils.permissions.checks import (PermissionsFailure, memed_and_up,
                                       mempro_and_up, mod_and_up, whisper)
 from utils.permissions.permissions import permissions
@@ -52,10 +55,92 @@ class Memes(commands.Cog):
             1, 25, MessageTextBucket.custom)
         self.memegen_cooldown = CooldownMapping.from_cooldown(
             1, 45, MessageTextBucket.custom)
-        self.markov_lock = Lock()
+        self.markov_corpus = None
+        # built in the background when the cog loads, None until then
+        self.markov_model = None
+        self.markov_model_saved_changes = 0
+        # the corpus and the model are only changed and saved on this thread, so that file writes and
+        # compaction stay off the event loop, and changes are applied in the order the messages came in
+        self.markov_executor = None
         self.meme_phrases = ["{user}, have a look at this funny meme! LOL!", "Hey, {user}. Have a look at this knee-slapper!",
                              "{user}, look at this meme! Just don't show Aaron.", "{user} 😂😂😂😂😭😭😭😭"]
 
+        if cfg.markov_enabled:
+            self.markov_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="markov")
+            # reading the corpus can take a moment. everything else on the thread is queued behind this
+            self.markov_executor.submit(self.open_markov_corpus)
+            self.save_markov_model.start()
+
+    def cog_unload(self):
+        if self.markov_executor is None:
+            return
+
+        self.save_markov_model.cancel()
+        # the executor finishes what's queued before it stops, this runs last
+        self.markov_executor.submit(self.close_markov)
+        self.markov_executor.shutdown(wait=False)
+
+    async def run_markov(self, func, *args):
+        """Run a function on the markov thread and wait for its result
+        """
+
+        return await asyncio.get_running_loop().run_in_executor(self.markov_executor, func, *args)
+
+    def open_markov_corpus(self) -> None:
+        self.markov_corpus = MarkovCorpus()
+
+    def close_markov(self) -> None:
+        self.markov_corpus.close()
+        if self.markov_model is not None and self.markov_model.changes != self.markov_model_saved_changes:
+            self.markov_model.save()
+
+    @tasks.loop(minutes=10)
+    async def save_markov_model(self):
+        await self.run_markov(self.save_markov_snapshot)
+
+    def save_markov_snapshot(self) -> None:
+        model = self.markov_model
+        if model.changes == self.markov_model_saved_changes:
+            return
+
+        self.markov_model_saved_changes = model.changes
+        model.save()
+
+    @save_markov_model.before_loop
+    async def load_markov_model(self):
+        """Load the saved model and catch it up with the corpus. This is done on the CPU pool,
+        since building the model from scratch takes a few seconds.
+        """
+
+        def load(messages):
+            model = MarkovModel.load(MARKOV_MODEL_PATH)
+            model.sync(messages)
+            return model
+
+        def ready(model):
+            # pick up whatever changed in the corpus while we were loading
+            model.sync(self.markov_corpus.items())
+            self.markov_model = model
+
+        # the corpus is still being opened on the markov thread
+        messages = await self.run_markov(lambda: self.markov_corpus.items())
+        model = await self.bot.cpu_pool.run_light(load, messages, timeout=None)
+        await self.run_markov(ready, model)
+        logger.info(f"Markov model ready with {len(model)} messages")
+
+    def learn_message(self, message_id: int, text: str) -> None:
+        evicted = self.markov_corpus.add(message_id, text)
+        if self.markov_model is not None:
+            self.markov_model.add(message_id, text)
+            if evicted is not None:
+                self.markov_model.remove(evicted)
+
+    def forget_messages(self, message_ids: List[int]) -> None:
+        self.markov_corpus.remove_many(message_ids)
+        if self.markov_model is not None:
+            for message_id in message_ids:
+                self.markov_model.remove(message_id)
+
     @slash_command(guild_ids=[cfg.guild_id], description="Display a meme")
     async def meme(self, ctx: BlooContext, name: Option(str, description="Meme name", autocomplete=memes_autocomplete), user_to_mention: Option(discord.Member, description="User to mention in the response", required=False)):
         """Displays a meme.
@@ -71,7 +156,7 @@ class Memes(commands.Cog):
 
         """
         name = name.lower()
-        meme = guild_service.get_meme(name)
+        meme = await async_guild_service.get_meme(name)
 
         if meme is None:
             raise commands.BadArgument("That meme does not exist.")
@@ -80,7 +165,7 @@ class Memes(commands.Cog):
         bucket = self.meme_cooldown.get_bucket(meme.name)
         current = datetime.now().timestamp()
         # ratelimit only if the invoker is not a moderator
-        if bucket.update_rate_limit(current) and not (permissions.has(ctx.guild, ctx.author, 5) or ctx.guild.get_role(guild_service.get_guild().role_sub_mod) in ctx.author.roles):
+        if bucket.update_rate_limit(current) and not (permissions.has(ctx.guild, ctx.author, 5) or ctx.guild.get_role((await async_guild_service.get_guild()).role_sub_mod) in ctx.author.roles):
             raise commands.BadArgument("That meme is on cooldown.")
 
         # if the Meme has an image, add it to the embed
@@ -102,8 +187,7 @@ class Memes(commands.Cog):
         """List all meemes
         """
 
-        memes = sorted(guild_service.get_guild().memes,
-                       key=lambda meme: meme.name)
+        memes = await async_guild_service.get_memes()
 
         if len(memes) == 0:
             raise commands.BadArgument("There are no memes defined.")
@@ -138,7 +222,7 @@ class Memes(commands.Cog):
             raise commands.BadArgument(
                 "Meme names can't be longer than 1 word.")
 
-        if (guild_service.get_meme(name.lower())) is not None:
+        if name.lower() in await async_guild_service.get_meme_names():
             raise commands.BadArgument("Meme with that name already exists.")
 
         # ensure the attached file is an image
@@ -171,7 +255,7 @@ class Memes(commands.Cog):
             meme.image.put(image, content_type=_type)
 
         # store meme in database
-        guild_service.add_meme(meme)
+        await async_guild_service.add_meme(meme)
 
         _file = meme.image.read()
         if _file is not None:
@@ -200,7 +284,7 @@ class Memes(commands.Cog):
                 "Meme names can't be longer than 1 word.")
 
         name = name.lower()
-        meme = guild_service.get_meme(name)
+        meme = await async_guild_service.get_meme(name)
 
         if meme is None:
             raise commands.BadArgument("That meme does not exist.")
@@ -234,7 +318,7 @@ class Memes(commands.Cog):
         else:
             meme.image.delete()
 
-        if not guild_service.edit_meme(meme):
+        if not await async_guild_service.edit_meme(meme):
             raise commands.BadArgument("An error occurred editing that meme.")
 
         _file = meme.image.read()
@@ -262,14 +346,14 @@ class Memes(commands.Cog):
 
         name = name.lower()
 
-        meme = guild_service.get_meme(name)
+        meme = await async_guild_service.get_meme(name)
         if meme is None:
             raise commands.BadArgument("That meme does not exist.")
 
         if meme.image is not None:
             meme.image.delete()
 
-        guild_service.remove_meme(name)
+        await async_guild_service.remove_meme(name)
         await ctx.send_warning(f"Deleted meme `{meme.name}`.", delete_after=5)
 
     async def prepare_meme_embed(self, meme):
@@ -318,7 +402,7 @@ class Memes(commands.Cog):
         if cfg.resnext_token is None:
             raise commands.BadArgument("ResNext token is not set up!")
 
-        db_guild = guild_service.get_guild()
+        db_guild = await async_guild_service.get_guild()
         is_mod = permissions.has(ctx.guild, ctx.author, 5)
         if ctx.channel.id not in [db_guild.channel_general, db_guild.channel_botspam] and not is_mod:
             raise commands.BadArgument(f"This command can't be used here.")
@@ -342,34 +426,34 @@ class Memes(commands.Cog):
 
         contents_before = await image.read()
         contents = BytesIO(contents_before)
-        async with aiohttp.ClientSession(headers={"token": cfg.resnext_token}) as client:
-            form = aiohttp.FormData()
-            form.add_field(
-                "file", contents, content_type=image.content_type)
-            async with client.post('https://resnext.slim.rocks/', data=form) as resp:
-                if resp.status == 200:
-                    j = await resp.json()
-                    embed = discord.Embed()
-                    confidence = j.get('confidence')
-                    confidence_percent = f"{confidence*100:.1f}%"
-                    embed.description = f"image prediction: {j.get('classification')}\nconfidence: {confidence_percent}"
-                    embed.set_footer(
-                        text=f"Requested by {ctx.author} • /neuralnet • Processed in {j.get('process_time')}s")
-                    embed.set_image(url="attachment://image.png")
-
-                    if confidence < 0.25:
-                        embed.color = discord.Color.red()
-                    elif confidence < 0.5:
-                        embed.color = discord.Color.yellow()
-                    elif confidence < 0.75:
-                        embed.color = discord.Color.orange()
-                    else:
-                        embed.color = discord.Color.green()
-
-                    await ctx.respond(embed=embed, file=discord.File(BytesIO(contents_before), filename="image.png"))
+        client = http_sessions.session
+        form = aiohttp.FormData()
+        form.add_field(
+            "file", contents, content_type=image.content_type)
+        async with client.post('https://resnext.slim.rocks/', data=form, headers={"token": cfg.resnext_token}) as resp:
+            if resp.status == 200:
+                j = await resp.json()
+                embed = discord.Embed()
+                confidence = j.get('confidence')
+                confidence_percent = f"{confidence*100:.1f}%"
+                embed.description = f"image prediction: {j.get('classification')}\nconfidence: {confidence_percent}"
+                embed.set_footer(
+                    text=f"Requested by {ctx.author} • /neuralnet • Processed in {j.get('process_time')}s")
+                embed.set_image(url="attachment://image.png")
+
+                if confidence < 0.25:
+                    embed.color = discord.Color.red()
+                elif confidence < 0.5:
+                    embed.color = discord.Color.yellow()
+                elif confidence < 0.75:
+                    embed.color = discord.Color.orange()
                 else:
-                    raise commands.BadArgument(
-                        "An error occurred classifying that image.")
+                    embed.color = discord.Color.green()
+
+                await ctx.respond(embed=embed, file=discord.File(BytesIO(contents_before), filename="image.png"))
+            else:
+                raise commands.BadArgument(
+                    "An error occurred classifying that image.")
 
     memegen = discord.SlashCommandGroup("memegen", "Generate memes", guild_ids=[
                                         cfg.guild_id], permissions=slash_perms.memed_and_up())
@@ -381,13 +465,13 @@ class Memes(commands.Cog):
             raise commands.BadArgument("ResNext token is not set up!")
 
         # ensure text is english characters only with regex
-        if not re.match(r'^[\x20-\x7E]*$', top_text):
+        if not PRINTABLE_ASCII.match(top_text):
             raise commands.BadArgument("Top text can't have weird characters.")
-        if not re.match(r'^[\x20-\x7E]*$', bottom_text):
+        if not PRINTABLE_ASCII.match(bottom_text):
             raise commands.BadArgument(
                 "Bottom text can't have weird characters.")
 
-        db_guild = guild_service.get_guild()
+        db_guild = await async_guild_service.get_guild()
         is_mod = permissions.has(ctx.guild, ctx.author, 5)
         if ctx.channel.id not in [db_guild.channel_general, db_guild.channel_botspam] and not is_mod:
             raise commands.BadArgument(f"This command can't be used here.")
@@ -410,23 +494,23 @@ class Memes(commands.Cog):
         await ctx.defer(ephemeral=False)
         contents_before = await image.read()
         contents = BytesIO(contents_before)
-        async with aiohttp.ClientSession(headers={"token": cfg.resnext_token}) as client:
-            form = aiohttp.FormData()
-            form.add_field(
-                "file", contents, content_type=image.content_type)
-            async with client.post(f'https://resnext.slim.rocks/meme?top_text={top_text}&bottom_text={bottom_text}', data=form) as resp:
-                if resp.status == 200:
-                    resp = await resp.read()
-                    embed = discord.Embed()
-                    embed.set_footer(
-                        text=f"Requested by {ctx.author} • /memegen regular")
-                    embed.set_image(url="attachment://image.png")
-                    embed.color = discord.Color.random()
-
-                    await ctx.respond(embed=embed, file=discord.File(BytesIO(resp), filename="image.png"))
-                else:
-                    raise commands.BadArgument(
-                        "An error occurred generating that meme.")
+        client = http_sessions.session
+        form = aiohttp.FormData()
+        form.add_field(
+            "file", contents, content_type=image.content_type)
+        async with client.post(f'https://resnext.slim.rocks/meme?top_text={top_text}&bottom_text={bottom_text}', data=form, headers={"token": cfg.resnext_token}) as resp:
+            if resp.status == 200:
+                resp = await resp.read()
+                embed = discord.Embed()
+                embed.set_footer(
+                    text=f"Requested by {ctx.author} • /memegen regular")
+                embed.set_image(url="attachment://image.png")
+                embed.color = discord.Color.random()
+
+                await ctx.respond(embed=embed, file=discord.File(BytesIO(resp), filename="image.png"))
+            else:
+                raise commands.BadArgument(
+                    "An error occurred generating that meme.")
 
     @memed_and_up()
     @memegen.command(description="Motivational poster)")
@@ -435,13 +519,13 @@ class Memes(commands.Cog):
             raise commands.BadArgument("ResNext token is not set up!")
 
         # ensure text is english characters only with regex
-        if not re.match(r'^[\x20-\x7E]*$', top_text):
+        if not PRINTABLE_ASCII.match(top_text):
             raise commands.BadArgument("Top text can't have weird characters.")
-        if not re.match(r'^[\x20-\x7E]*$', bottom_text):
+        if not PRINTABLE_ASCII.match(bottom_text):
             raise commands.BadArgument(
                 "Bottom text can't have weird characters.")
 
-        db_guild = guild_service.get_guild()
+        db_guild = await async_guild_service.get_guild()
         is_mod = permissions.has(ctx.guild, ctx.author, 5)
         if ctx.channel.id not in [db_guild.channel_general, db_guild.channel_botspam] and not is_mod:
             raise commands.BadArgument(f"This command can't be used here.")
@@ -464,23 +548,23 @@ class Memes(commands.Cog):
         await ctx.defer(ephemeral=False)
         contents_before = await image.read()
         contents = BytesIO(contents_before)
-        async with aiohttp.ClientSession(headers={"token": cfg.resnext_token}) as client:
-            form = aiohttp.FormData()
-            form.add_field(
-                "file", contents, content_type=image.content_type)
-            async with client.post(f'https://resnext.slim.rocks/demotivational-meme?top_text={top_text}&bottom_text={bottom_text}', data=form) as resp:
-                if resp.status == 200:
-                    resp = await resp.read()
-                    embed = discord.Embed()
-                    embed.set_footer(
-                        text=f"Requested by {ctx.author} • /memegen motivate")
-                    embed.set_image(url="attachment://image.png")
-                    embed.color = discord.Color.random()
-
-                    await ctx.respond(embed=embed, file=discord.File(BytesIO(resp), filename="image.png"))
-                else:
-                    raise commands.BadArgument(
-                        "An error occurred generating that meme.")
+        client = http_sessions.session
+        form = aiohttp.FormData()
+        form.add_field(
+            "file", contents, content_type=image.content_type)
+        async with client.post(f'https://resnext.slim.rocks/demotivational-meme?top_text={top_text}&bottom_text={bottom_text}', data=form, headers={"token": cfg.resnext_token}) as resp:
+            if resp.status == 200:
+                resp = await resp.read()
+                embed = discord.Embed()
+                embed.set_footer(
+                    text=f"Requested by {ctx.author} • /memegen motivate")
+                embed.set_image(url="attachment://image.png")
+                embed.color = discord.Color.random()
+
+                await ctx.respond(embed=embed, file=discord.File(BytesIO(resp), filename="image.png"))
+            else:
+                raise commands.BadArgument(
+                    "An error occurred generating that meme.")
 
     @memed_and_up()
     @memegen.command(description="AI generated text from chat history")
@@ -488,7 +572,7 @@ class Memes(commands.Cog):
         if not cfg.markov_enabled:
             raise commands.BadArgument("Markov is not enabled in the bot's config.")
 
-        db_guild = guild_service.get_guild()
+        db_guild = await async_guild_service.get_guild()
         is_mod = permissions.has(ctx.guild, ctx.author, 5)
         if ctx.channel.id not in [db_guild.channel_general, db_guild.channel_botspam] and not is_mod:
             raise commands.BadArgument(f"This command can't be used here.")
@@ -500,18 +584,22 @@ class Memes(commands.Cog):
             if bucket.update_rate_limit(current):
                 raise commands.BadArgument("That command is on cooldown.")
 
-        async with aiofiles.open("bloo_ai.txt", mode="r") as f:
-            lines = await f.read()
-        lines = lines.split("\n")
-        if not lines:
+        text_model = self.markov_model
+        if text_model is None:
+            raise commands.BadArgument("The text model is still loading, try again in a bit.")
+        if not text_model:
             return
 
-        text_model = markovify.Text(lines)
-        for _ in range(5):
-            word = text_model.make_sentence()
-            if word:
-                await ctx.respond(word, allowed_mentions=discord.AllowedMentions(users=False, roles=False, everyone=False))
-                return
+        def generate():
+            for _ in range(5):
+                sentence = text_model.make_sentence()
+                if sentence:
+                    return sentence
+
+        word = await self.bot.cpu_pool.run_light(generate)
+        if word:
+            await ctx.respond(word, allowed_mentions=discord.AllowedMentions(users=False, roles=False, everyone=False))
+            return
         
         raise commands.BadArgument("Failed to generate some text. The text model probably isn't big enough yet...")
 
@@ -526,7 +614,7 @@ class Memes(commands.Cog):
         if member.display_avatar is None:
             raise commands.BadArgument("That member doesn't have an avatar set.")
 
-        db_guild = guild_service.get_guild()
+        db_guild = await async_guild_service.get_guild()
         is_mod = permissions.has(ctx.guild, ctx.author, 5)
         if ctx.channel.id not in [db_guild.channel_general, db_guild.channel_botspam] and not is_mod:
             raise commands.BadArgument(f"This command can't be used here.")
@@ -538,24 +626,27 @@ class Memes(commands.Cog):
             if bucket.update_rate_limit(current):
                 raise commands.BadArgument("That command is on cooldown.")
 
-        async with aiofiles.open("bloo_ai.txt", mode="r") as f:
-            lines = await f.read()
-        lines = lines.split("\n")
-        if not lines:
+        text_model = self.markov_model
+        if text_model is None:
+            raise commands.BadArgument("The text model is still loading, try again in a bit.")
+        if not text_model:
             return
 
-        text_model = markovify.Text(lines)
-        for _ in range(5):
-            sentence_1 = text_model.make_sentence()
-            while sentence_1 and not re.match(r'^[\x20-\x7E]*$', sentence_1):
+        def generate():
+            for _ in range(5):
                 sentence_1 = text_model.make_sentence()
+                while sentence_1 and not PRINTABLE_ASCII.match(sentence_1):
+                    sentence_1 = text_model.make_sentence()
 
-            sentence_2 = text_model.make_sentence()
-            while sentence_2 and not re.match(r'^[\x20-\x7E]*$', sentence_2):
                 sentence_2 = text_model.make_sentence()
-            
-            if sentence_1 and sentence_2:
-                break
+                while sentence_2 and not PRINTABLE_ASCII.match(sentence_2):
+                    sentence_2 = text_model.make_sentence()
+                
+                if sentence_1 and sentence_2:
+                    break
+            return sentence_1, sentence_2
+
+        sentence_1, sentence_2 = await self.bot.cpu_pool.run_light(generate)
 
         if not sentence_1 or not sentence_2:
             raise commands.BadArgument("Failed to generate some text. The text model probably isn't big enough yet...")
@@ -563,24 +654,24 @@ class Memes(commands.Cog):
         await ctx.defer(ephemeral=False)
         contents_before = await member.display_avatar.with_format("png").with_size(4096).read()
         contents = BytesIO(contents_before)
-        async with aiohttp.ClientSession(headers={"token": cfg.resnext_token}) as client:
-            form = aiohttp.FormData()
-            form.add_field(
-                "file", contents, content_type="image/png")
+        client = http_sessions.session
+        form = aiohttp.FormData()
+        form.add_field(
+            "file", contents, content_type="image/png")
             
-            async with client.post(f'https://resnext.slim.rocks/demotivational-meme?top_text={sentence_1}&bottom_text={sentence_2}', data=form) as resp:
-                if resp.status == 200:
-                    resp = await resp.read()
-                    embed = discord.Embed()
-                    embed.set_footer(
-                        text=f"Requested by {ctx.author} • /memegen aipfp")
-                    embed.set_image(url="attachment://image.png")
-                    embed.color = discord.Color.random()
-
-                    await ctx.respond(embed=embed, file=discord.File(BytesIO(resp), filename="image.png"))
-                else:
-                    raise commands.BadArgument(
-                        "An error occurred generating that meme. The image is probably too small.")
+        async with client.post(f'https://resnext.slim.rocks/demotivational-meme?top_text={sentence_1}&bottom_text={sentence_2}', data=form, headers={"token": cfg.resnext_token}) as resp:
+            if resp.status == 200:
+                resp = await resp.read()
+                embed = discord.Embed()
+                embed.set_footer(
+                    text=f"Requested by {ctx.author} • /memegen aipfp")
+                embed.set_image(url="attachment://image.png")
+                embed.color = discord.Color.random()
+
+                await ctx.respond(embed=embed, file=discord.File(BytesIO(resp), filename="image.png"))
+            else:
+                raise commands.BadArgument(
+                    "An error occurred generating that meme. The image is probably too small.")
 
 
     @mod_and_up()
@@ -589,7 +680,7 @@ class Memes(commands.Cog):
         if cfg.open_ai_token is None:
             raise commands.BadArgument("This command is disabled.")
 
-        db_guild = guild_service.get_guild()
+        db_guild = await async_guild_service.get_guild()
         is_mod = permissions.has(ctx.guild, ctx.author, 5)
         if ctx.channel.id not in [db_guild.channel_general, db_guild.channel_botspam] and not is_mod:
             raise commands.BadArgument(f"This command can't be used here.")
@@ -602,72 +693,48 @@ class Memes(commands.Cog):
                 raise commands.BadArgument("That command is on cooldown.")
 
         await ctx.defer(ephemeral=False)
-        async with aiohttp.ClientSession(headers={"Authorization": f"Bearer {cfg.open_ai_token}", "Content-Type": "application/json"}) as client:
-            async with client.post(f"https://api.openai.com/v1/engines/text-davinci-001/completions", json={
-                "prompt": prompt,
-                "temperature": 0.7,
-                "max_tokens": 64,
-                "top_p": 1,
-                "frequency_penalty": 0,
-                "presence_penalty": 0
-                }) as resp:
-
-                if resp.status == 200:
-                    data = await resp.json()
-                    text = data.get("choices")[0].get("text")
-                    text = discord.utils.escape_markdown(text)
-                    if find_triggered_filters(text, ctx.author) or find_triggered_raid_phrases(text, ctx.author):
-                        text = "A filter was triggered by this response. Please try a different prompt."
-
-                    embed = discord.Embed(color=discord.Color.random())
-                    prompt_formatted = discord.utils.escape_markdown(prompt)
-                    embed.add_field(name="Prompt", value=prompt_formatted[:1024] + "..." if len(prompt_formatted) > 1024 else prompt_formatted, inline=False)
-                    embed.add_field(name="Response", value=text or "API did not return a response.", inline=False)
-                    embed.set_footer(text=f"Requested by {ctx.author} • /memegen aitext")
-                    await ctx.respond(embed=embed)
-                else:
-                    raise commands.BadArgument("An OpenAI API error occured.")
+        client = http_sessions.session
+        async with client.post(f"https://api.openai.com/v1/engines/text-davinci-001/completions", headers={"Authorization": f"Bearer {cfg.open_ai_token}", "Content-Type": "application/json"}, json={
+            "prompt": prompt,
+            "temperature": 0.7,
+            "max_tokens": 64,
+            "top_p": 1,
+            "frequency_penalty": 0,
+            "presence_penalty": 0
+            }) as resp:
+
+            if resp.status == 200:
+                data = await resp.json()
+                text = data.get("choices")[0].get("text")
+                text = discord.utils.escape_markdown(text)
+                if find_triggered_filters(text, ctx.author, db_guild) or find_triggered_raid_phrases(text, ctx.author, db_guild):
+                    text = "A filter was triggered by this response. Please try a different prompt."
+
+                embed = discord.Embed(color=discord.Color.random())
+                prompt_formatted = discord.utils.escape_markdown(prompt)
+                embed.add_field(name="Prompt", value=prompt_formatted[:1024] + "..." if len(prompt_formatted) > 1024 else prompt_formatted, inline=False)
+                embed.add_field(name="Response", value=text or "API did not return a response.", inline=False)
+                embed.set_footer(text=f"Requested by {ctx.author} • /memegen aitext")
+                await ctx.respond(embed=embed)
+            else:
+                raise commands.BadArgument("An OpenAI API error occured.")
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
+    @message_stage()
+    async def on_message(self, message: discord.Message, context: MessageContext):
         if not cfg.markov_enabled:
             return
-        if message.guild is None:
-            return
-        if message.guild.id != cfg.guild_id:
-            return
-        db_guild = guild_service.get_guild()
+        db_guild = context.db_guild
         if message.channel.id not in [db_guild.channel_general, db_guild.channel_jailbreak]:
             return
         if not message.content or len(message.content) < 4:
             return
-        if message.author.bot:
-            return
-        if re.search(r'((https|http)?://\S+)', message.content):
+        if extract(message.content).has_link:
             return
 
-        if find_triggered_filters(message.content, message.author) or find_triggered_raid_phrases(message.content, message.author):
+        if find_triggered_filters(message.content, message.author, db_guild) or find_triggered_raid_phrases(message.content, message.author, db_guild):
             return
 
-        async with self.markov_lock:
-            async with aiofiles.open("bloo_ai.txt", mode="a+") as f:
-                await f.seek(0)
-                lines = await f.read()
-                if not lines:
-                    lines = []
-                else:
-                    lines = lines.split("\n")
-
-                if len(lines) > 50_000:
-                    lines_to_write = lines[-50_000:]
-                    lines_to_write.append(message.content)
-                elif not lines:
-                    lines_to_write = [message.content]
-                else:
-                    lines_to_write = lines + [message.content]
-
-            async with aiofiles.open("bloo_ai.txt", mode="w") as f:
-                await f.write("\n".join(lines_to_write))
+        await self.run_markov(self.learn_message, message.id, message.content)
 
     @commands.Cog.listener()
     async def on_message_delete(self, message: discord.Message):
@@ -677,33 +744,8 @@ class Memes(commands.Cog):
             return
         if message.guild.id != cfg.guild_id:
             return
-        db_guild = guild_service.get_guild()
-        if message.channel.id not in [db_guild.channel_general, db_guild.channel_jailbreak]:
-            return
-        if not message.content or len(message.content) < 4:
-            return
-        if message.author.bot:
-            return
-        if re.search(r'((https|http)?://\S+)', message.content):
-            return
-
-        removed = False
-        async with self.markov_lock:
-            async with aiofiles.open("bloo_ai.txt", mode="a+") as f:
-                await f.seek(0)
-                lines = await f.read()
-                if not lines:
-                    lines = []
-                else:
-                    lines = lines.split("\n")
 
-                while message.content in lines:
-                    removed = True
-                    lines.remove(message.content)
-
-            if removed:
-                async with aiofiles.open("bloo_ai.txt", mode="w") as f:
-                    await f.write("\n".join(lines))
+        await self.run_markov(self.forget_messages, [message.id])
 
     @commands.Cog.listener()
     async def on_bulk_message_delete(self, messages: List[discord.Message]):
@@ -713,35 +755,8 @@ class Memes(commands.Cog):
             return
         if messages[0].guild.id != cfg.guild_id:
             return
-        db_guild = guild_service.get_guild()
-
-        removed = False
-        async with self.markov_lock:
-            async with aiofiles.open("bloo_ai.txt", mode="a+") as f:
-                await f.seek(0)
-                lines = await f.read()
-                if not lines:
-                    lines = []
-                else:
-                    lines = lines.split("\n")
-
-                for message in messages:
-                    if not message.content or len(message.content) < 4:
-                        continue
-                    if message.author.bot:
-                        continue
-                    if message.channel.id not in [db_guild.channel_general, db_guild.channel_jailbreak]:
-                        return
-                    if re.search(r'((https|http)?://\S+)', message.content):
-                        continue
-
-                    while message.content in lines:
-                        removed = True
-                        lines.remove(message.content)
-
-            if removed:
-                async with aiofiles.open("bloo_ai.txt", mode="w") as f:
-                    await f.write("\n".join(lines))
+
+        await self.run_markov(self.forget_messages, [message.id for message in messages])
 
     @text.error
     @aipfp.error
@@ -1,22 +1,21 @@
-import base64
 import datetime
 import io
 import json
 import traceback
 
-import aiohttp
 import discord
 
 import pytimeparse
-from data.services.guild_service import guild_service
+from data.services.guild_service import async_guild_service
 from discord.commands import Option, slash_command, message_command, user_command
 from discord.ext import commands
 from discord.utils import format_dt
-from PIL import Image
 from utils.autocompleters import (bypass_autocomplete, get_ios_cfw,
                                   rule_autocomplete)
 from utils.config import cfg
 from utils.context import BlooContext
+from utils.cpu_jobs import emoji_to_png
+from utils.http_session import http_sessions
 from utils.logger import logger
 from utils.menu import BypassMenu
 from utils.permissions.checks import (PermissionsFailure, mod_and_up,
@@ -185,7 +184,7 @@ class Misc(commands.Cog):
 
         """
         # non-mod users will be ratelimited
-        bot_chan = guild_service.get_guild().channel_botspam
+        bot_chan = (await async_guild_service.get_guild()).channel_botspam
         if not permissions.has(ctx.guild, ctx.author, 5) and ctx.channel.id != bot_chan:
             bucket = self.spam_cooldown.get_bucket(ctx.interaction)
             if bucket.update_rate_limit():
@@ -203,11 +202,8 @@ class Misc(commands.Cog):
                     raise commands.BadArgument(
                         "Couldn't find a suitable emoji.")
 
-            im = Image.open(io.BytesIO(base64.b64decode(emoji_url_file)))
-            image_conatiner = io.BytesIO()
-            im.save(image_conatiner, 'png')
-            image_conatiner.seek(0)
-            _file = discord.File(image_conatiner, filename='image.png')
+            image = await self.bot.cpu_pool.run(emoji_to_png, emoji_url_file)
+            _file = discord.File(io.BytesIO(image), filename='image.png')
             await ctx.respond(file=_file)
         else:
             await ctx.respond(em.url)
@@ -282,20 +278,20 @@ class Misc(commands.Cog):
 
         """
         try:
-            async with aiohttp.ClientSession() as client:
-                async with client.get(URL(f'https://cve.circl.lu/api/cve/{id}', encoded=True)) as resp:
-                    response = json.loads(await resp.text())
-                    embed = discord.Embed(title=response.get(
-                        'id'), color=discord.Color.random())
-                    embed.description = response.get('summary')
-                    embed.add_field(name="Published", value=response.get(
-                        'Published'), inline=True)
-                    embed.add_field(name="Last Modified",
-                                    value=response.get('Modified'), inline=True)
-                    embed.add_field(name="Complexity", value=response.get(
-                        'access').get('complexity').title(), inline=False)
-                    embed.set_footer(text="Powered by https://cve.circl.lu")
-                    await ctx.respond(embed=embed, ephemeral=ctx.whisper)
+            client = http_sessions.session
+            async with client.get(URL(f'https://cve.circl.lu/api/cve/{id}', encoded=True)) as resp:
+                response = json.loads(await resp.text())
+                embed = discord.Embed(title=response.get(
+                    'id'), color=discord.Color.random())
+                embed.description = response.get('summary')
+                embed.add_field(name="Published", value=response.get(
+                    'Published'), inline=True)
+                embed.add_field(name="Last Modified",
+                                value=response.get('Modified'), inline=True)
+                embed.add_field(name="Complexity", value=response.get(
+                    'access').get('complexity').title(), inline=False)
+                embed.set_footer(text="Powered by https://cve.circl.lu")
+                await ctx.respond(embed=embed, ephemeral=ctx.whisper)
         except Exception:
             raise commands.BadArgument("Could not find CVE.")
 
@@ -391,15 +387,15 @@ class Misc(commands.Cog):
     @slash_command(guild_ids=[cfg.guild_id], description="View the status of various Discord features")
     @commands.guild_only()
     async def dstatus(self, ctx):
-        async with aiohttp.ClientSession() as session:
-            async with session.get("https://discordstatus.com/api/v2/components.json") as resp:
-                if resp.status == 200:
-                    components = await resp.json()
-
-        async with aiohttp.ClientSession() as session:
-            async with session.get("https://discordstatus.com/api/v2/incidents.json") as resp:
-                if resp.status == 200:
-                    incidents = await resp.json()
+        session = http_sessions.session
+        async with session.get("https://discordstatus.com/api/v2/components.json") as resp:
+            if resp.status == 200:
+                components = await resp.json()
+
+        session = http_sessions.session
+        async with session.get("https://discordstatus.com/api/v2/incidents.json") as resp:
+            if resp.status == 200:
+                incidents = await resp.json()
 
         api_status = components.get('components')[0].get('status').title() # API
         mp_status = components.get('components')[4].get('status').title() # Media Proxy
@@ -3,7 +3,7 @@ from discord.commands import slash_command
 from discord.ext import commands
 
 import traceback
-from data.services.guild_service import guild_service
+from data.services.guild_service import async_guild_service
 from utils.config import cfg
 from utils.logger import logger
 from utils.context import BlooContext, PromptData
@@ -25,7 +25,7 @@ class SubNews(commands.Cog):
         /subnews
         
         """
-        db_guild = guild_service.get_guild()
+        db_guild = await async_guild_service.get_guild()
 
         channel = ctx.guild.get_channel(db_guild.channel_subnews)
         if not channel:
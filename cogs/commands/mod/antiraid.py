@@ -3,8 +3,8 @@ from discord.commands import Option, slash_command
 from discord.ext import commands
 
 import traceback
-from data.services.guild_service import guild_service
-from data.services.user_service import user_service
+from data.services.guild_service import async_guild_service
+from data.services.user_service import async_user_service
 from utils.config import cfg
 from utils.logger import logger
 from utils.context import BlooContext, PromptData
@@ -36,7 +36,7 @@ class AntiRaid(commands.Cog):
 
         # these are phrases that when said by a whitename, automatically bans them.
         # for example: known scam URLs
-        done = guild_service.add_raid_phrase(phrase)
+        done = await async_guild_service.add_raid_phrase(phrase)
         if not done:
             raise commands.BadArgument("That phrase is already in the list.")
         else:
@@ -71,7 +71,7 @@ class AntiRaid(commands.Cog):
             phrases = [phrase.strip() for phrase in phrases if phrase.strip()]
 
             phrases_contenders = set(phrases)
-            phrases_already_in_db = set([phrase.word for phrase in guild_service.get_guild().raid_phrases])
+            phrases_already_in_db = set([phrase.word for phrase in (await async_guild_service.get_guild()).raid_phrases])
 
             duplicate_count = len(phrases_already_in_db & phrases_contenders) # count how many duplicates we have
             new_phrases = list(phrases_contenders - phrases_already_in_db)
@@ -98,7 +98,7 @@ class AntiRaid(commands.Cog):
         if do_add:
             async with ctx.typing():
                 for phrase in new_phrases:
-                    guild_service.add_raid_phrase(phrase)
+                    await async_guild_service.add_raid_phrase(phrase)
 
             await ctx.send_success(f"Added {len(new_phrases)} phrases to the raid filter.", followup=True)
         else:
@@ -122,11 +122,11 @@ class AntiRaid(commands.Cog):
 
         word = phrase.lower()
 
-        words = guild_service.get_guild().raid_phrases
+        words = (await async_guild_service.get_guild()).raid_phrases
         words = list(filter(lambda w: w.word.lower() == word.lower(), words))
 
         if len(words) > 0:
-            guild_service.remove_raid_phrase(words[0].word)
+            await async_guild_service.remove_raid_phrase(words[0].word)
             await ctx.send_success("Deleted!", delete_after=5)
         else:
             raise commands.BadArgument("That word is not a raid phrase.")
@@ -148,9 +148,9 @@ class AntiRaid(commands.Cog):
         """
 
         if mode is None:
-            mode = not guild_service.get_guild().ban_today_spam_accounts
+            mode = not (await async_guild_service.get_guild()).ban_today_spam_accounts
 
-        guild_service.set_spam_mode(mode)
+        await async_guild_service.set_spam_mode(mode)
         await ctx.send_success(description=f"We {'**will ban**' if mode else 'will **not ban**'} accounts created today in join spam filter.")
 
     @admin_and_up()
@@ -171,13 +171,13 @@ class AntiRaid(commands.Cog):
             
         """
 
-        profile = user_service.get_user(user.id)
+        profile = await async_user_service.get_user(user.id)
         if mode is None:
             profile.raid_verified = not profile.raid_verified
         else:
             profile.raid_verified = mode
 
-        profile.save()
+        await async_user_service.run(profile.save)
 
         await ctx.send_success(description=f"{'**Verified**' if profile.raid_verified else '**Unverified**'} user {user.mention}.")
 
@@ -241,20 +241,20 @@ class AntiRaid(commands.Cog):
         """
 
         channel = channel or ctx.channel
-        if channel.id in guild_service.get_locked_channels():
+        if channel.id in await async_guild_service.get_locked_channels():
             raise commands.BadArgument("That channel is already lockable.")
         
-        guild_service.add_locked_channels(channel.id)
+        await async_guild_service.add_locked_channels(channel.id)
         await ctx.send_success(f"Added {channel.mention} as lockable channel!")
 
     @admin_and_up()
     @slash_command(guild_ids=[cfg.guild_id], description="Mark a channel as automatically not freezable during a raid", permissions=slash_perms.admin_and_up())
     async def unfreezeable(self,  ctx: BlooContext, channel: Option(discord.TextChannel, description="Channel to mark as not freezeable", required=False) = None):
         channel = channel or ctx.channel
-        if channel.id not in guild_service.get_locked_channels():
+        if channel.id not in await async_guild_service.get_locked_channels():
             raise commands.BadArgument("That channel isn't already lockable.")
         
-        guild_service.remove_locked_channels(channel.id)
+        await async_guild_service.remove_locked_channels(channel.id)
         await ctx.send_success(f"Removed {channel.mention} as lockable channel!")
             
     @admin_and_up()
@@ -267,7 +267,7 @@ class AntiRaid(commands.Cog):
         /freeze
         """
         
-        channels = guild_service.get_locked_channels()
+        channels = await async_guild_service.get_locked_channels()
         if not channels:
             raise commands.BadArgument("No freezeable channels! Set some using `/freezeable`.")
         
@@ -295,7 +295,7 @@ class AntiRaid(commands.Cog):
         /unfreeze
         """
 
-        channels = guild_service.get_locked_channels()
+        channels = await async_guild_service.get_locked_channels()
         if not channels:
             raise commands.BadArgument("No unfreezeable channels! Set some using `/freezeable`.")
         
@@ -313,7 +313,7 @@ class AntiRaid(commands.Cog):
             raise commands.BadArgument("Server is already unlocked or my permissions are wrong.")
 
     async def lock_unlock_channel(self,  ctx: BlooContext, channel, lock=None):
-        db_guild = guild_service.get_guild()
+        db_guild = await async_guild_service.get_guild()
         
         default_role = ctx.guild.default_role
         member_plus = ctx.guild.get_role(db_guild.role_memberplus)   
@@ -2,8 +2,8 @@ import traceback
 
 import discord
 from data.model.filterword import FilterWord
-from data.services.guild_service import guild_service
-from data.services.user_service import user_service
+from data.services.guild_service import async_guild_service
+from data.services.user_service import async_user_service
 from discord.commands import Option, slash_command
 from discord.ext import commands
 from utils.autocompleters import filterwords_autocomplete
@@ -75,13 +75,13 @@ class Filters(commands.Cog):
 
         """
 
-        cur = user_service.get_user(ctx.author.id)
+        cur = await async_user_service.get_user(ctx.author.id)
         
         if val is None:
             val = not cur.offline_report_ping 
 
         cur.offline_report_ping = val
-        cur.save()
+        await async_user_service.run(cur.save)
 
         if val:
             await ctx.send_success("You will now be pinged for reports when offline")
@@ -114,7 +114,7 @@ class Filters(commands.Cog):
         fw.notify = notify
         fw.word = phrase
 
-        if not guild_service.add_filtered_word(fw):
+        if not await async_guild_service.add_filtered_word(fw):
             raise commands.BadArgument("That word is already filtered!")
 
         phrase = discord.utils.escape_markdown(phrase)
@@ -133,7 +133,7 @@ class Filters(commands.Cog):
         
         """
 
-        filters = guild_service.get_guild().filter_words
+        filters = (await async_guild_service.get_guild()).filter_words
         if len(filters) == 0:
             raise commands.BadArgument("The filterlist is currently empty. Please add a word using `/filter`.")
         
@@ -160,12 +160,12 @@ class Filters(commands.Cog):
 
         word = word.lower()
 
-        words = guild_service.get_guild().filter_words
+        words = (await async_guild_service.get_guild()).filter_words
         words = list(filter(lambda w: w.word.lower() == word.lower(), words))
         
         if len(words) > 0:
             words[0].piracy = not words[0].piracy
-            guild_service.update_filtered_word(words[0])
+            await async_guild_service.update_filtered_word(words[0])
 
             await ctx.send_success("Marked as a piracy word!" if words[0].piracy else "Removed as a piracy word!")
         else:
@@ -189,11 +189,11 @@ class Filters(commands.Cog):
 
         word = word.lower()
 
-        words = guild_service.get_guild().filter_words
+        words = (await async_guild_service.get_guild()).filter_words
         words = list(filter(lambda w: w.word.lower() == word.lower(), words))
         
         if len(words) > 0:
-            guild_service.remove_filtered_word(words[0].word)
+            await async_guild_service.remove_filtered_word(words[0].word)
             await ctx.send_success("Deleted!")
         else:
             await ctx.send_warning("That word is not filtered.", delete_after=5)            
@@ -219,7 +219,7 @@ class Filters(commands.Cog):
         except ValueError:
             raise commands.BadArgument("Invalid ID!")
 
-        if guild_service.add_whitelisted_guild(id):
+        if await async_guild_service.add_whitelisted_guild(id):
             await ctx.send_success("Whitelisted.")
         else:
             await ctx.send_warning("That server is already whitelisted.", delete_after=5)
@@ -245,7 +245,7 @@ class Filters(commands.Cog):
         except ValueError:
             raise commands.BadArgument("Invalid ID!")
 
-        if guild_service.remove_whitelisted_guild(id):
+        if await async_guild_service.remove_whitelisted_guild(id):
             await ctx.send_success("Blacklisted.")
         else:
             await ctx.send_warning("That server is already blacklisted.", delete_after=5)
@@ -266,7 +266,7 @@ class Filters(commands.Cog):
 
         """
 
-        if guild_service.add_ignored_channel(channel.id):
+        if await async_guild_service.add_ignored_channel(channel.id):
             await ctx.send_success(f"The filter will no longer run in {channel.mention}.")
         else:
             await ctx.send_warning("That channel is already ignored.", delete_after=5)
@@ -287,7 +287,7 @@ class Filters(commands.Cog):
             
         """
 
-        if guild_service.remove_ignored_channel(channel.id):
+        if await async_guild_service.remove_ignored_channel(channel.id):
             await ctx.send_success(f"Resumed filtering in {channel.mention}.")
         else:
             await ctx.send_warning("That channel is not already ignored.", delete_after=5)
@@ -310,12 +310,12 @@ class Filters(commands.Cog):
 
         word = word.lower()
 
-        words = guild_service.get_guild().filter_words
+        words = (await async_guild_service.get_guild()).filter_words
         words = list(filter(lambda w: w.word.lower() == word.lower(), words))
         
         if len(words) > 0:
             words[0].false_positive = not words[0].false_positive
-            if guild_service.update_filtered_word(words[0]):
+            if await async_guild_service.update_filtered_word(words[0]):
                 await ctx.send_success("Marked as potential false positive, we won't perform the enhanced checks on it!" if words[0].false_positive else "Removed as potential false positive.")
             else:
                 raise commands.BadArgument("Unexpected error occured trying to mark as false positive!")
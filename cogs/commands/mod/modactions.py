@@ -10,8 +10,8 @@ import humanize
 import pytimeparse
 from datetime import datetime, timedelta, timezone
 from data.model.case import Case
-from data.services.guild_service import guild_service
-from data.services.user_service import user_service
+from data.services.guild_service import async_guild_service
+from data.services.user_service import async_user_service
 from utils.autocompleters import liftwarn_autocomplete
 from utils.config import cfg
 from utils.logger import logger
@@ -97,7 +97,7 @@ class ModActions(commands.Cog):
         reason = escape_markdown(reason)
         reason = escape_mentions(reason)
 
-        db_guild = guild_service.get_guild()
+        db_guild = await async_guild_service.get_guild()
 
         log = await add_kick_case(ctx, member, reason, db_guild)
         await notify_user(member, f"You were kicked from {ctx.guild.name}", log)
@@ -126,7 +126,7 @@ class ModActions(commands.Cog):
         member = await mods_and_above_member_resolver(ctx, member)
         reason = "This Discord server is for iOS jailbreaking, not Roblox. Please join https://discord.gg/jailbreak instead, thank you!"
 
-        db_guild = guild_service.get_guild()
+        db_guild = await async_guild_service.get_guild()
 
         log = await add_kick_case(ctx, member, reason, db_guild)
         await notify_user(member, f"You were kicked from {ctx.guild.name}", log)
@@ -174,9 +174,7 @@ class ModActions(commands.Cog):
         if time > now + timedelta(days=14):
             raise commands.BadArgument("Mutes can't be longer than 14 days!")
 
-        db_guild = guild_service.get_guild()
         case = Case(
-            _id=db_guild.case_id,
             _type="MUTE",
             date=now,
             mod_id=ctx.author.id,
@@ -195,8 +193,7 @@ class ModActions(commands.Cog):
             raise commands.BadArgument(
                 "The database thinks this user is already muted.")
 
-        guild_service.inc_caseid()
-        user_service.add_case(member.id, case)
+        await async_user_service.create_case(member.id, case)
 
         log = prepare_mute_log(ctx.author, member, case)
         await ctx.respond(embed=log, delete_after=10)
@@ -205,7 +202,7 @@ class ModActions(commands.Cog):
         log.set_thumbnail(url=member.display_avatar)
 
         dmed = await notify_user(member, f"You have been muted in {ctx.guild.name}", log)
-        await submit_public_log(ctx, db_guild, member, log, dmed)
+        await submit_public_log(ctx, await async_guild_service.get_guild(), member, log, dmed)
 
     @mod_and_up()
     @slash_command(guild_ids=[cfg.guild_id], description="Unmute a user", permissions=slash_perms.mod_and_up())
@@ -227,7 +224,7 @@ class ModActions(commands.Cog):
 
         member = await mods_and_above_member_resolver(ctx, member)
 
-        db_guild = guild_service.get_guild()
+        db_guild = await async_guild_service.get_guild()
 
         if not member.timed_out:
             raise commands.BadArgument("This user is not muted.")
@@ -240,14 +237,12 @@ class ModActions(commands.Cog):
             pass
 
         case = Case(
-            _id=db_guild.case_id,
             _type="UNMUTE",
             mod_id=ctx.author.id,
             mod_tag=str(ctx.author),
             reason=reason,
         )
-        guild_service.inc_caseid()
-        user_service.add_case(member.id, case)
+        await async_user_service.create_case(member.id, case)
 
         log = prepare_unmute_log(ctx.author, member, case)
 
@@ -278,7 +273,7 @@ class ModActions(commands.Cog):
 
         reason = escape_markdown(reason)
         reason = escape_mentions(reason)
-        db_guild = guild_service.get_guild()
+        db_guild = await async_guild_service.get_guild()
 
         await ctx.defer(ephemeral=False)
         member_is_external = isinstance(user, discord.User)
@@ -341,21 +336,18 @@ class ModActions(commands.Cog):
 
         self.bot.ban_cache.unban(user.id)
 
-        db_guild = guild_service.get_guild()
         case = Case(
-            _id=db_guild.case_id,
             _type="UNBAN",
             mod_id=ctx.author.id,
             mod_tag=str(ctx.author),
             reason=reason,
         )
-        guild_service.inc_caseid()
-        user_service.add_case(user.id, case)
+        await async_user_service.create_case(user.id, case)
 
         log = prepare_unban_log(ctx.author, user, case)
         await ctx.respond(embed=log, delete_after=10)
 
-        await submit_public_log(ctx, db_guild, user, log)
+        await submit_public_log(ctx, await async_guild_service.get_guild(), user, log)
 
     @mod_and_up()
     @slash_command(guild_ids=[cfg.guild_id], description="Purge channel messages", permissions=slash_perms.mod_and_up())
@@ -407,7 +399,7 @@ class ModActions(commands.Cog):
         user = await mods_and_above_external_resolver(ctx, user)
 
         # retrieve user's case with given ID
-        cases = user_service.get_cases(user.id)
+        cases = await async_user_service.get_cases(user.id)
         case = cases.cases.filter(_id=case_id).first()
 
         reason = escape_markdown(reason)
@@ -424,7 +416,7 @@ class ModActions(commands.Cog):
             raise commands.BadArgument(
                 message=f"Case with ID {case_id} already lifted.")
 
-        u = user_service.get_user(id=user.id)
+        u = await async_user_service.get_user(id=user.id)
         if u.warn_points - int(case.punishment) < 0:
             raise commands.BadArgument(
                 message=f"Can't lift Case #{case_id} because it would make {user.mention}'s points negative.")
@@ -435,17 +427,17 @@ class ModActions(commands.Cog):
         case.lifted_by_tag = str(ctx.author)
         case.lifted_by_id = ctx.author.id
         case.lifted_date = datetime.now()
-        cases.save()
+        await async_user_service.run(cases.save)
 
         # remove the warn points from the user in DB
-        user_service.inc_points(user.id, -1 * int(case.punishment))
+        await async_user_service.inc_points(user.id, -1 * int(case.punishment))
         dmed = True
         # prepare log embed, send to #public-mod-logs, user, channel where invoked
         log = prepare_liftwarn_log(ctx.author, user, case)
         dmed = await notify_user(user, f"Your warn has been lifted in {ctx.guild}.", log)
 
         await ctx.respond(embed=log, delete_after=10)
-        await submit_public_log(ctx, guild_service.get_guild(), user, log, dmed)
+        await submit_public_log(ctx, await async_guild_service.get_guild(), user, log, dmed)
 
     @mod_and_up()
     @slash_command(guild_ids=[cfg.guild_id], description="Edit case reason", permissions=slash_perms.mod_and_up())
@@ -470,7 +462,7 @@ class ModActions(commands.Cog):
         user = await mods_and_above_external_resolver(ctx, user)
 
         # retrieve user's case with given ID
-        cases = user_service.get_cases(user.id)
+        cases = await async_user_service.get_cases(user.id)
         case = cases.cases.filter(_id=case_id).first()
 
         new_reason = escape_markdown(new_reason)
@@ -484,7 +476,7 @@ class ModActions(commands.Cog):
         old_reason = case.reason
         case.reason = new_reason
         case.date = datetime.now()
-        cases.save()
+        await async_user_service.run(cases.save)
 
         dmed = True
         log = prepare_editreason_log(ctx.author, user, case, old_reason)
@@ -492,7 +484,7 @@ class ModActions(commands.Cog):
         dmed = await notify_user(user, f"Your case was updated in {ctx.guild.name}.", log)
 
         public_chan = ctx.guild.get_channel(
-            guild_service.get_guild().channel_public)
+            (await async_guild_service.get_guild()).channel_public)
 
         found = False
         async with ctx.typing():
@@ -551,18 +543,16 @@ class ModActions(commands.Cog):
         if points < 1:
             raise commands.BadArgument("Points can't be lower than 1.")
 
-        u = user_service.get_user(id=user.id)
+        u = await async_user_service.get_user(id=user.id)
         if u.warn_points - points < 0:
             raise commands.BadArgument(
                 message=f"Can't remove {points} points because it would make {user.mention}'s points negative.")
 
         # passed sanity checks, so update the case in DB
         # remove the warn points from the user in DB
-        user_service.inc_points(user.id, -1 * points)
+        await async_user_service.inc_points(user.id, -1 * points)
 
-        db_guild = guild_service.get_guild()
         case = Case(
-            _id=db_guild.case_id,
             _type="REMOVEPOINTS",
             mod_id=ctx.author.id,
             mod_tag=str(ctx.author),
@@ -570,17 +560,15 @@ class ModActions(commands.Cog):
             reason=reason,
         )
 
-        # increment DB's max case ID for next case
-        guild_service.inc_caseid()
-        # add case to db
-        user_service.add_case(user.id, case)
+        # add case to db, which also gives it the next case ID
+        await async_user_service.create_case(user.id, case)
 
         # prepare log embed, send to #public-mod-logs, user, channel where invoked
         log = prepare_removepoints_log(ctx.author, user, case)
         dmed = await notify_user(user, f"Your points were removed in {ctx.guild.name}.", log)
 
         await ctx.respond(embed=log, delete_after=10)
-        await submit_public_log(ctx, db_guild, user, log, dmed)
+        await submit_public_log(ctx, await async_guild_service.get_guild(), user, log, dmed)
 
     @unmute.error
     @mute.error
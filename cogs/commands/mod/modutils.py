@@ -4,8 +4,8 @@ import traceback
 import discord
 import pytz
 from data.model.case import Case
-from data.services.guild_service import guild_service
-from data.services.user_service import user_service
+from data.services.guild_service import async_guild_service
+from data.services.user_service import async_user_service
 from discord.commands import Option, slash_command
 from discord.commands.errors import ApplicationCommandInvokeError
 from discord.ext import commands
@@ -48,7 +48,7 @@ class ModUtils(commands.Cog):
                 raise commands.BadArgument(
                     f"Couldn't find user with ID {newmember}")
 
-        u, case_count = user_service.transfer_profile(oldmember.id, newmember.id)
+        u, case_count = await async_user_service.transfer_profile(oldmember.id, newmember.id)
 
         embed = discord.Embed(title="Transferred profile")
         embed.description = f"We transferred {oldmember.mention}'s profile to {newmember.mention}"
@@ -75,14 +75,13 @@ class ModUtils(commands.Cog):
             await ctx.send_error("You can't call that on me :(")
             raise commands.BadArgument("You can't call that on me :(")
 
-        results = user_service.get_user(user.id)
+        results = await async_user_service.get_user(user.id)
         results.is_clem = True
         results.is_xp_frozen = True
         results.warn_points = 599
-        results.save()
+        await async_user_service.run(results.save)
 
         case = Case(
-            _id=guild_service.get_guild().case_id,
             _type="CLEM",
             mod_id=ctx.author.id,
             mod_tag=str(ctx.author),
@@ -90,19 +89,17 @@ class ModUtils(commands.Cog):
             reason="No reason."
         )
 
-        # incrememnt DB's max case ID for next case
-        guild_service.inc_caseid()
-        # add case to db
-        user_service.add_case(user.id, case)
+        # add case to db, which also gives it the next case ID
+        await async_user_service.create_case(user.id, case)
 
         await ctx.send_success(f"{user.mention} was put on clem.")
 
     @admin_and_up()
     @slash_command(guild_ids=[cfg.guild_id], description="Freeze a user's XP", permissions=slash_perms.admin_and_up())
     async def freezexp(self, ctx: BlooContext, user: discord.Member):
-        results = user_service.get_user(user.id)
+        results = await async_user_service.get_user(user.id)
         results.is_xp_frozen = not results.is_xp_frozen
-        results.save()
+        await async_user_service.run(results.save)
 
         await ctx.send_success(f"{user.mention}'s xp was {'frozen' if results.is_xp_frozen else 'unfrozen'}.")
 
@@ -113,12 +110,12 @@ class ModUtils(commands.Cog):
             await ctx.send_error("You can't call that on me :(")
             raise commands.BadArgument("You can't call that on me :(")
         
-        results = user_service.get_user(user.id)
+        results = await async_user_service.get_user(user.id)
         results.birthday_excluded = True
         results.birthday = None
-        results.save()
+        await async_user_service.run(results.save)
 
-        birthday_role = ctx.guild.get_role(guild_service.get_guild().role_birthday)
+        birthday_role = ctx.guild.get_role((await async_guild_service.get_guild()).role_birthday)
         if birthday_role is None:
             return
         
@@ -134,16 +131,16 @@ class ModUtils(commands.Cog):
             await ctx.send_error("You can't call that on me :(")
             raise commands.BadArgument("You can't call that on me :(")
 
-        results = user_service.get_user(user.id)
+        results = await async_user_service.get_user(user.id)
         results.birthday = None
-        results.save()
+        await async_user_service.run(results.save)
 
         try:
             ctx.tasks.cancel_unbirthday(user.id)
         except Exception:
             pass
 
-        birthday_role = ctx.guild.get_role(guild_service.get_guild().role_birthday)
+        birthday_role = ctx.guild.get_role((await async_guild_service.get_guild()).role_birthday)
         if birthday_role is None:
             return
 
@@ -171,9 +168,9 @@ class ModUtils(commands.Cog):
             raise commands.BadArgument("You gave an invalid date.")
         
 
-        results = user_service.get_user(user.id)
+        results = await async_user_service.get_user(user.id)
         results.birthday = [month, date]
-        results.save()
+        await async_user_service.run(results.save)
 
         await ctx.send_success(f"{user.mention}'s birthday was set.")
 
@@ -183,7 +180,7 @@ class ModUtils(commands.Cog):
         eastern = pytz.timezone('US/Eastern')
         today = datetime.datetime.today().astimezone(eastern)
         if today.month == month and today.day == date:
-            birthday_role = ctx.guild.get_role(guild_service.get_guild().role_birthday)
+            birthday_role = ctx.guild.get_role((await async_guild_service.get_guild()).role_birthday)
             if birthday_role is None:
                 return
             if birthday_role in user.roles:
@@ -217,13 +214,13 @@ class ModUtils(commands.Cog):
         if command.lower() not in _commands:
             raise commands.BadArgument("That command doesn't exist.")
 
-        db_user = user_service.get_user(user.id)
+        db_user = await async_user_service.get_user(user.id)
         if command in db_user.command_bans:
             db_user.command_bans[command] = not db_user.command_bans[command]
         else:
             db_user.command_bans[command] = True
 
-        db_user.save()
+        await async_user_service.run(db_user.save)
 
         await ctx.send_success(f"{user.mention} was {'banned' if db_user.command_bans[command] else 'unbanned'} from using `/{command}`.")
 
@@ -236,13 +233,13 @@ class ModUtils(commands.Cog):
         await channel.send(message)
         ctx.whisper = True
         await ctx.send_success("Done!")
-        logging_channel = ctx.guild.get_channel(guild_service.get_guild().channel_private)
+        logging_channel = ctx.guild.get_channel((await async_guild_service.get_guild()).channel_private)
         embed = discord.Embed(color=discord.Color.gold(), title="Someone abused me :(", description=f"In {ctx.channel.mention} {ctx.author.mention} said:\n\n{message}" )
         await logging_channel.send(embed=embed)
 
     async def prepare_rundown_embed(self, ctx: BlooContext, user):
-        user_info = user_service.get_user(user.id)
-        rd = user_service.rundown(user.id)
+        user_info = await async_user_service.get_user(user.id)
+        rd = await async_user_service.rundown(user.id)
         rd_text = ""
         for r in rd:
             if r._type == "WARN":
@@ -1,23 +1,27 @@
-import re
+import asyncio
+import hashlib
 import string
-from asyncio import Lock
+import traceback
 from datetime import datetime, timedelta, timezone
 
 import discord
 from data.model.case import Case
-from data.services.guild_service import guild_service
-from data.services.user_service import user_service
+from data.services.guild_service import async_guild_service
+from data.services.user_service import async_user_service
 from discord.ext import commands
-from expiringdict import ExpiringDict
+from typing import List, Tuple
 from fold_to_ascii import fold
 from utils.config import cfg
 from utils.context import BlooOldContext
-from utils.message_cooldown import MessageTextBucket
-from utils.mod.filter import find_triggered_raid_phrases
+from utils.message_pipeline import MessageContext, StagePriority, message_stage
+from utils.mod.filter import find_triggered_raid_phrases, normalize
 from utils.mod.global_modactions import mute
-from utils.mod.mod_logs import prepare_ban_log
+from utils.logger import logger
+from utils.mod.mod_logs import prepare_ban_log, prepare_mass_ban_log
 from utils.mod.report import report_raid, report_raid_phrase, report_spam
+from utils.patterns import MENTION, extract
 from utils.permissions.permissions import permissions
+from utils.sliding_window import SlidingWindow
 
 
 class RaidType:
@@ -26,38 +30,41 @@ class RaidType:
     MessageSpam = 3
     JoinSpamOverTime = 4
     RaidPhraseDetection = 5
+    DuplicateSpam = 6
 
 class AntiRaidMonitor(commands.Cog):
+    # how many bans of a batch are in flight at once
+    BAN_CONCURRENCY = 5
+    # Discord's limits for the embeds of a single message
+    MAX_EMBEDS_PER_MESSAGE = 10
+    MAX_EMBED_CHARACTERS_PER_MESSAGE = 6000
+    # shorter messages ("hi", "lol", "+1") are posted by different people all the time
+    DUPLICATE_MIN_LENGTH = 15
+    # only accounts this new, or that joined this recently, count towards duplicate message spam.
+    # established members repeating each other is just chatter
+    DUPLICATE_MAX_ACCOUNT_AGE = timedelta(days=14)
+    DUPLICATE_MAX_MEMBER_AGE = timedelta(days=1)
+
     def __init__(self, bot):
         self.bot = bot
         
-        # cooldown to monitor if too many users join in a short period of time (more than 10 within 8 seconds)
-        self.join_raid_detection_threshold = commands.CooldownMapping.from_cooldown(rate=10, per=8, type=commands.BucketType.guild)
-        # cooldown to monitor if users are spamming a message (8 within 6 seconds)
-        self.message_spam_detection_threshold = commands.CooldownMapping.from_cooldown(rate=7, per=6.0, type=commands.BucketType.member)
-        # cooldown to monitor if too many accounts created on the same date are joining within a short period of time 
-        # (5 accounts created on the same date joining within 45 minutes of each other)
-        self.join_overtime_raid_detection_threshold = commands.CooldownMapping.from_cooldown(rate=4, per=2700, type=MessageTextBucket.custom)
-
-        # cooldown to monitor how many times AntiRaid has been triggered (5 triggers per 15 seconds puts server in lockdown)
-        self.raid_detection_threshold = commands.CooldownMapping.from_cooldown(rate=4, per=15.0, type=commands.BucketType.guild)
+        # sliding windows also remember who was in them, so we know who to ban once one is tripped
+        # monitor if too many users join in a short period of time (more than 10 within 8 seconds), per guild
+        self.join_raid_detection_threshold = SlidingWindow(rate=10, per=8)
+        # monitor if users are spamming a message (8 within 6 seconds), per member
+        self.message_spam_detection_threshold = SlidingWindow(rate=7, per=6.0)
+        # monitor if too many accounts created on the same date are joining within a short period of time
+        # (5 accounts created on the same date joining within 45 minutes of each other), per creation date
+        self.join_overtime_raid_detection_threshold = SlidingWindow(rate=4, per=2700)
+        # monitor if many whitenames post the same message (more than 4 accounts within 30 seconds), per message hash
+        self.duplicate_message_detection_threshold = SlidingWindow(rate=4, per=30.0, max_events=100)
+
+        # monitor how many times AntiRaid has been triggered (5 triggers per 15 seconds puts server in lockdown), per guild
+        self.raid_detection_threshold = SlidingWindow(rate=4, per=15.0)
         # cooldown to only send one raid alert for moderators per 10 minutes
         self.raid_alert_cooldown = commands.CooldownMapping.from_cooldown(1, 600.0, commands.BucketType.guild)
         # cooldown to only send one report per spamming member
         self.spam_report_cooldown = commands.CooldownMapping.from_cooldown(rate=1, per=10.0, type=commands.BucketType.member)
-        
-        # stores the users that trigger self.join_raid_detection_threshold so we can ban them
-        self.join_user_mapping = ExpiringDict(max_len=100, max_age_seconds=10)
-        # stores the users that trigger self.message_spam_detection_threshold so we can ban them
-        self.spam_user_mapping = ExpiringDict(max_len=100, max_age_seconds=10)
-        # stores the users that trigger self.join_overtime_raid_detection_threshold so we can ban them
-        self.join_overtime_mapping = ExpiringDict(max_len=100, max_age_seconds=2700)
-        # stores the users that we have banned so we don't try to ban them repeatedly
-        self.ban_user_mapping = ExpiringDict(max_len=100, max_age_seconds=120)
-        
-        # locks to prevent race conditions when banning concurrently
-        self.join_overtime_lock = Lock()
-        self.banning_lock = Lock()
 
     @commands.Cog.listener()
     async def on_member_join(self, member):
@@ -78,25 +85,18 @@ class AntiRaidMonitor(commands.Cog):
         
         
         """Detect whether more than 10 users join within 8 seconds"""
-        # add user to cooldown
+        # add user to the window
         current = datetime.now().timestamp()
-        join_spam_detection_bucket = self.join_raid_detection_threshold.get_bucket(member)
-        self.join_user_mapping[member.id] = member
         
-        # if ratelimit is triggered, we should ban all the users that joined in the past 8 seconds
-        if join_spam_detection_bucket.update_rate_limit(current):
-            users = list(self.join_user_mapping.keys())
-            for user in users:
-                try:
-                    user = self.join_user_mapping[user]
-                except KeyError:
-                    continue
-                
-                try:
-                    await self.raid_ban(user, reason="Join spam detected.")
-                except Exception:
-                    pass
-                
+        # if the window is tripped, we should ban all the users that joined in the past 8 seconds
+        if self.join_raid_detection_threshold.hit(member.guild.id, member, now=current):
+            users = self.join_raid_detection_threshold.members(member.guild.id, now=current)
+            self.join_raid_detection_threshold.discard(member.guild.id, users)
+            try:
+                await self.raid_ban_many(users, reason="Join spam detected.")
+            except Exception:
+                logger.error(f"Failed to ban join spam: {traceback.format_exc()}")
+
             raid_alert_bucket = self.raid_alert_cooldown.get_bucket(member)
             if not raid_alert_bucket.update_rate_limit(current):
                 await report_raid(member)
@@ -111,7 +111,7 @@ class AntiRaidMonitor(commands.Cog):
 
         # skip user if we manually verified them, i.e they were approved by a moderator
         # using the !verify command when they appealed a ban.
-        if user_service.get_user(member.id).raid_verified:
+        if (await async_user_service.get_user(member.id)).raid_verified:
             return
 
         # skip if it's an older account (before May 1st 2021)
@@ -121,7 +121,7 @@ class AntiRaidMonitor(commands.Cog):
         # this setting disables the filter for accounts created from "Today"
         # useful when we get alot of new users, for example when a new Jailbreak is released.
         # this setting is controlled using !spammode
-        if not guild_service.get_guild().ban_today_spam_accounts:
+        if not (await async_guild_service.get_guild()).ban_today_spam_accounts:
             now = datetime.today()
             now = [now.year, now.month, now.day]
             member_now = [ member.created_at.year, member.created_at.month, member.created_at.day]
@@ -132,52 +132,50 @@ class AntiRaidMonitor(commands.Cog):
         timestamp_bucket_for_logging = member.created_at.strftime(
             "%B %d, %Y, %I %p")
         # generate string representation for the account creation date (July 1st, 2021 for example).
-        # we will use this for the cooldown mechanism, to ratelimit accounts created on this date.
+        # we will use this as the key of the window, to ratelimit accounts created on this date.
         timestamp = member.created_at.strftime(
             "%B %d, %Y")
         
-        # store this user with all the users that were created on this date
-        async with self.join_overtime_lock:
-            if self.join_overtime_mapping.get(timestamp) is None:
-                self.join_overtime_mapping[timestamp] = [member]
-            else:
-                if member in self.join_overtime_mapping[timestamp]:
-                    return
-                
-                self.join_overtime_mapping[timestamp].append(member)
-
-        # handle ratelimitting. If ratelimit is triggered, ban all the users we know were created on this date.
-        bucket = self.join_overtime_raid_detection_threshold.get_bucket(timestamp)
         current = member.joined_at.replace(tzinfo=timezone.utc).timestamp()
-        if bucket.update_rate_limit(current):
-            users = [ m for m in self.join_overtime_mapping.get(timestamp) ]
-            for user in users:
-                try:
-                    await self.raid_ban(user, reason=f"Join spam over time detected (bucket `{timestamp_bucket_for_logging}`)", dm_user=True)
-                    self.join_overtime_mapping[timestamp].remove(user)
-                except Exception:
-                    pass
-
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        if message.guild is None:
-            return
-        if message.author.bot:
-            return
-        if message.guild.id != cfg.guild_id:
+        # a member rejoining only counts once
+        if self.join_overtime_raid_detection_threshold.has_member(timestamp, member, now=current):
             return
+
+        # store this user with all the users that were created on this date.
+        # if the window is tripped, ban all the users we know were created on this date.
+        if self.join_overtime_raid_detection_threshold.hit(timestamp, member, now=current):
+            users = self.join_overtime_raid_detection_threshold.members(timestamp, now=current)
+            # they still count towards the window, so the next account from this date is banned straight away
+            self.join_overtime_raid_detection_threshold.discard(timestamp, users)
+            try:
+                await self.raid_ban_many(users, reason=f"Join spam over time detected (bucket `{timestamp_bucket_for_logging}`)", dm_user=True)
+            except Exception:
+                logger.error(f"Failed to ban join spam over time: {traceback.format_exc()}")
+
+    @message_stage(StagePriority.MODERATION)
+    async def on_message(self, message: discord.Message, context: MessageContext) -> bool:
         message.author = message.guild.get_member(message.author.id)
-        if permissions.has(message.guild, message.author, 5):
-            return
+        if message.author is None or context.level >= 5:
+            return False
         
         if await self.ping_spam(message):  
             await self.handle_raid_detection(message, RaidType.PingSpam)
-        elif await self.raid_phrase_detected(message):
+        elif await self.raid_phrase_detected(message, context.db_guild):
             await self.handle_raid_detection(message, RaidType.RaidPhrase)
         elif await self.message_spam(message):
             await self.handle_raid_detection(message, RaidType.MessageSpam)
-        elif await self.detect_scam_link(message):
-            await self.report_possible_raid_phrase(message)
+        else:
+            # many accounts posting the same scam is a surer sign than what detect_scam_link looks for
+            cluster = self.duplicate_message_spam(message)
+            if cluster and self.looks_like_scam(message):
+                await self.handle_raid_detection(message, RaidType.DuplicateSpam, cluster)
+            elif await self.detect_scam_link(message):
+                await self.report_possible_raid_phrase(message)
+                return False
+            else:
+                return False
+
+        return True
 
     async def detect_scam_link(self, message: discord.Message):
         # check if message contains @everyone or @here
@@ -185,9 +183,8 @@ class AntiRaidMonitor(commands.Cog):
             ("take it" not in message.content and "airdrop" not in message.content and "nitro" not in message.content):
                 return False
 
-        # use regex to find if message contains url
-        url = re.search(r'(https?://\S+)', message.content)
-        if url is None:
+        # check if message contains url
+        if extract(message.content).first_url is None:
             return False
 
         # don't trigger if this user isn't a whitename
@@ -202,18 +199,34 @@ class AntiRaidMonitor(commands.Cog):
 
         return True
 
-    async def handle_raid_detection(self, message: discord.Message, raid_type: RaidType):
+    async def handle_raid_detection(self, message: discord.Message, raid_type: RaidType, user_ids: List[int] = None):
+        """Count a detection towards the raid threshold, and ban everyone involved in recent detections once it's reached.
+
+        Parameters
+        ----------
+        message : discord.Message
+            The message that was detected
+        raid_type : RaidType
+            What was detected
+        user_ids : List[int], optional
+            Everyone involved in the detection, by default only the author of the message.
+            They're banned along with the others once the threshold is reached.
+        """
+
         current = message.created_at.replace(tzinfo=timezone.utc).timestamp()
-        spam_detection_bucket = self.raid_detection_threshold.get_bucket(message)
         user = message.author
+        if user_ids is None:
+            user_ids = [user.id]
         
         do_freeze = False
         do_banning = False
-        self.spam_user_mapping[user.id] = 1
         
-        # has the antiraid filter been triggered 5 or more times in the past 10 seconds?
-        if spam_detection_bucket.update_rate_limit(current):
+        # has the antiraid filter been triggered 5 or more times in the past 15 seconds?
+        # a detection only counts once, however many accounts were involved in it
+        if self.raid_detection_threshold.hit(message.guild.id, user.id, now=current):
             do_banning = True
+
+        if do_banning:
             # yes! notify the mods and lock the server.
             raid_alert_bucket = self.raid_alert_cooldown.get_bucket(message)
             if not raid_alert_bucket.update_rate_limit(current):
@@ -226,29 +239,26 @@ class AntiRaidMonitor(commands.Cog):
             await self.freeze_server(message.guild)
 
         # ban all the spammers
-        if raid_type in [RaidType.PingSpam, RaidType.MessageSpam]:
-            if not do_banning and not do_freeze:
-                if raid_type is RaidType.PingSpam:
-                    title = "Ping spam detected"
-                else:
-                    title = "Message spam detected"
-                await report_spam(self.bot, message, user, title=title)
+        if raid_type in [RaidType.PingSpam, RaidType.MessageSpam, RaidType.DuplicateSpam]:
+            if raid_type is RaidType.PingSpam:
+                title = "Ping spam detected"
+            elif raid_type is RaidType.MessageSpam:
+                title = "Message spam detected"
             else:
-                users = list(self.spam_user_mapping.keys())
-                for user in users:
-                    try:
-                        _ = self.spam_user_mapping[user]
-                    except KeyError:
-                        continue
-                                        
-                    user = message.guild.get_member(user)
-                    if user is None:
-                        continue
-                    
-                    try:
-                        await self.raid_ban(user, reason="Ping spam detected" if raid_type is RaidType.PingSpam else "Message spam detected")
-                    except Exception:
-                        pass
+                title = "Duplicate message spam detected"
+
+            if do_banning or do_freeze:
+                user_ids = self.raid_detection_threshold.members(message.guild.id, now=current) + user_ids
+            elif raid_type is not RaidType.DuplicateSpam:
+                await report_spam(self.bot, message, user, title=title)
+                return
+
+            # new accounts posting the same scam are banned even if there were no other detections
+            users = [message.guild.get_member(user) for user in dict.fromkeys(user_ids)]
+            try:
+                await self.raid_ban_many([user for user in users if user is not None], reason=title)
+            except Exception:
+                logger.error(f"Failed to ban spammers: {traceback.format_exc()}")
 
     async def ping_spam(self, message):
         """If a user pings more than 5 people, or pings more than 2 roles, mute them.
@@ -276,12 +286,10 @@ class AntiRaidMonitor(commands.Cog):
         if permissions.has(message.guild, message.author, 1):
             return False
                 
-        bucket = self.message_spam_detection_threshold.get_bucket(message)
         current = message.created_at.replace(tzinfo=timezone.utc).timestamp()
 
-        if bucket.update_rate_limit(current):
+        if self.message_spam_detection_threshold.hit(message.author.id, now=current):
             bucket = self.spam_report_cooldown.get_bucket(message)
-            current = message.created_at.replace(tzinfo=timezone.utc).timestamp()
             if not bucket.update_rate_limit(current):
                 user = message.author
                 ctx = await self.bot.get_context(message, cls=BlooOldContext)
@@ -292,7 +300,53 @@ class AntiRaidMonitor(commands.Cog):
         
         return False
 
-    async def raid_phrase_detected(self, message):
+    def duplicate_message_spam(self, message) -> List[int]:
+        """If more than 4 new whitenames (new accounts, or accounts that just joined) post the same message
+        within 30 seconds, they're most likely raid accounts posting a scam. Messages are compared by a hash
+        of their normalized content, so changing the case, accents, spacing, punctuation or who is pinged
+        doesn't make a message different.
+
+        Returns
+        -------
+        List[int]
+            The IDs of the accounts that posted the message, once there are too many of them. Otherwise empty.
+        """
+
+        if permissions.has(message.guild, message.author, 1):
+            return []
+
+        # established members repeating each other is just chatter
+        now = message.created_at
+        joined_at = message.author.joined_at
+        if message.author.created_at < now - self.DUPLICATE_MAX_ACCOUNT_AGE and (joined_at is None or joined_at < now - self.DUPLICATE_MAX_MEMBER_AGE):
+            return []
+
+        text = normalize(MENTION.sub("", message.content)).folded_without_spaces_and_punctuation
+        if len(text) < self.DUPLICATE_MIN_LENGTH:
+            return []
+
+        key = hashlib.blake2b(text.encode(), digest_size=8).digest()
+        current = message.created_at.replace(tzinfo=timezone.utc).timestamp()
+        # only distinct accounts count, one member repeating themselves is caught by message_spam
+        if self.duplicate_message_detection_threshold.has_member(key, message.author.id, now=current):
+            return []
+
+        if not self.duplicate_message_detection_threshold.hit(key, message.author.id, now=current):
+            return []
+
+        cluster = self.duplicate_message_detection_threshold.members(key, now=current)
+        # they still count towards the window, so the next account posting it is flagged straight away
+        self.duplicate_message_detection_threshold.discard(key, cluster)
+        return cluster
+
+    def looks_like_scam(self, message) -> bool:
+        """Whether a message has a link or pings everyone, which duplicate message spam must have to be banned for.
+        Without one, it's more likely new members saying the same thing as each other.
+        """
+
+        return "@everyone" in message.content or "@here" in message.content or extract(message.content).first_url is not None
+
+    async def raid_phrase_detected(self, message, db_guild):
         """Raid phrases are specific phrases (such as known scam URLs), and upon saying them, whitenames
         will immediately be banned. Uses the same system as filters to search messages for the phrases.
         """
@@ -300,22 +354,22 @@ class AntiRaidMonitor(commands.Cog):
         if permissions.has(message.guild, message.author, 2):
             return False
 
-        if find_triggered_raid_phrases(message.content, message.author) is not None:
+        if find_triggered_raid_phrases(message.content, message.author, db_guild) is not None:
             await self.raid_ban(message.author)
             return True
 
         return False
 
     async def report_possible_raid_phrase(self, message):
-        # use regex to find url from message
-        url = re.search(r'(https?://\S+)', message.content)
+        # find url from message
+        url = extract(message.content).first_url
 
         # extract domain from url
-        domain = url.group(1).split("/")[2]
+        domain = url.split("/")[2]
 
         if domain in ["bit.ly", "github.com"]:
             # for bit.ly we don't want to ban the whole domain, just this specific one
-            domain = url.group(1)
+            domain = url
 
         ctx = await self.bot.get_context(message)
         user = message.author
@@ -331,53 +385,107 @@ class AntiRaidMonitor(commands.Cog):
             
     async def raid_ban(self, user: discord.Member, reason="Raid phrase detected", dm_user=False):
         """Helper function to ban users"""
-        
-        async with self.banning_lock:
-            # if self.ban_user_mapping.get(user.id) is not None:
+
+        await self.raid_ban_many([user], reason=reason, dm_user=dm_user)
+
+    async def raid_ban_many(self, users: List[discord.Member], reason="Raid phrase detected", dm_user=False):
+        """Ban a batch of users: one database round trip to reserve their case IDs and one to store the cases
+        of the bans that went through, the bans themselves run concurrently, and a single public log is posted
+        for the whole batch.
+        """
+
+        # claim the users before the first await, so that a batch running at the same time skips them
+        targets = []
+        for user in users:
             if self.bot.ban_cache.is_banned(user.id):
-                return
-            else:
-                self.bot.ban_cache.ban(user.id)
-            
-            db_guild = guild_service.get_guild()
-            
-            case = Case(
-                _id=db_guild.case_id,
-                _type="BAN",
-                date=datetime.now(),
-                mod_id=self.bot.user.id,
-                mod_tag=str(self.bot.user),
-                punishment="PERMANENT",
-                reason=reason
-            )
-
-            guild_service.inc_caseid()
-            user_service.add_case(user.id, case)
-            
+                continue
+            self.bot.ban_cache.ban(user.id)
+            targets.append(user)
+
+        if not targets:
+            return
+
+        first_case_id = await async_guild_service.allocate_case_ids(len(targets))
+        now = datetime.now()
+        bans = [(user, Case(
+            _id=first_case_id + i,
+            _type="BAN",
+            date=now,
+            mod_id=self.bot.user.id,
+            mod_tag=str(self.bot.user),
+            punishment="PERMANENT",
+            reason=reason
+        )) for i, user in enumerate(targets)]
+
+        # the ban route is rate limited per guild. discord.py waits out the limit for us,
+        # this just keeps us from queueing hundreds of requests behind it at once
+        semaphore = asyncio.Semaphore(self.BAN_CONCURRENCY)
+        results = await asyncio.gather(*[self.execute_ban(user, case, semaphore, dm_user) for user, case in bans], return_exceptions=True)
+        failed = [user for (user, _), result in zip(bans, results) if isinstance(result, Exception)]
+        if failed:
+            # they aren't banned, so let them be caught again. their reserved case IDs go unused
+            for user in failed:
+                self.bot.ban_cache.unban(user.id)
+            logger.error(f"Failed to ban {len(failed)} of {len(bans)} raiders: {', '.join(str(user.id) for user in failed)}")
+
+        # only record and log the bans that went through
+        bans = [ban for ban, result in zip(bans, results) if not isinstance(result, Exception)]
+        if not bans:
+            return
+        await async_user_service.add_cases_bulk([(user.id, case) for user, case in bans])
+
+        try:
+            await self.send_ban_log(targets[0].guild, bans, reason)
+        except Exception:
+            # the bans are done, a log that couldn't be posted shouldn't look like they failed
+            logger.error(f"Failed to post the raid ban log: {traceback.format_exc()}")
+
+    async def send_ban_log(self, guild: discord.Guild, bans: List[Tuple[discord.Member, Case]], reason: str):
+        db_guild = await async_guild_service.get_guild()
+        public_logs = guild.get_channel(db_guild.channel_public)
+        if not public_logs:
+            return
+
+        if len(bans) == 1:
+            user, case = bans[0]
             log = prepare_ban_log(self.bot.user, user, case)
-            
+            log.remove_author()
+            log.set_thumbnail(url=user.display_avatar)
+            await public_logs.send(embed=log)
+            return
+
+        # put as many embeds in each message as Discord allows
+        messages = [[]]
+        length = 0
+        for embed in prepare_mass_ban_log(self.bot.user, bans, reason):
+            if messages[-1] and (len(messages[-1]) == self.MAX_EMBEDS_PER_MESSAGE or length + len(embed) > self.MAX_EMBED_CHARACTERS_PER_MESSAGE):
+                messages.append([])
+                length = 0
+            messages[-1].append(embed)
+            length += len(embed)
+
+        for embeds in messages:
+            await public_logs.send(embeds=embeds)
+
+    async def execute_ban(self, user: discord.Member, case: Case, semaphore: asyncio.Semaphore, dm_user: bool):
+        async with semaphore:
             if dm_user:
                 try:
+                    log = prepare_ban_log(self.bot.user, user, case)
                     await user.send(f"You were banned from {user.guild.name}.\n\nThis action was performed automatically. If you think this was a mistake, please send a message here: https://www.reddit.com/message/compose?to=%2Fr%2FJailbreak", embed=log)
                 except Exception:
                     pass
-            
+
             if user.guild.get_member(user.id) is not None:
                 await user.ban(reason="Raid")
             else:
                 await user.guild.ban(discord.Object(id=user.id), reason="Raid")
-                
-            public_logs = user.guild.get_channel(db_guild.channel_public)
-            if public_logs:
-                log.remove_author()
-                log.set_thumbnail(url=user.display_avatar)
-                await public_logs.send(embed=log)
 
     async def freeze_server(self, guild):
         """Freeze all channels marked as freezeable during a raid, meaning only people with the Member+ role and up
         can talk (temporarily lock out whitenames during a raid)"""
         
-        db_guild = guild_service.get_guild()
+        db_guild = await async_guild_service.get_guild()
         
         for channel in db_guild.locked_channels:
             channel = guild.get_channel(channel)
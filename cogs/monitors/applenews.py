@@ -1,17 +1,15 @@
 from discord.ext import commands
-from data.services.guild_service import guild_service
+from utils.message_pipeline import MessageContext, message_stage
 
 class AppleNews(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
     
-    @commands.Cog.listener()
-    async def on_message(self, msg):
+    @message_stage(include_bots=True)
+    async def on_message(self, msg, context: MessageContext):
         """When a message is posted in the #apple-news news channel, automatically publish it."""
         
-        if not msg.guild:
-            return
-        if msg.channel.id != guild_service.get_guild().channel_applenews:
+        if msg.channel.id != context.db_guild.channel_applenews:
             return
         if not msg.author.bot:
             return
@@ -8,8 +8,8 @@ from discord.ext import commands, tasks
 from utils.autocompleters import date_autocompleter
 from utils.context import BlooContext
 from utils.config import cfg
-from data.services.user_service import user_service
-from data.services.guild_service import guild_service
+from data.services.user_service import async_user_service
+from data.services.guild_service import async_guild_service
 from utils.logger import logger
 from utils.mod.give_birthday_role import MONTH_MAPPING, give_user_birthday_role
 from utils.permissions.checks import PermissionsFailure, whisper
@@ -36,13 +36,13 @@ class Birthday(commands.Cog):
         # the date we will check for in the database
         date = [today.month, today.day]
         # get list of users whose birthday it is today
-        birthdays = user_service.retrieve_birthdays(date)
+        birthdays = await async_user_service.retrieve_birthdays(date)
 
         guild = self.bot.get_guild(cfg.guild_id)
         if not guild:
             return
 
-        db_guild = guild_service.get_guild()
+        db_guild = await async_guild_service.get_guild()
         birthday_role = guild.get_role(db_guild.role_birthday)
         if not birthday_role:
             return
@@ -94,7 +94,7 @@ class Birthday(commands.Cog):
             raise commands.BadArgument("You gave an invalid date.")
 
         # fetch user profile from DB
-        db_user = user_service.get_user(user.id)
+        db_user = await async_user_service.get_user(user.id)
 
         # mods are able to ban users from using birthdays, let's handle that
         if db_user.birthday_excluded:
@@ -107,13 +107,13 @@ class Birthday(commands.Cog):
 
         # passed all the sanity checks, let's save the birthday
         db_user.birthday = [month, date]
-        db_user.save()
+        await async_user_service.run(db_user.save)
 
         await ctx.send_success(f"Your birthday was set.")
         # if it's the user's birthday today let's assign the role right now!
         today = datetime.today().astimezone(self.eastern_timezone)
         if today.month == month and today.day == date:
-            db_guild = guild_service.get_guild()
+            db_guild = await async_guild_service.get_guild()
             await give_user_birthday_role(self.bot, db_guild, ctx.author, ctx.guild)
 
     @mybirthday.error
@@ -1,92 +1,238 @@
-from io import BytesIO
+import asyncio
+import io
+import os
+import tempfile
+import traceback
+from typing import Dict, List, Optional
 
-import aiohttp
 import discord
 from data.model.guild import Guild
-from data.services.guild_service import guild_service
+from data.services.guild_service import async_guild_service
 from discord.ext import commands
-from utils.config import cfg
+from utils.http_session import http_sessions
 from utils.logger import logger
+from utils.message_pipeline import MessageContext, StagePriority, message_stage
+
+"""
+Messages are mirrored by a worker per channel instead of inline in the message pipeline.
+The pipeline stage only puts the message on the channel's queue and starts downloading its attachments,
+so mirroring never holds up the other stages. The worker sends whatever has queued up since its last send,
+merging consecutive plain text messages by the same member into one webhook call, and takes turns between
+the channel's webhooks so that each one's rate limit bucket lasts longer. Rate limits themselves are
+handled by discord.Webhook, which waits out a 429 before retrying.
+"""
+
+WEBHOOKS_PER_CHANNEL = 3
+# messages waiting to be mirrored per channel. once full, new messages are dropped (and counted)
+# rather than piling up in memory during a raid
+QUEUE_SIZE = 500
+# most messages taken off the queue in one go
+BATCH_SIZE = 20
+MAX_CONTENT_LENGTH = 2000
+MAX_ATTACHMENT_SIZE = 8_000_000
+# attachments bigger than this are downloaded to a temporary file instead of into memory
+SPOOL_SIZE = 1_000_000
+ALLOWED_MENTIONS = discord.AllowedMentions(users=False, everyone=False, roles=False)
+
+
+class MirroredMessage:
+    def __init__(self, message: discord.Message, content: str, attachments: Optional[asyncio.Task]):
+        self.author_id = message.author.id
+        self.username = str(message.author)
+        self.avatar_url = message.author.display_avatar.url
+        self.embeds = message.embeds
+        self.content = content
+        # task downloading the attachments, started as soon as the message came in
+        # so that we have them even if the message is deleted while it waits in the queue
+        self.attachments = attachments
+
+    @property
+    def mergeable(self) -> bool:
+        return not self.embeds and self.attachments is None
 
 
 class Blootooth(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.pending_channels = set()
+        # source channel ID -> messages waiting to be mirrored
+        self.queues: Dict[int, asyncio.Queue] = {}
+        self.workers: Dict[int, asyncio.Task] = {}
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        if message.guild is None:
-            return
-        if message.guild.id != cfg.guild_id:
-            return
+        self.mirrored = 0
+        self.sends = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def cog_unload(self):
+        for worker in self.workers.values():
+            worker.cancel()
+
+    # runs alongside the filters so that messages they delete are still mirrored
+    @message_stage(StagePriority.MODERATION, include_bots=True)
+    async def on_message(self, message: discord.Message, context: MessageContext):
         if message.channel.type in [discord.ChannelType.public_thread, discord.ChannelType.private_thread]:
             return
 
-        db_guild = guild_service.get_guild()
+        db_guild = context.db_guild
         # disable Blootooth if user didn't set the guild up
         if db_guild.nsa_guild_id is None or self.bot.get_guild(db_guild.nsa_guild_id) is None:
             return
-        
+
         if message.channel.id in db_guild.logging_excluded_channels:
             return
 
-        channel = message.channel
-        blootooth_mappings = db_guild.nsa_mapping
-        
-        webhook_url = blootooth_mappings.get(str(channel.id))
-        if channel.id not in self.pending_channels and webhook_url is None:
-            self.pending_channels.add(channel.id)
-            webhook_url = await self.handle_new_channel(channel, db_guild)
-            self.pending_channels.remove(channel.id)
-
-        # choose one of the three webhooks randomly
-        async with aiohttp.ClientSession() as session:
-            the_webhook: discord.Webhook = discord.Webhook.from_url(webhook_url, session=session)
-            # send message to webhook
-            message_body = await self.prepare_message_body(message)
-            try:
-                await the_webhook.send(**message_body, allowed_mentions=discord.AllowedMentions(users=False, everyone=False, roles=False))
-            except Exception:
-                pass
-    async def handle_new_channel(self, channel: discord.TextChannel, db_guild: Guild):
+        queue = self.queues.get(message.channel.id)
+        if queue is None:
+            queue = self.queues[message.channel.id] = asyncio.Queue(maxsize=QUEUE_SIZE)
+            self.workers[message.channel.id] = self.bot.loop.create_task(self.mirror_channel(message.channel, db_guild, queue))
+
+        if queue.full():
+            self.dropped += 1
+            if self.dropped % 100 == 1:
+                logger.warning(f"Blootooth queue for {message.channel.name} is full, {self.dropped} messages dropped so far")
+            return
+
+        queue.put_nowait(self.prepare_message(message))
+
+    async def mirror_channel(self, channel: discord.TextChannel, db_guild: Guild, queue: asyncio.Queue):
+        try:
+            webhooks = await self.get_webhooks(channel, db_guild)
+        except Exception:
+            logger.error(f"Could not set up Blootooth for {channel.name} ({channel.id}): {traceback.format_exc()}")
+            # let the next message try again
+            del self.queues[channel.id]
+            del self.workers[channel.id]
+            return
+
+        turn = 0
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < BATCH_SIZE and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            for group in self.coalesce(batch):
+                # sends stay in order; taking turns spreads them over the webhooks' rate limit buckets
+                webhook = webhooks[turn % len(webhooks)]
+                turn += 1
+                await self.send(webhook, group)
+
+    async def send(self, webhook: discord.Webhook, group: List[MirroredMessage]) -> None:
+        first = group[0]
+        files = []
+        try:
+            if first.attachments is not None:
+                files = await first.attachments
+
+            await webhook.send(
+                content="\n".join(item.content for item in group),
+                username=first.username,
+                avatar_url=first.avatar_url,
+                embeds=first.embeds or discord.utils.MISSING,
+                files=files or discord.utils.MISSING,
+                allowed_mentions=ALLOWED_MENTIONS
+            )
+            self.sends += 1
+            self.mirrored += len(group)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.failed += len(group)
+            logger.debug(f"Blootooth send failed: {traceback.format_exc()}")
+        finally:
+            for file in files:
+                file.close()
+
+    def coalesce(self, batch: List[MirroredMessage]) -> List[List[MirroredMessage]]:
+        """Group consecutive plain text messages by the same member, as long as they fit in one message
+        """
+
+        groups = []
+        length = 0
+        for item in batch:
+            if groups and item.mergeable and groups[-1][-1].mergeable and groups[-1][-1].author_id == item.author_id \
+                    and length + len(item.content) + 1 <= MAX_CONTENT_LENGTH:
+                groups[-1].append(item)
+                length += len(item.content) + 1
+            else:
+                groups.append([item])
+                length = len(item.content)
+        return groups
+
+    async def get_webhooks(self, channel: discord.TextChannel, db_guild: Guild) -> List[discord.Webhook]:
+        session = http_sessions.session
+        urls = db_guild.nsa_mapping.get(str(channel.id))
+        if urls is None:
+            urls = await self.handle_new_channel(channel, db_guild)
+        elif isinstance(urls, str):
+            # channels set up before there were several webhooks per channel
+            urls = await self.add_webhooks(channel, discord.Webhook.from_url(urls, session=session))
+
+        return [discord.Webhook.from_url(url, session=session) for url in urls]
+
+    async def handle_new_channel(self, channel: discord.TextChannel, db_guild: Guild) -> List[str]:
         # we have not seen this channel yet; let's create a channel in the Blootooth server
         # and create 3 new webhooks.
         # store the webhooks in the database.
         logger.info(f"Detected new channel {channel.name} ({channel.id})")
         guild: discord.Guild = self.bot.get_guild(db_guild.nsa_guild_id)
         category = discord.utils.get(guild.categories, name=channel.category.name)
-        
+
         if category is None:
             category = await guild.create_category(name=channel.category.name)
         blootooth_channel = await category.create_text_channel(name=channel.name)
-        webhook = (await blootooth_channel.create_webhook(name=f"Webhook {blootooth_channel.name}")).url
-        guild_service.set_nsa_mapping(channel.id, webhook)
-
-        logger.info(f"Added new webhook for channel {channel.name} ({channel.id}: {webhook}")
-        return webhook
-
-    async def prepare_message_body(self, message: discord.Message):
-        member = message.author
-        body = {
-            "username": str(member),
-            "avatar_url": member.display_avatar,
-            "embeds": message.embeds or discord.utils.MISSING,
-            "files": [discord.File(BytesIO(await file.read()), filename=file.filename) for file in message.attachments if file.size < 8_000_000 ]
-        }
-        
-        attachments_too_big = "".join([file.url for file in message.attachments if file.size >= 8_000_000 ])
-        footer=f"{attachments_too_big}\n\n[Link to message]({message.jump_url}) | **{member.id}**"
+        webhooks = [(await blootooth_channel.create_webhook(name=f"Webhook {blootooth_channel.name} {i}")).url for i in range(WEBHOOKS_PER_CHANNEL)]
+        await async_guild_service.set_nsa_mapping(channel.id, webhooks)
+
+        logger.info(f"Added new webhooks for channel {channel.name} ({channel.id})")
+        return webhooks
+
+    async def add_webhooks(self, channel: discord.TextChannel, webhook: discord.Webhook) -> List[str]:
+        webhook = await webhook.fetch()
+        blootooth_channel = self.bot.get_channel(webhook.channel_id)
+        webhooks = [webhook.url]
+        if blootooth_channel is not None:
+            webhooks.extend([(await blootooth_channel.create_webhook(name=f"Webhook {blootooth_channel.name} {i}")).url for i in range(1, WEBHOOKS_PER_CHANNEL)])
+        await async_guild_service.set_nsa_mapping(channel.id, webhooks)
+
+        logger.info(f"Added {len(webhooks) - 1} webhooks for channel {channel.name} ({channel.id})")
+        return webhooks
+
+    def prepare_message(self, message: discord.Message) -> MirroredMessage:
+        attachments_too_big = "".join([file.url for file in message.attachments if file.size >= MAX_ATTACHMENT_SIZE])
+        footer = f"{attachments_too_big}\n\n[Link to message]({message.jump_url}) | **{message.author.id}**"
         content = message.content
         for mention in message.raw_role_mentions:
             content = content.replace(f"<@&{mention}>", f"`@{message.guild.get_role(mention)}`")
 
-        characters_left = 2000 - len(content) - len(footer) - 3
+        characters_left = MAX_CONTENT_LENGTH - len(content) - len(footer) - 3
         if characters_left <= 0:
-            content = content[:2000 - len(footer) - 3] + "..."
-            
-        body["content"] = f"{content}{footer}"
-        return body
+            content = content[:MAX_CONTENT_LENGTH - len(footer) - 3] + "..."
+
+        attachments = [file for file in message.attachments if file.size < MAX_ATTACHMENT_SIZE]
+        task = self.bot.loop.create_task(self.download_attachments(attachments)) if attachments else None
+        return MirroredMessage(message, f"{content}{footer}", task)
+
+    async def download_attachments(self, attachments: List[discord.Attachment]) -> List[discord.File]:
+        files = []
+        for attachment in attachments:
+            # streamed in chunks; anything big goes to a temporary file instead of sitting in memory.
+            # discord.File needs a real io.IOBase, which SpooledTemporaryFile isn't until Python 3.11.
+            # the temporary file is deleted when it's closed
+            fp = io.BytesIO() if attachment.size <= SPOOL_SIZE else tempfile.TemporaryFile()
+            try:
+                async with http_sessions.session.get(attachment.url) as resp:
+                    resp.raise_for_status()
+                    async for chunk in resp.content.iter_chunked(64 * 1024):
+                        fp.write(chunk)
+            except Exception:
+                fp.close()
+                logger.debug(f"Could not download attachment {attachment.url} for Blootooth")
+                continue
+
+            fp.seek(0, os.SEEK_SET)
+            files.append(discord.File(fp, filename=attachment.filename))
+        return files
+
 
 def setup(bot):
     bot.add_cog(Blootooth(bot))
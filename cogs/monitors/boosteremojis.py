@@ -1,9 +1,10 @@
 import asyncio
-import re
 
-import aiohttp
 from utils.context import BlooOldContext, PromptData
-from data.services.guild_service import guild_service
+from utils.http_session import http_sessions
+from utils.message_pipeline import MessageContext, message_stage
+from utils.patterns import EMOJI_NAME, extract
+from data.services.guild_service import async_guild_service
 from utils.permissions.permissions import permissions
 from utils.config import cfg
 import discord
@@ -28,7 +29,7 @@ class BoosterEmojis(commands.Cog):
         except Exception:
             return
 
-        db_guild = guild_service.get_guild()
+        db_guild = await async_guild_service.get_guild()
 
         if not msg.guild.id == cfg.guild_id:
             return
@@ -66,7 +67,7 @@ class BoosterEmojis(commands.Cog):
                 ctx = await self.bot.get_context(msg, cls=BlooOldContext)
                 name = await ctx.prompt(prompt)
                 while True:
-                    if len(name) > 2 and len(name) < 20 and re.match(r"^[a-zA-Z0-9_]*$", name):
+                    if len(name) > 2 and len(name) < 20 and EMOJI_NAME.match(name):
                         break
                     prompt.reprompt = True
                     name = await ctx.prompt(prompt)
@@ -85,17 +86,9 @@ class BoosterEmojis(commands.Cog):
         except Exception:
             pass
 
-    @commands.Cog.listener()
-    async def on_message(self, msg):
-        if not msg.guild:
-            return
-        if msg.author.bot:
-            return
-        
-        db_guild = guild_service.get_guild()
-        if not msg.guild.id == cfg.guild_id:
-            return
-        if not msg.channel.id == db_guild.channel_booster_emoji:
+    @message_stage()
+    async def on_message(self, msg, context: MessageContext):
+        if not msg.channel.id == context.db_guild.channel_booster_emoji:
             return
 
         try:
@@ -110,23 +103,19 @@ class BoosterEmojis(commands.Cog):
             pass
 
     async def get_bytes(self, msg):
-        custom_emojis = re.findall(r'<:\d+>|<:.+?:\d+>', msg.content)
+        content = extract(msg.content)
+        custom_emojis = content.custom_emojis
         if len(custom_emojis) == 1:
             name = custom_emojis[0].split(':')[1]
         custom_emojis = [int(e.split(':')[2].replace('>', '')) for e in custom_emojis]
         custom_emojis = [f"https://cdn.discordapp.com/emojis/{e}.png?v=1" for e in custom_emojis]
 
-        custom_emojis_gif = re.findall(r'<a:.+:\d+>|<:.+?:\d+>', msg.content)
+        custom_emojis_gif = content.custom_emojis_animated
         if len(custom_emojis_gif) == 1:
             name = custom_emojis_gif[0].split(':')[1]
         custom_emojis_gif = [int(e.split(':')[2].replace('>', '')) for e in custom_emojis_gif]
         custom_emojis_gif = [f"https://cdn.discordapp.com/emojis/{e}.gif?v=1" for e in custom_emojis_gif]
-        pattern = re.compile(
-            r"(https?:\/\/(www\.)?[-a-zA-Z0-9@:%._\+~#=]{1,256}\.[a-zA-Z0-9()]{1,6}\b([-a-zA-Z0-9()@:%_\+.~#?&//=]*))")
-        link = pattern.search(msg.content)
-        if (link):
-            if link.group(0):
-                link = link.group(0)
+        link = content.web_link
 
         if len(custom_emojis) > 1 or len(custom_emojis_gif) > 1 or len(msg.attachments) > 1:
             return None, None
@@ -152,20 +141,20 @@ class BoosterEmojis(commands.Cog):
             await msg.add_reaction('❓')
 
     async def do_content_parsing(self, url):
-        async with aiohttp.ClientSession() as session:
-            async with session.head(url) as resp:
-                if resp.status != 200:
-                    return None
-                elif resp.headers["CONTENT-TYPE"] not in ["image/png", "image/jpeg", "image/gif", "image/webp"]:
-                    return None
-                elif int(resp.headers['CONTENT-LENGTH']) > 257000:
-                    raise commands.BadArgument(f"Image was too big ({int(resp.headers['CONTENT-LENGTH'])/1000}KB)")
-                else:
-                    async with session.get(url) as resp2:
-                        if resp2.status != 200:
-                            return None
-
-                        return await resp2.read()
+        session = http_sessions.session
+        async with session.head(url) as resp:
+            if resp.status != 200:
+                return None
+            elif resp.headers["CONTENT-TYPE"] not in ["image/png", "image/jpeg", "image/gif", "image/webp"]:
+                return None
+            elif int(resp.headers['CONTENT-LENGTH']) > 257000:
+                raise commands.BadArgument(f"Image was too big ({int(resp.headers['CONTENT-LENGTH'])/1000}KB)")
+            else:
+                async with session.get(url) as resp2:
+                    if resp2.status != 200:
+                        return None
+
+                    return await resp2.read()
 
 
 def setup(bot):
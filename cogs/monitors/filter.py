@@ -1,21 +1,22 @@
 import json
-import re
 import traceback
 from datetime import datetime, timezone
 
-import aiohttp
 import discord
 from aiocache.decorators import cached
-from data.services.guild_service import guild_service
+from data.services.guild_service import async_guild_service
 from discord.commands import message_command, user_command
 from discord.ext import commands
 from utils.config import cfg
 from utils.context import BlooContext
+from utils.http_session import http_sessions
 from utils.logger import logger
+from utils.message_pipeline import MessageContext, StagePriority, message_stage
 from utils.misc import scam_cache
-from utils.mod.filter import find_triggered_filters
+from utils.mod.filter import find_triggered_filters, normalize
 from utils.mod.global_modactions import mute
 from utils.mod.report import manual_report, report
+from utils.patterns import extract
 from utils.permissions.checks import (PermissionsFailure, always_whisper,
                                       mod_and_up)
 from utils.permissions.permissions import permissions
@@ -43,8 +44,6 @@ class DissmissableMessage(discord.ui.View):
 class Filter(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.invite_filter = r'(?:https?://)?discord(?:(?:app)?\.com/invite|\.gg)\/{1,}[a-zA-Z0-9]+/?'
-        self.spoiler_filter = r'\|\|(.*?)\|\|'
         self.spam_cooldown = commands.CooldownMapping.from_cooldown(
             2, 10.0, commands.BucketType.member)
 
@@ -95,55 +94,64 @@ class Filter(commands.Cog):
         await manual_report(self.bot, ctx.author, message)
         await ctx.send_success("Generated report!")
 
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        await self.run_filter(message)
+    @message_stage(StagePriority.MODERATION)
+    async def on_message(self, message: discord.Message, context: MessageContext) -> bool:
+        return await self.run_filter(message, context)
 
     @commands.Cog.listener()
     async def on_message_edit(self, _, message):
-        await self.run_filter(message)
-
-    @commands.Cog.listener()
-    async def on_member_update(self, _, member: discord.Member):
-        await self.nick_filter(member)
-
-    async def run_filter(self, message: discord.Message):
         if not message.guild:
             return
         if message.guild.id != cfg.guild_id:
             return
+
+        db_guild = await async_guild_service.get_guild()
+        await self.run_filter(message, MessageContext(message, db_guild, permissions.get_level(message.guild, message.author)))
+
+    @commands.Cog.listener()
+    async def on_member_update(self, _, member: discord.Member):
+        await self.nick_filter(member, await async_guild_service.get_guild())
+
+    async def run_filter(self, message: discord.Message, context: MessageContext) -> bool:
+        """Run a message through the filters. Returns True if a filter removed the message.
+        Everything a filter does after deleting the message is deferred, so that the rest of the
+        pipeline doesn't wait for it.
+        """
+
         if message.author.bot:
-            return
-        if permissions.has(message.guild, message.author, 7):
-            return
-        db_guild = guild_service.get_guild()
+            return False
+        if context.level >= 7:
+            return False
+        db_guild = context.db_guild
         role_submod = message.guild.get_role(db_guild.role_sub_mod)
         if role_submod is not None and role_submod in message.author.roles:
-            return
+            return False
 
         # run through filters
-        if message.content and await self.bad_word_filter(message, db_guild):
-            return
+        if message.content and await self.bad_word_filter(message, context):
+            return True
 
-        if permissions.has(message.guild, message.author, 6):
-            return
+        if context.level >= 6:
+            return False
 
-        if message.content and await self.scam_filter(message):
-            return
+        if message.content and await self.scam_filter(message, context):
+            return True
 
-        if permissions.has(message.guild, message.author, 5):
-            return
+        if context.level >= 5:
+            return False
 
-        if message.content and await self.do_invite_filter(message, db_guild):
-            return
-        if await self.do_spoiler_newline_filter(message, db_guild):
-            return
+        if message.content and await self.do_invite_filter(message, context):
+            return True
+        if await self.do_spoiler_newline_filter(message, context):
+            return True
 
-        await self.detect_cij_or_eta(message, db_guild)
+        if context.level < 1:
+            context.defer(self.detect_cij_or_eta(message, db_guild))
+        return False
 
-    async def nick_filter(self, member):
+    async def nick_filter(self, member, db_guild):
         triggered_words = find_triggered_filters(
-            member.display_name, member)
+            member.display_name, member, db_guild)
 
         if not triggered_words:
             return
@@ -157,9 +165,10 @@ class Filter(commands.Cog):
         except Exception:
             pass
 
-    async def bad_word_filter(self, message, db_guild) -> bool:
+    async def bad_word_filter(self, message, context: MessageContext) -> bool:
+        db_guild = context.db_guild
         triggered_words = find_triggered_filters(
-            message.content, message.author)
+            message.content, message.author, db_guild)
         if not triggered_words:
             return
 
@@ -174,26 +183,24 @@ class Filter(commands.Cog):
 
             if word.notify:
                 await self.delete(message)
-                await self.ratelimit(message)
-                await self.do_filter_notify(message, word.word)
-                await report(self.bot, message, word.word)
-                return
+                context.defer(self.ratelimit(message), self.do_filter_notify(message, word.word, db_guild),
+                              report(self.bot, message, word.word))
+                return True
 
             triggered = True
 
         if triggered:
             await self.delete(message)
-            await self.ratelimit(message)
-            await self.do_filter_notify(message, word.word)
+            context.defer(self.ratelimit(message), self.do_filter_notify(message, word.word, db_guild))
 
         return triggered
 
-    async def do_invite_filter(self, message, db_guild):
-        invites = re.findall(self.invite_filter, message.content, flags=re.S)
+    async def do_invite_filter(self, message, context: MessageContext):
+        invites = extract(message.content).invites
         if not invites:
             return
 
-        whitelist = db_guild.filter_excluded_guilds
+        whitelist = context.db_guild.filter_excluded_guilds
         for invite in invites:
             try:
                 invite = await self.bot.fetch_invite(invite)
@@ -209,23 +216,22 @@ class Filter(commands.Cog):
 
                 if id not in whitelist:
                     await self.delete(message)
-                    await self.ratelimit(message)
-                    await report(self.bot, message, invite, invite=invite)
+                    context.defer(self.ratelimit(message), report(self.bot, message, invite, invite=invite))
                     return True
 
             except discord.NotFound:
                 await self.delete(message)
-                await self.ratelimit(message)
-                await report(self.bot, message, invite, invite=invite)
+                context.defer(self.ratelimit(message), report(self.bot, message, invite, invite=invite))
                 return True
 
         return False
 
-    async def do_spoiler_newline_filter(self, message: discord.Message, db_guild):
+    async def do_spoiler_newline_filter(self, message: discord.Message, context: MessageContext):
         """
         SPOILER FILTER
         """
-        if re.search(self.spoiler_filter, message.content, flags=re.S):
+        db_guild = context.db_guild
+        if extract(message.content).has_spoiler:
             # ignore if dev in dev channel
             dev_role = message.guild.get_role(db_guild.role_dev)
             if message.channel.id == db_guild.channel_development and dev_role in message.author.roles:
@@ -246,30 +252,29 @@ class Filter(commands.Cog):
             dev_role = message.guild.get_role(db_guild.role_dev)
             if not dev_role or dev_role not in message.author.roles:
                 await self.delete(message)
-                await self.ratelimit(message)
+                context.defer(self.ratelimit(message))
                 return True
 
         return False
 
-    async def scam_filter(self, message: discord.Message):
+    async def scam_filter(self, message: discord.Message, context: MessageContext):
+        content = normalize(message.content).lowered
         for url in scam_cache.scam_jb_urls:
-            if url in message.content.lower():
+            if url in content:
                 embed = discord.Embed(
                     title="Fake or scam jailbreak", color=discord.Color.red())
                 embed.description = f"Your message contained the link to a **fake jailbreak** ({url}).\n\nIf you installed this jailbreak, remove it from your device immediately and try to get a refund if you paid for it. Jailbreaks *never* cost money and will not ask for any form of payment or survey to install them."
                 await self.delete(message)
-                await self.ratelimit(message)
-                await message.channel.send(f"{message.author.mention}", embed=embed)
+                context.defer(self.ratelimit(message), message.channel.send(f"{message.author.mention}", embed=embed))
                 return True
 
         for url in scam_cache.scam_unlock_urls:
-            if url in message.content.lower():
+            if url in content:
                 embed = discord.Embed(
                     title="Fake or scam unlock", color=discord.Color.red())
                 embed.description = f"Your message contained the link to a **fake unlock** ({url}).\n\nIf you bought a phone second-hand and it arrived iCloud locked, contact the seller to remove it [using these instructions](https://support.apple.com/en-us/HT201351), or get a refund.\n\nIf you or a relative are the original owner of the device and you can provide the original proof of purchase, Apple Support can remove the lock.\nPlease refer to these articles: [How to remove Activation Lock](https://support.apple.com/HT201441) or [If you forgot your iPhone passcode](https://support.apple.com/HT204306)."
                 await self.delete(message)
-                await self.ratelimit(message)
-                await message.channel.send(f"{message.author.mention}", embed=embed)
+                context.defer(self.ratelimit(message), message.channel.send(f"{message.author.mention}", embed=embed))
                 return True
 
         return False
@@ -285,7 +290,7 @@ class Filter(commands.Cog):
             except Exception:
                 return
 
-    async def do_filter_notify(self, message: discord.Message, word):
+    async def do_filter_notify(self, message: discord.Message, word, db_guild):
         member = message.author
         channel = message.channel
         message_to_user = f"Your message contained a word you aren't allowed to say in {member.guild.name}. This could be either hate speech or the name of a piracy tool/source. Please refrain from saying it!"
@@ -311,8 +316,7 @@ class Filter(commands.Cog):
         log_embed.timestamp = datetime.utcnow()
         log_embed.set_footer(text=message.author.id)
 
-        log_channel = message.guild.get_channel(
-            guild_service.get_guild().channel_private)
+        log_channel = message.guild.get_channel(db_guild.channel_private)
         if log_channel is not None:
             await log_channel.send(embed=log_embed)
 
@@ -324,19 +328,17 @@ class Filter(commands.Cog):
 
     @cached(ttl=3600)
     async def fetch_cij_or_news_database(self):
-        async with aiohttp.ClientSession() as session:
-            async with session.get("https://raw.githubusercontent.com/DiscordGIR/CIJOrNewsFilter/main/database.json") as resp:
-                if resp.status == 200:
-                    data = await resp.text()
-                    return json.loads(data)
+        session = http_sessions.session
+        async with session.get("https://raw.githubusercontent.com/DiscordGIR/CIJOrNewsFilter/main/database.json") as resp:
+            if resp.status == 200:
+                data = await resp.text()
+                return json.loads(data)
 
-                return {}
+            return {}
 
     async def detect_cij_or_eta(self, message: discord.Message, db_guild):
         if message.edited_at is not None:
             return
-        if permissions.has(message.guild, message.author, 1):
-            return
 
         cij_filter_response = await self.fetch_cij_or_news_database()
         intent_cij = cij_filter_response.get("intent_cij")
@@ -350,14 +352,14 @@ class Filter(commands.Cog):
                 f"Something went wrong with CIJ or ETA filter; {intent_cij}, {intent_news}, {verb}")
             return
 
-        text = message.content.lower()
+        text = normalize(message.content).lowered
         subject_and_word_in_message = any(
             v in text for v in verb) and any(s in text for s in subject)
 
         intent_news_triggered = any(intent in text for intent in intent_news)
         intent_cij_triggered = any(intent in text for intent in intent_cij)
         
-        if (intent_news_triggered or intent_cij_triggered) and subject_and_word_in_message and message.channel.id == guild_service.get_guild().channel_general:
+        if (intent_news_triggered or intent_cij_triggered) and subject_and_word_in_message and message.channel.id == db_guild.channel_general:
             view = discord.ui.View()
             embed = discord.Embed(color=discord.Color.orange())
             embed.description = f"Please keep support or jailbreak related messages in the appropriate channels. Thanks!"
@@ -1,20 +1,41 @@
-import aiohttp
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord.utils import format_dt
 
+import traceback
 from datetime import datetime
 from io import BytesIO
-from typing import List, Union
+from typing import List, Optional, Union
 
 import discord
-from data.services.guild_service import guild_service
-from data.services.user_service import user_service
+from data.services.guild_service import async_guild_service
+from data.services.user_service import async_user_service
 from utils.config import cfg
+from utils.http_session import http_sessions
+from utils.logger import logger
 
 class Logging(commands.Cog):
+    # reactions are logged in batches, one entry per message with everything reacted to it in this window
+    REACTION_LOG_WINDOW = 10
+    # past these, reactions are dropped (and counted) until the next flush
+    REACTION_LOG_MAX_MESSAGES = 500
+    REACTION_LOG_MAX_PER_MESSAGE = 200
+
     def __init__(self, bot):
         self.bot = bot
+        # message ID -> reactions waiting to be logged
+        self.pending_reactions = {}
+        # reactions posted in a log entry shared with other reactions, rather than in one of their own
+        self.reactions_batched = 0
+        # the same member adding the same reaction again before it was logged
+        self.reactions_deduplicated = 0
+        self.reactions_dropped = 0
+        self.emoji_logging_webhook: Optional[discord.Webhook] = None
+        self.flush_reactions_task.start()
+
+    def cog_unload(self):
+        self.flush_reactions_task.cancel()
+        self.bot.loop.create_task(self.flush_reactions())
 
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member) -> None:
@@ -29,8 +50,8 @@ class Logging(commands.Cog):
         if member.guild.id != cfg.guild_id:
             return
 
-        db_user = user_service.get_user(member.id)
-        db_guild = guild_service.get_guild()
+        db_user = await async_user_service.get_user(member.id)
+        db_guild = await async_guild_service.get_guild()
         channel = member.guild.get_channel(db_guild.channel_private)
 
         embed = discord.Embed(title="Member joined")
@@ -62,7 +83,7 @@ class Logging(commands.Cog):
         if member.guild.id != cfg.guild_id:
             return
         
-        db_guild = guild_service.get_guild()
+        db_guild = await async_guild_service.get_guild()
         channel = member.guild.get_channel(db_guild.channel_private)
 
         async for action in member.guild.audit_logs(limit=1, action=discord.AuditLogAction.kick):
@@ -92,31 +113,104 @@ class Logging(commands.Cog):
         if reaction.message.channel.is_news():
             return
 
-        db_guild = guild_service.get_guild()
+        message = reaction.message
+        batch = self.pending_reactions.get(message.id)
+        if batch is None:
+            if len(self.pending_reactions) >= self.REACTION_LOG_MAX_MESSAGES:
+                self.reactions_dropped += 1
+                return
+            batch = self.pending_reactions[message.id] = {
+                "channel": message.channel.mention,
+                "jump_url": message.jump_url,
+                # (member ID, emoji) -> (member name, avatar)
+                "reactions": {}
+            }
+
+        key = (member.id, str(reaction.emoji))
+        if key in batch["reactions"]:
+            # reacted, unreacted and reacted again within the window
+            self.reactions_deduplicated += 1
+            return
+        if len(batch["reactions"]) >= self.REACTION_LOG_MAX_PER_MESSAGE:
+            self.reactions_dropped += 1
+            return
+
+        batch["reactions"][key] = (str(member), member.display_avatar.url)
+
+    @tasks.loop(seconds=REACTION_LOG_WINDOW)
+    async def flush_reactions_task(self):
+        try:
+            await self.flush_reactions()
+        except Exception:
+            # the loop only survives network errors, anything else would stop reaction logging for good
+            logger.error(f"Failed to log reactions: {traceback.format_exc()}")
+
+    async def flush_reactions(self):
+        """Post everything reacted since the last flush, one log entry per message
+        """
+
+        if not self.pending_reactions:
+            return
+
+        pending, self.pending_reactions = self.pending_reactions, {}
+        try:
+            webhook = await self.get_emoji_logging_webhook()
+        except Exception:
+            # for example we can't manage webhooks in the log channel
+            webhook = None
+            logger.error(f"Failed to get the emoji logging webhook: {traceback.format_exc()}")
 
-        webhook = db_guild.emoji_logging_webhook
         if webhook is None:
-            channel = member.guild.get_channel(db_guild.channel_emoji_log)
-            if channel is None:
-                return
+            self.reactions_dropped += sum(len(batch["reactions"]) for batch in pending.values())
+            return
 
-            webhook = (await channel.create_webhook(name=f"Webhook {channel.name}")).url
-            db_guild.emoji_logging_webhook = webhook
-            db_guild.save()
+        for batch in pending.values():
+            reactions = batch["reactions"]
+            if len(reactions) > 1:
+                self.reactions_batched += len(reactions)
 
+            reacters = {member_id for member_id, _ in reactions}
+            if len(reacters) == 1:
+                username, avatar_url = next(iter(reactions.values()))
+            else:
+                username, avatar_url = f"{len(reactions)} reactions", discord.utils.MISSING
+
+            footer = f"\n\n{batch['channel']} | [Link to message]({batch['jump_url']})"
+            lines = [f"{emoji} **{name}** ({member_id})" for (member_id, emoji), (name, _) in reactions.items()]
+            for content in self.chunk_lines(lines, 2000 - len(footer)):
+                try:
+                    await webhook.send(content=content + footer, username=username, avatar_url=avatar_url, allowed_mentions=discord.AllowedMentions(users=False, everyone=False, roles=False))
+                except Exception as e:
+                    self.reactions_dropped += len(content.split("\n"))
+                    logger.debug(f"Failed to log reactions: {e}")
+
+    def chunk_lines(self, lines: List[str], limit: int) -> List[str]:
+        chunks = [[]]
+        length = 0
+        for line in lines:
+            if chunks[-1] and length + len(line) + 1 > limit:
+                chunks.append([])
+                length = 0
+            chunks[-1].append(line)
+            length += len(line) + 1
+        return ["\n".join(chunk) for chunk in chunks]
+
+    async def get_emoji_logging_webhook(self) -> Optional[discord.Webhook]:
+        db_guild = await async_guild_service.get_guild()
+
+        url = db_guild.emoji_logging_webhook
+        if url is None:
+            guild = self.bot.get_guild(cfg.guild_id)
+            channel = guild.get_channel(db_guild.channel_emoji_log) if guild is not None else None
+            if channel is None:
+                return None
 
-        content = f"{reaction.emoji}\n\n{reaction.message.channel.mention} | [Link to message]({reaction.message.jump_url}) | **{member.id}**"
-        body = {
-            "username": str(member),
-            "avatar_url": member.display_avatar,
-            "content": content
-        }
+            url = (await channel.create_webhook(name=f"Webhook {channel.name}")).url
+            await async_guild_service.set_emoji_logging_webhook(url)
 
-        async with aiohttp.ClientSession() as session:
-            the_webhook: discord.Webhook = discord.Webhook.from_url(webhook, session=session)
-            # send message to webhook
-            await the_webhook.send(**body, allowed_mentions=discord.AllowedMentions(users=False, everyone=False, roles=False))
-       
+        if self.emoji_logging_webhook is None or self.emoji_logging_webhook.url != url:
+            self.emoji_logging_webhook = discord.Webhook.from_url(url, session=http_sessions.session)
+        return self.emoji_logging_webhook
 
     @commands.Cog.listener()
     async def on_message_edit(self, before: discord.Message, after: discord.Message) -> None:
@@ -137,7 +231,7 @@ class Logging(commands.Cog):
         if not before.content or not after.content or before.content == after.content:
             return
 
-        db_guild = guild_service.get_guild()
+        db_guild = await async_guild_service.get_guild()
         channel = before.guild.get_channel(db_guild.channel_private)
 
         embed = discord.Embed(title="Message Updated")
@@ -183,7 +277,7 @@ class Logging(commands.Cog):
         if message.content == "" or not message.content:
             return
 
-        db_guild = guild_service.get_guild()
+        db_guild = await async_guild_service.get_guild()
         channel = message.guild.get_channel(db_guild.channel_private)
 
         embed = discord.Embed(title="Message Deleted")
@@ -223,7 +317,7 @@ class Logging(commands.Cog):
             return
 
         members = set()
-        db_guild = guild_service.get_guild()
+        db_guild = await async_guild_service.get_guild()
         channel = messages[0].guild.get_channel(db_guild.channel_private)
         output = BytesIO()
         for message in messages:
@@ -262,7 +356,7 @@ class Logging(commands.Cog):
         if not guild.id == cfg.guild_id:
             return
         
-        db_guild = guild_service.get_guild()
+        db_guild = await async_guild_service.get_guild()
         channel = guild.get_channel(db_guild.channel_private)
 
         embed = discord.Embed(title="Member Banned")
@@ -287,7 +381,7 @@ class Logging(commands.Cog):
         if not guild.id == cfg.guild_id:
             return
         
-        db_guild = guild_service.get_guild()
+        db_guild = await async_guild_service.get_guild()
         channel = guild.get_channel(db_guild.channel_private)
         
         embed = discord.Embed(title="User Unbanned")
@@ -321,7 +415,7 @@ class Logging(commands.Cog):
         if before.name == after.name and before.discriminator == after.discriminator:
             return
         
-        db_guild = guild_service.get_guild()
+        db_guild = await async_guild_service.get_guild()
         guild = self.bot.get_guild(cfg.guild_id)
         channel = guild.get_channel(db_guild.channel_private)
         
@@ -373,7 +467,7 @@ class Logging(commands.Cog):
         embed.timestamp = datetime.now()
         embed.set_footer(text=after.id)
 
-        db_guild = guild_service.get_guild()
+        db_guild = await async_guild_service.get_guild()
         private = after.guild.get_channel(db_guild.channel_private)
         if private:
             await private.send(embed=embed)
@@ -399,7 +493,7 @@ class Logging(commands.Cog):
             if action.target.id == member.id:
                 embed.add_field(name="Updated by", value=f'{action.user} ({action.user.mention})', inline=False)
 
-        db_guild = guild_service.get_guild()
+        db_guild = await async_guild_service.get_guild()
         private = member.guild.get_channel(db_guild.channel_private)
         if private:
             await private.send(embed=embed)
@@ -422,7 +516,7 @@ class Logging(commands.Cog):
             name="Member", value=f'{member} ({member.mention})', inline=True)
         embed.timestamp = datetime.now()
         embed.set_footer(text=member.id)
-        db_guild = guild_service.get_guild()
+        db_guild = await async_guild_service.get_guild()
         private = member.guild.get_channel(db_guild.channel_private)
         if private:
             await private.send(embed=embed)
@@ -442,7 +536,7 @@ class Logging(commands.Cog):
         else:
             options = ""
 
-        db_guild = guild_service.get_guild()
+        db_guild = await async_guild_service.get_guild()
         private = interaction.guild.get_channel(db_guild.channel_private)
 
         embed = discord.Embed(title="Member Used Command", color=discord.Color.dark_teal())
@@ -3,7 +3,7 @@ from discord.commands import Option, slash_command
 from discord.ext import commands
 
 import traceback
-from data.services.guild_service import guild_service
+from data.services.guild_service import async_guild_service
 from utils.config import cfg
 from utils.context import BlooContext, PromptData, PromptDataReaction
 from utils.permissions.checks import PermissionsFailure, admin_and_up
@@ -20,7 +20,7 @@ class RoleAssignButtons(commands.Cog):
         # this function is run when the bot is started.
         # we recreate the view as we did in the /post command
         guild = self.bot.get_guild(cfg.guild_id)
-        rero_mappings = guild_service.all_rero_mappings()
+        rero_mappings = await async_guild_service.all_rero_mappings()
         for _, mapping in rero_mappings.items():
             view = discord.ui.View(timeout=None)
             for emoji, role in mapping.items():
@@ -36,7 +36,7 @@ class RoleAssignButtons(commands.Cog):
     async def post_message(self, ctx: BlooContext):
         # timeout is None because we want this view to be persistent
         channel = ctx.guild.get_channel(
-            guild_service.get_guild().channel_reaction_roles)
+            (await async_guild_service.get_guild()).channel_reaction_roles)
         if channel is None:
             raise commands.BadArgument("Role assignment channel not found!")
 
@@ -62,7 +62,7 @@ class RoleAssignButtons(commands.Cog):
 
         message_id = int(message_id)
         request_role_channel = ctx.guild.get_channel(
-            guild_service.get_guild().channel_reaction_roles)
+            (await async_guild_service.get_guild()).channel_reaction_roles)
 
         if request_role_channel is None:
             return
@@ -98,7 +98,7 @@ class RoleAssignButtons(commands.Cog):
         if not reaction_mapping[message.id].keys():
             raise commands.BadArgument("Nothing to do.")
 
-        guild_service.add_rero_mapping(reaction_mapping)
+        await async_guild_service.add_rero_mapping(reaction_mapping)
 
         view = discord.ui.View(timeout=None)
         resulting_reactions_list = ""
@@ -132,12 +132,12 @@ class RoleAssignButtons(commands.Cog):
             raise commands.BadArgument("Message ID must be an int")
 
         channel = ctx.guild.get_channel(
-            guild_service.get_guild().channel_reaction_roles)
+            (await async_guild_service.get_guild()).channel_reaction_roles)
 
         if channel is None:
             return
 
-        current =  guild_service.get_rero_mapping(str(message_id))
+        current =  await async_guild_service.get_rero_mapping(str(message_id))
         if current is None:
             raise commands.BadArgument(
                 f"Message with ID {message_id} had no reactions set in database. Use `/setbuttons` first.")
@@ -178,7 +178,7 @@ class RoleAssignButtons(commands.Cog):
             reaction_mapping[str(reaction.emoji)] = role.id
             break
 
-        guild_service.append_rero_mapping(message_id, reaction_mapping)
+        await async_guild_service.append_rero_mapping(message_id, reaction_mapping)
 
         view = discord.ui.View(timeout=None)
         resulting_reactions_list = ""
@@ -242,12 +242,12 @@ class RoleAssignButtons(commands.Cog):
             raise commands.BadArgument("I can't move to the same message.")
 
         channel = ctx.guild.get_channel(
-            guild_service.get_guild().channel_reaction_roles)
+            (await async_guild_service.get_guild()).channel_reaction_roles)
 
         if channel is None:
             return
 
-        rero_mapping = guild_service.get_rero_mapping(str(before))
+        rero_mapping = await async_guild_service.get_rero_mapping(str(before))
         if rero_mapping is None:
             raise commands.BadArgument(
                 f"Message with ID {before} had no reactions set in database.")
@@ -264,8 +264,8 @@ class RoleAssignButtons(commands.Cog):
 
         rero_mapping = {after: rero_mapping}
 
-        guild_service.add_rero_mapping(rero_mapping)
-        guild_service.delete_rero_mapping(before)
+        await async_guild_service.add_rero_mapping(rero_mapping)
+        await async_guild_service.delete_rero_mapping(before)
 
         await before_message.edit(view=None)
 
@@ -287,12 +287,12 @@ class RoleAssignButtons(commands.Cog):
         """
 
         channel = ctx.guild.get_channel(
-            guild_service.get_guild().channel_reaction_roles)
+            (await async_guild_service.get_guild()).channel_reaction_roles)
 
         if channel is None:
             return
 
-        rero_mapping = guild_service.all_rero_mappings()
+        rero_mapping = await async_guild_service.all_rero_mappings()
         if rero_mapping is None or rero_mapping == {}:
             raise commands.BadArgument("Nothing to do.")
 
@@ -4,11 +4,11 @@ import discord
 from discord.commands import Option, slash_command
 from discord.ext import commands
 
-from data.services.guild_service import guild_service
+from data.services.guild_service import async_guild_service
 from utils.config import cfg
 from utils.context import BlooContext
-from utils.permissions.permissions import permissions
 from utils.logger import logger
+from utils.message_pipeline import MessageContext, message_stage
 from utils.permissions.checks import PermissionsFailure, guild_owner_and_up
 from utils.permissions.slash_perms import slash_perms
 
@@ -18,23 +18,16 @@ class Sabbath(commands.Cog):
         self.spam_cooldown = commands.CooldownMapping.from_cooldown(
             1, 300.0, commands.BucketType.member)
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        if not message.guild:
-            return
-        if message.guild.id != cfg.guild_id:
-            return
-        if message.author.bot:
-            return
-
+    @message_stage()
+    async def on_message(self, message: discord.Message, context: MessageContext):
         # check if message pings aaron or owner role:
         if not (cfg.aaron_id in message.raw_mentions or cfg.aaron_role in message.raw_role_mentions):
             return
 
-        if not guild_service.get_guild().sabbath_mode:
+        if not context.db_guild.sabbath_mode:
             return
 
-        if permissions.has(message.guild, message.author, 5):
+        if context.level >= 5:
             return
 
         current = message.created_at.replace(tzinfo=timezone.utc).timestamp()
@@ -47,11 +40,9 @@ class Sabbath(commands.Cog):
     @guild_owner_and_up()
     @slash_command(guild_ids=[cfg.guild_id], description="Make bot say something", permissions=slash_perms.guild_owner_and_up())
     async def sabbath(self, ctx: BlooContext, mode: Option(bool, description="Set mode on or off", required=False) = None):
-        g = guild_service.get_guild()
-        g.sabbath_mode = mode if mode is not None else not g.sabbath_mode
-        g.save()
+        mode = await async_guild_service.set_sabbath_mode(mode)
 
-        await ctx.send_success(f"Set sabbath mode to {'on' if g.sabbath_mode else 'off'}!")
+        await ctx.send_success(f"Set sabbath mode to {'on' if mode else 'off'}!")
 
     @sabbath.error
     async def info_error(self,  ctx: BlooContext, error):
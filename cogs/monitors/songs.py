@@ -1,14 +1,14 @@
 import json
 from operator import imod
-import aiohttp
 import discord
 from discord.ext import commands
-import re
 import random
 
 from utils.config import cfg
+from utils.http_session import http_sessions
+from utils.message_pipeline import MessageContext, message_stage
 from utils.mod.filter import find_triggered_filters
-from data.services.guild_service import guild_service
+from utils.patterns import extract
 
 platforms = {
     "spotify": {
@@ -38,36 +38,28 @@ class Songs(commands.Cog):
         self.bot = bot
         # self.spotify_pattern = re.compile(r"[\bhttps://open.\b]spotify[\b.com\b]*[/:]*track[/:]*[A-Za-z0-9]+")
         # self.am_pattern = re.compile(r"[\bhttps://music.\b]apple[\b.com\b]*[/:][[a-zA-Z][a-zA-Z]]?[:/]album[/:][a-zA-Z\d%\(\)-]+[/:][\d]{1,10}")
-        self.pattern = re.compile(r"(https://open.spotify.com/track/[A-Za-z0-9]+|https://music.apple.com/[[a-zA-Z][a-zA-Z]]?/album/[a-zA-Z\d%\(\)-]+/[\d]{1,10}\?i=[\d]{1,15})")
         self.song_phrases = ["I like listening to {artist} too!\nHere's \"{title}\"...", "You listen to {artist} too? They're my favorite!\nHere's \"{title}\"..."]
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
+    @message_stage()
+    async def on_message(self, message: discord.Message, context: MessageContext):
         if cfg.aaron_id is None or cfg.aaron_role is None:
             return
-        if not message.guild:
-            return
-        if message.guild.id != cfg.guild_id:
-            return
-        if message.author.bot:
-            return
-        if message.channel.id != guild_service.get_guild().channel_general:
+        if message.channel.id != context.db_guild.channel_general:
             return
 
-        match = self.pattern.search(message.content)
-        if match:
-            link = match.group(0)
-            await self.generate_view(message, link)
+        link = extract(message.content).song_link
+        if link:
+            await self.generate_view(message, link, context.db_guild)
             return
         
-    async def generate_view(self, message: discord.Message, link: str):
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f'https://api.song.link/v1-alpha.1/links?url={link}') as resp:
-                if resp.status != 200:
-                    return None
+    async def generate_view(self, message: discord.Message, link: str, db_guild):
+        session = http_sessions.session
+        async with session.get(f'https://api.song.link/v1-alpha.1/links?url={link}') as resp:
+            if resp.status != 200:
+                return None
                 
-                res = await resp.text()
-                res = json.loads(res)
+            res = await resp.text()
+            res = json.loads(res)
 
         spotify_data = res.get('linksByPlatform').get('spotify')
         unique_id = spotify_data.get('entityUniqueId') if spotify_data is not None else res.get('entityUniqueId')
@@ -79,7 +71,7 @@ class Songs(commands.Cog):
             title = discord.utils.escape_mentions(title)
 
         triggered_words = find_triggered_filters(
-            title, message.author)
+            title, message.author, db_guild)
 
         if triggered_words:
             title = "<:fr:712506651520925698>"
@@ -1,32 +1,27 @@
 import asyncio
-import re
 
 import discord
 from discord.ext import commands
-from utils.config import cfg
+from utils.message_pipeline import MessageContext, message_stage
 from utils.mod.filter import find_triggered_filters
+from utils.patterns import extract
 
-from utils.config import cfg
 
 class TwitterFix(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-      if not message.guild:
-        return
-      if message.guild.id != cfg.guild_id:
-        return
+    @message_stage(include_bots=True)
+    async def on_message(self, message: discord.Message, context: MessageContext):
       if message.content is None:
         return
 
-      tweet_link = re.search(r"https://twitter\.com/[a-z0-9_]{1,15}/status/[\d+]{15,}", message.content)
+      tweet_link = extract(message.content).tweet_link
       if tweet_link is None: 
         return
 
       triggered_words = find_triggered_filters(
-            message.content, message.author)
+            message.content, message.author, context.db_guild)
       if triggered_words:
         return
 
@@ -36,8 +31,7 @@ class TwitterFix(commands.Cog):
       if new_msg.embeds:
         return
 
-      link = tweet_link.group(0)
-      link = link.replace("twitter.com", "fxtwitter.com")
+      link = tweet_link.replace("twitter.com", "fxtwitter.com")
       await message.reply(link, allowed_mentions=discord.AllowedMentions(everyone=False, users=False, roles=False), mention_author=False)
 
 
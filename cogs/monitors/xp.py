@@ -1,16 +1,103 @@
+import asyncio
+
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 
-import math
 from random import randint
-from data.services.guild_service import guild_service
-from data.services.user_service import user_service
+from expiringdict import ExpiringDict
+from data.services.guild_service import async_guild_service
+from data.services.user_service import async_user_service
 from utils.config import cfg
+from utils.levels import level_for_xp
+from utils.logger import logger
+from utils.message_pipeline import MessageContext, message_stage
 
 
 class Xp(commands.Cog):
+    # write pending xp to the database every 30 seconds, or sooner if this many users have pending xp
+    FLUSH_INTERVAL = 30
+    FLUSH_SIZE = 200
+
     def __init__(self, bot):
         self.bot = bot
+        # XP earned since the last flush, maps user ID to [xp, levels]
+        self.pending_xp = {}
+        # local copies of User documents so we don't need to look them up on every message.
+        # they expire so that changes like freezing someone's xp are picked up.
+        self.user_cache = ExpiringDict(max_len=10000, max_age_seconds=120)
+        # bumped whenever a flush starts or ends, so reads can tell if one overlapped them
+        self.flush_generation = 0
+        self.flushes_in_progress = 0
+        # set while no xp is being written
+        self.flushed = asyncio.Event()
+        self.flushed.set()
+        self.flush_xp_task.start()
+
+    def cog_unload(self):
+        # the task writes whatever xp is left once it's stopped
+        self.flush_xp_task.cancel()
+
+    @tasks.loop(seconds=FLUSH_INTERVAL)
+    async def flush_xp_task(self):
+        await self.flush_xp()
+
+    @flush_xp_task.after_loop
+    async def flush_remaining_xp(self):
+        await self.flush_xp()
+
+    async def flush_xp(self):
+        """Write all pending xp and levels to the database in one go
+        """
+
+        if not self.pending_xp:
+            return
+
+        pending, self.pending_xp = self.pending_xp, {}
+        self.flush_generation += 1
+        self.flushes_in_progress += 1
+        self.flushed.clear()
+        try:
+            await async_user_service.inc_xp_bulk(pending)
+        except Exception as e:
+            logger.error(f"Failed to write xp for {len(pending)} users: {e}")
+            # put the xp back so we try again next time
+            for _id, (xp, levels) in pending.items():
+                current = self.pending_xp.setdefault(_id, [0, 0])
+                current[0] += xp
+                current[1] += levels
+        finally:
+            self.flush_generation += 1
+            self.flushes_in_progress -= 1
+            if not self.flushes_in_progress:
+                self.flushed.set()
+
+    async def get_user(self, _id: int):
+        user = self.user_cache.get(_id)
+        if user is not None:
+            return user
+
+        while True:
+            await self.flushed.wait()
+            generation = self.flush_generation
+            user = await async_user_service.get_user(id=_id)
+            # if xp was being written while we read, we can't tell whether the user we got has it,
+            # so read again. flushes are rare, so this almost never happens
+            if generation == self.flush_generation:
+                break
+
+        # the database doesn't know about the xp we haven't flushed yet
+        pending = self.pending_xp.get(_id)
+        if pending is not None:
+            user.xp += pending[0]
+            user.level += pending[1]
+
+        # another message from this user might have beat us to it
+        cached = self.user_cache.get(_id)
+        if cached is not None:
+            return cached
+
+        self.user_cache[_id] = user
+        return user
 
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member) -> None:
@@ -19,41 +106,39 @@ class Xp(commands.Cog):
         if member.guild.id != cfg.guild_id:
             return
 
-        user = user_service.get_user(id=member.id)
+        user = await async_user_service.get_user(id=member.id)
 
         if user.is_xp_frozen or user.is_clem:
             return
 
         level = user.level
-        db_guild = guild_service.get_guild()
+        db_guild = await async_guild_service.get_guild()
 
         roles_to_add = self.assess_new_roles(level, db_guild)
         await self.add_new_roles(member, roles_to_add)
 
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        if not message.guild:
-            return
-        if message.guild.id != cfg.guild_id:
-            return
-        if message.author.bot:
-            return
-
-        db_guild = guild_service.get_guild()
+    @message_stage()
+    async def on_message(self, message, context: MessageContext):
+        db_guild = context.db_guild
         if message.channel.id == db_guild.channel_botspam:
             return
 
-        user = user_service.get_user(id=message.author.id)
+        user = await self.get_user(message.author.id)
         if user.is_xp_frozen or user.is_clem:
             return
 
         xp_to_add = randint(0, 11)
-        new_xp, level_before = user_service.inc_xp(
-            message.author.id, xp_to_add)
-        new_level = self.get_level(new_xp)
+        pending = self.pending_xp.setdefault(message.author.id, [0, 0])
+        pending[0] += xp_to_add
+        user.xp += xp_to_add
+        new_level = self.get_level(user.xp)
 
-        if new_level > level_before:
-            user_service.inc_level(message.author.id)
+        if new_level > user.level:
+            pending[1] += 1
+            user.level += 1
+
+        if len(self.pending_xp) >= self.FLUSH_SIZE:
+            await self.flush_xp()
 
         roles_to_add = self.assess_new_roles(new_level, db_guild)
         await self.add_new_roles(message, roles_to_add)
@@ -81,15 +166,13 @@ class Xp(commands.Cog):
 
         roles_to_add = [member.guild.get_role(role) for role in roles_to_add if member.guild.get_role(
             role) is not None and member.guild.get_role(role) not in member.roles]
+        if not roles_to_add:
+            return
+
         await member.add_roles(*roles_to_add, reason="XP roles")
 
     def get_level(self, current_xp):
-        level = 0
-        xp = 0
-        while xp <= current_xp:
-            xp = xp + 45 * level * (math.floor(level / 10) + 1)
-            level += 1
-        return level
+        return level_for_xp(current_xp)
 
 
 class StickyRoles(commands.Cog):
@@ -103,14 +186,14 @@ class StickyRoles(commands.Cog):
 
         roles = [role.id for role in member.roles if role <
                  member.guild.me.top_role and role != member.guild.default_role]
-        user_service.set_sticky_roles(member.id, roles)
+        await async_user_service.set_sticky_roles(member.id, roles)
 
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
         if member.guild.id != cfg.guild_id:
             return
 
-        possible_roles = user_service.get_user(member.id).sticky_roles
+        possible_roles = (await async_user_service.get_user(member.id)).sticky_roles
         roles = [member.guild.get_role(role) for role in possible_roles if member.guild.get_role(
             role) is not None and member.guild.get_role(role) < member.guild.me.top_role]
         await member.add_roles(*roles, reason="Sticky roles")
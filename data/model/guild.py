@@ -1,6 +1,5 @@
 import mongoengine
 from data.model.filterword import FilterWord
-from data.model.tag import Tag
 
 class Guild(mongoengine.Document):
     _id                       = mongoengine.IntField(required=True)
@@ -45,13 +44,13 @@ class Guild(mongoengine.Document):
     logging_excluded_channels = mongoengine.ListField(default=[])
     nsa_guild_id              = mongoengine.IntField()
     nsa_mapping               = mongoengine.DictField(default={})
-    tags                      = mongoengine.EmbeddedDocumentListField(Tag, default=[])
-    memes                     = mongoengine.EmbeddedDocumentListField(Tag, default=[])
     sabbath_mode              = mongoengine.BooleanField(default=False)
     ban_today_spam_accounts   = mongoengine.BooleanField(default=False)
     
     meta = {
         'db_alias': 'default',
-        'collection': 'guilds'
+        'collection': 'guilds',
+        # tags and memes used to be embedded here, don't fail on guilds that haven't run migrate_tags.py yet
+        'strict': False
     }
 
@@ -1,7 +1,8 @@
 import mongoengine
 from datetime import datetime
 
-class Tag(mongoengine.EmbeddedDocument):
+class Tag(mongoengine.Document):
+    kind         = mongoengine.StringField(required=True, default="tag", choices=["tag", "meme"])
     name         = mongoengine.StringField(required=True)
     content      = mongoengine.StringField(required=True)
     added_by_tag = mongoengine.StringField()
@@ -10,3 +11,11 @@ class Tag(mongoengine.EmbeddedDocument):
     use_count    = mongoengine.IntField(default=0)
     image        = mongoengine.FileField(default=None)
     button_links = mongoengine.ListField(default=[], required=False)
+
+    meta = {
+        'db_alias': 'default',
+        'collection': 'tags',
+        'indexes': [
+            {'fields': ['kind', 'name'], 'unique': True}
+        ]
+    }
@@ -0,0 +1,47 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+# mongoengine and pymongo only offer blocking calls. pymongo is thread-safe,
+# so we run database calls on a dedicated pool instead of on the event loop.
+db_executor = ThreadPoolExecutor(max_workers=10, thread_name_prefix="database")
+
+
+class AsyncService:
+    """Wraps a synchronous service (i.e `user_service` or `guild_service`) so that every method
+    is run on the database executor. The wrapper has the same methods as the service it wraps,
+    but they must be awaited.
+    """
+
+    def __init__(self, service):
+        self._service = service
+
+    async def run(self, func, *args, **kwargs):
+        """Run a blocking function on the database executor and wait for its result.
+
+        Parameters
+        ----------
+        func : Callable
+            The function to run, for example `document.save`
+
+        Returns
+        -------
+        Any
+            Whatever `func` returns
+        """
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(db_executor, functools.partial(func, *args, **kwargs))
+
+    def __getattr__(self, name):
+        attr = getattr(self._service, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def wrapper(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+
+        # only look up each method once
+        setattr(self, name, wrapper)
+        return wrapper
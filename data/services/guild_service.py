@@ -1,13 +1,37 @@
-from discord import channel
+import threading
+import time
+from typing import Dict, List, Optional
+
 from data.model.filterword import FilterWord
 from data.model.guild import Guild
 from data.model.tag import Tag
 from utils.config import cfg
+from utils.logger import logger
 from data.model.giveaway import Giveaway
+from data.services.async_service import AsyncService
+from pymongo import ReturnDocument
+from utils.search_index import NameIndex
 
 class GuildService:
+    def __init__(self):
+        # cached snapshot of the main guild's document and when it was fetched.
+        # every write made through this service invalidates the snapshot, and the
+        # TTL bounds how stale it can get if it's edited from outside the bot.
+        self._guild = None
+        self._fetched_at = 0
+        # bumped by every invalidation, so that a read that started before a write
+        # doesn't put the document from before the write back in the cache
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._watcher = None
+        # names of all tags and memes, for autocomplete. they're updated along with the tags,
+        # and rebuilt from the database after the cache TTL in case they were changed from outside the bot.
+        self._names: Dict[str, NameIndex] = {}
+        self._names_fetched_at: Dict[str, float] = {}
+
     def get_guild(self) -> Guild:
         """Returns the state of the main guild from the database.
+        A cached copy is returned if it was fetched less than `cfg.guild_cache_ttl` seconds ago.
 
         Returns
         -------
@@ -15,48 +39,170 @@ class GuildService:
             The Guild document object that holds information about the main guild.
         """
 
-        return Guild.objects(_id=cfg.guild_id).first()
-    
+        guild = self.get_cached_guild()
+        if guild is None:
+            generation = self._generation
+            guild = Guild.objects(_id=cfg.guild_id).first()
+            with self._lock:
+                if generation == self._generation:
+                    self._guild = guild
+                    self._fetched_at = time.monotonic()
+        return guild
+
+    def get_cached_guild(self) -> Optional[Guild]:
+        """Returns the cached Guild document without touching the database.
+
+        Returns
+        -------
+        Optional[Guild]
+            The cached Guild document, or None if there isn't one or it has expired.
+        """
+
+        if self._guild is None or time.monotonic() - self._fetched_at > cfg.guild_cache_ttl:
+            return None
+        return self._guild
+
+    def invalidate(self) -> None:
+        """Drops the cached Guild document so that the next call to `get_guild` reads it from the database.
+        """
+
+        with self._lock:
+            self._generation += 1
+            self._guild = None
+
+    def watch_changes(self) -> None:
+        """Starts a background thread that invalidates the cached Guild document whenever
+        it's changed in the database, using a MongoDB change stream. Requires a replica set;
+        if one isn't available, we fall back to the TTL.
+        """
+
+        if self._watcher is not None:
+            return
+
+        self._watcher = threading.Thread(target=self._watch_changes, name="guild-cache-watcher", daemon=True)
+        self._watcher.start()
+
+    def _watch_changes(self) -> None:
+        pipeline = [{"$match": {"documentKey._id": cfg.guild_id}}]
+        try:
+            with Guild._get_collection().watch(pipeline) as stream:
+                logger.info("Watching the guild document for changes")
+                for _ in stream:
+                    self.invalidate()
+        except Exception as e:
+            logger.warning(f"Could not watch the guild document for changes, falling back to a {cfg.guild_cache_ttl}s cache: {e}")
+        finally:
+            self.invalidate()
+            self._watcher = None
+
     def add_tag(self, tag: Tag) -> None:
-        Guild.objects(_id=cfg.guild_id).update_one(push__tags=tag)
+        self._add_tag("tag", tag)
 
     def remove_tag(self, tag: str):
-        return Guild.objects(_id=cfg.guild_id).update_one(pull__tags__name=Tag(name=tag).name)
+        return self._remove_tag("tag", tag)
 
     def edit_tag(self, tag):
-        return Guild.objects(_id=cfg.guild_id, tags__name=tag.name).update_one(set__tags__S=tag)
+        return self._edit_tag(tag)
 
-    def get_tag(self, name: str):
-        tag = Guild.objects.get(_id=cfg.guild_id).tags.filter(name=name).first()
-        if tag is None:
-            return
-        tag.use_count += 1
-        self.edit_tag(tag)
-        return tag
+    def get_tag(self, name: str) -> Optional[Tag]:
+        """Fetches a tag and counts a use of it, in a single round trip.
+
+        Parameters
+        ----------
+        name : str
+            Name of the tag
+
+        Returns
+        -------
+        Optional[Tag]
+            The tag, or None if there isn't one with that name
+        """
+
+        return self._use_tag("tag", name)
+
+    def get_tags(self) -> List[Tag]:
+        """All tags sorted by name, without their content
+        """
+
+        return self._list_tags("tag")
+
+    def get_tag_names(self) -> NameIndex:
+        return self._get_names("tag")
 
     def add_meme(self, meme: Tag) -> None:
-        Guild.objects(_id=cfg.guild_id).update_one(push__memes=meme)
+        self._add_tag("meme", meme)
 
     def remove_meme(self, meme: str):
-        return Guild.objects(_id=cfg.guild_id).update_one(pull__memes__name=Tag(name=meme).name)
+        return self._remove_tag("meme", meme)
 
     def edit_meme(self, meme):
-        return Guild.objects(_id=cfg.guild_id, memes__name=meme.name).update_one(set__memes__S=meme)
+        return self._edit_tag(meme)
 
-    def get_meme(self, name: str):
-        meme = Guild.objects.get(_id=cfg.guild_id).memes.filter(name=name).first()
-        if meme is None:
-            return
-        meme.use_count += 1
-        self.edit_meme(meme)
-        return meme
-    
-    def inc_caseid(self) -> None:
-        """Increments Guild.case_id, which keeps track of the next available ID to
-        use for a case.
+    def get_meme(self, name: str) -> Optional[Tag]:
+        """Fetches a meme and counts a use of it, see `get_tag`
         """
 
-        Guild.objects(_id=cfg.guild_id).update_one(inc__case_id=1)
+        return self._use_tag("meme", name)
+
+    def get_memes(self) -> List[Tag]:
+        return self._list_tags("meme")
+
+    def get_meme_names(self) -> NameIndex:
+        return self._get_names("meme")
+
+    def _add_tag(self, kind: str, tag: Tag) -> None:
+        tag.kind = kind
+        tag.save(force_insert=True)
+        if kind in self._names:
+            self._names[kind].add(tag.name)
+
+    def _remove_tag(self, kind: str, name: str) -> int:
+        res = Tag.objects(kind=kind, name=name).delete()
+        if kind in self._names:
+            self._names[kind].remove(name)
+        return res
+
+    def _edit_tag(self, tag: Tag) -> bool:
+        # only the fields that were changed are written, so uses counted in the meantime aren't lost
+        tag.save()
+        return True
+
+    def _use_tag(self, kind: str, name: str) -> Optional[Tag]:
+        return Tag.objects(kind=kind, name=name).modify(inc__use_count=1, new=True)
+
+    def _list_tags(self, kind: str) -> List[Tag]:
+        # the (kind, name) index gives us the tags in order
+        return list(Tag.objects(kind=kind).only("name", "added_by_tag", "use_count", "image").order_by("name"))
+
+    def _get_names(self, kind: str) -> NameIndex:
+        if kind not in self._names or time.monotonic() - self._names_fetched_at[kind] > cfg.guild_cache_ttl:
+            self._names[kind] = NameIndex(Tag.objects(kind=kind).scalar("name"))
+            self._names_fetched_at[kind] = time.monotonic()
+        return self._names[kind]
+
+    def allocate_case_ids(self, count: int = 1) -> int:
+        """Reserves `count` consecutive case IDs in a single atomic update,
+        so concurrent callers never get the same ID.
+
+        Parameters
+        ----------
+        count : int, optional
+            How many IDs to reserve, by default 1
+
+        Returns
+        -------
+        int
+            The first reserved ID. The others follow it.
+        """
+
+        guild = Guild._get_collection().find_one_and_update(
+            {"_id": cfg.guild_id},
+            {"$inc": {"case_id": count}},
+            projection={"case_id": 1},
+            return_document=ReturnDocument.BEFORE
+        )
+        self.invalidate()
+        return guild["case_id"]
 
     def all_rero_mappings(self):
         g = self.get_guild()
@@ -64,19 +210,15 @@ class GuildService:
         return current
 
     def add_rero_mapping(self, mapping):
-        g = self.get_guild()
-        current = g.reaction_role_mapping
         the_key = list(mapping.keys())[0]
-        current[str(the_key)] = mapping[the_key]
-        g.reaction_role_mapping = current
-        g.save()
+        Guild.objects(_id=cfg.guild_id).update_one(**{f"set__reaction_role_mapping__{the_key}": mapping[the_key]})
+        self.invalidate()
 
     def append_rero_mapping(self, message_id, mapping):
-        g = self.get_guild()
-        current = g.reaction_role_mapping
-        current[str(message_id)] = current[str(message_id)] | mapping
-        g.reaction_role_mapping = current
-        g.save()
+        # read from the database rather than the cache, the cached document is shared and must not be changed
+        current = Guild.objects(_id=cfg.guild_id).only("reaction_role_mapping").first().reaction_role_mapping
+        Guild.objects(_id=cfg.guild_id).update_one(**{f"set__reaction_role_mapping__{message_id}": current[str(message_id)] | mapping})
+        self.invalidate()
 
     def get_rero_mapping(self, id):
         g = self.get_guild()
@@ -86,10 +228,8 @@ class GuildService:
             return None
 
     def delete_rero_mapping(self, id):
-        g = self.get_guild()
-        if str(id) in g.reaction_role_mapping.keys():
-            g.reaction_role_mapping.pop(str(id))
-            g.save()
+        Guild.objects(_id=cfg.guild_id).update_one(**{f"unset__reaction_role_mapping__{id}": True})
+        self.invalidate()
     
     def get_giveaway(self, _id: int) -> Giveaway:
         """
@@ -138,13 +278,35 @@ class GuildService:
         if(len(existing) > 0):
             return False
         Guild.objects(_id=cfg.guild_id).update_one(push__raid_phrases=FilterWord(word=phrase, bypass=5, notify=True))
+        self.invalidate()
         return True
     
     def remove_raid_phrase(self, phrase: str):
         Guild.objects(_id=cfg.guild_id).update_one(pull__raid_phrases__word=FilterWord(word=phrase).word)
+        self.invalidate()
+
+    def set_sabbath_mode(self, mode: Optional[bool] = None) -> bool:
+        """Turns sabbath mode on or off, or toggles it if `mode` is None
+
+        Returns
+        -------
+        bool
+            Whether sabbath mode is now on
+        """
+
+        if mode is None:
+            mode = not Guild.objects(_id=cfg.guild_id).only("sabbath_mode").first().sabbath_mode
+        Guild.objects(_id=cfg.guild_id).update_one(set__sabbath_mode=mode)
+        self.invalidate()
+        return mode
+
+    def set_emoji_logging_webhook(self, url: str) -> None:
+        Guild.objects(_id=cfg.guild_id).update_one(set__emoji_logging_webhook=url)
+        self.invalidate()
 
     def set_spam_mode(self, mode) -> None:
         Guild.objects(_id=cfg.guild_id).update_one(set__ban_today_spam_accounts=mode)
+        self.invalidate()
 
     def add_filtered_word(self, fw: FilterWord) -> None:
         existing = self.get_guild().filter_words.filter(word=fw.word)
@@ -152,19 +314,25 @@ class GuildService:
             return False
 
         Guild.objects(_id=cfg.guild_id).update_one(push__filter_words=fw)
+        self.invalidate()
         return True
 
     def remove_filtered_word(self, word: str):
-        return Guild.objects(_id=cfg.guild_id).update_one(pull__filter_words__word=FilterWord(word=word).word)
+        res = Guild.objects(_id=cfg.guild_id).update_one(pull__filter_words__word=FilterWord(word=word).word)
+        self.invalidate()
+        return res
 
     def update_filtered_word(self, word: FilterWord):
-        return Guild.objects(_id=cfg.guild_id, filter_words__word=word.word).update_one(set__filter_words__S=word)
+        res = Guild.objects(_id=cfg.guild_id, filter_words__word=word.word).update_one(set__filter_words__S=word)
+        self.invalidate()
+        return res
 
     def add_whitelisted_guild(self, id: int):
         g = Guild.objects(_id=cfg.guild_id)
         g2 = g.first()
         if id not in g2.filter_excluded_guilds:
             g.update_one(push__filter_excluded_guilds=id)
+            self.invalidate()
             return True
         return False
 
@@ -173,6 +341,7 @@ class GuildService:
         g2 = g.first()
         if id in g2.filter_excluded_guilds:
             g.update_one(pull__filter_excluded_guilds=id)
+            self.invalidate()
             return True
         return False
 
@@ -181,6 +350,7 @@ class GuildService:
         g2 = g.first()
         if id not in g2.filter_excluded_channels:
             g.update_one(push__filter_excluded_channels=id)
+            self.invalidate()
             return True
         return False
 
@@ -189,6 +359,7 @@ class GuildService:
         g2 = g.first()
         if id in g2.filter_excluded_channels:
             g.update_one(pull__filter_excluded_channels=id)
+            self.invalidate()
             return True
         return False
 
@@ -197,13 +368,26 @@ class GuildService:
 
     def add_locked_channels(self, channel):
         Guild.objects(_id=cfg.guild_id).update_one(push__locked_channels=channel)
+        self.invalidate()
 
     def remove_locked_channels(self, channel):
         Guild.objects(_id=cfg.guild_id).update_one(pull__locked_channels=channel)
+        self.invalidate()
 
     def set_nsa_mapping(self, channel_id, webhooks):
-        guild = Guild.objects(_id=cfg.guild_id).first()
-        guild.nsa_mapping[str(channel_id)] = webhooks
-        guild.save()
+        Guild.objects(_id=cfg.guild_id).update_one(**{f"set__nsa_mapping__{channel_id}": webhooks})
+        self.invalidate()
+
+guild_service = GuildService()
+
+
+class AsyncGuildService(AsyncService):
+    async def get_guild(self) -> Guild:
+        # if we have a fresh copy cached we don't need to leave the event loop
+        guild = self._service.get_cached_guild()
+        if guild is not None:
+            return guild
+        return await self.run(self._service.get_guild)
+
 
-guild_service = GuildService()
\ No newline at end of file
+async_guild_service = AsyncGuildService(guild_service)
@@ -1,7 +1,10 @@
-from typing import Counter
+from typing import Counter, Dict, List, Tuple
+from pymongo import UpdateOne
 from data.model.case import Case
 from data.model.cases import Cases
 from data.model.user import User
+from data.services.async_service import AsyncService
+from data.services.guild_service import guild_service
 
 class UserService:
     def get_user(self, id: int) -> User:
@@ -67,6 +70,23 @@ class UserService:
 
         self.get_user(id)
         User.objects(_id=id).update_one(inc__level=1)
+
+    def inc_xp_bulk(self, deltas: Dict[int, Tuple[int, int]]) -> None:
+        """Increments the xp and level of many users in a single round trip.
+        Users must already have a User document in the database.
+
+        Parameters
+        ----------
+        deltas : Dict[int, Tuple[int, int]]
+            Maps a user's ID to the amount of xp and levels to add to them
+        """
+
+        if not deltas:
+            return
+
+        operations = [UpdateOne({"_id": _id}, {"$inc": {"xp": xp, "level": level}})
+                      for _id, (xp, level) in deltas.items()]
+        User._get_collection().bulk_write(operations, ordered=False)
     
     def get_cases(self, id: int) -> Cases:
         """Return the Document representing the cases of a user, whose ID is given by `id`
@@ -105,9 +125,45 @@ class UserService:
             The case we want to add to the user.
         """
 
-        # ensure this user has a cases document before we try to append the new case
-        self.get_cases(_id)
-        Cases.objects(_id=_id).update_one(push__cases=case)
+        # upsert creates the cases document if this is the user's first case
+        Cases._get_collection().update_one({"_id": _id}, {"$push": {"cases": case.to_mongo()}}, upsert=True)
+
+    def create_case(self, _id: int, case: Case) -> Case:
+        """Give a new case the next case ID and add it to the user with id `_id`.
+        The ID is reserved atomically, so cases created at the same time never share one.
+
+        Parameters
+        ----------
+        _id : int
+            ID of the user who we want to add the case to.
+        case : Case
+            The case we want to add to the user, without an ID.
+
+        Returns
+        -------
+        Case
+            The case, with its ID set.
+        """
+
+        case._id = guild_service.allocate_case_ids()
+        self.add_case(_id, case)
+        return case
+
+    def add_cases_bulk(self, cases: List[Tuple[int, Case]]) -> None:
+        """Add many cases in one round trip, creating the Cases documents of users who don't have one yet.
+
+        Parameters
+        ----------
+        cases : List[Tuple[int, Case]]
+            (ID of the user, the case to add to them)
+        """
+
+        if not cases:
+            return
+
+        operations = [UpdateOne({"_id": _id}, {"$push": {"cases": case.to_mongo()}}, upsert=True)
+                      for _id, case in cases]
+        Cases._get_collection().bulk_write(operations, ordered=False)
 
     def set_warn_kicked(self, _id: int) -> None:
         """Set the `was_warn_kicked` field in the User object of the user, whose ID is given by `_id`,
@@ -210,4 +266,5 @@ class UserService:
         self.get_user(_id)
         User.objects(_id=_id).update_one(set__sticky_roles=roles)
 
-user_service = UserService()
\ No newline at end of file
+user_service = UserService()
+async_user_service = AsyncService(user_service)
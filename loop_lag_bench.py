@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+from raid_replay import monitor_loop_lag, percentile, seed_guild, setup_database, stats
+
+"""
+Measures how much the event loop lags while messages come in, when their database calls are made
+on the loop ("before", like the services were called before AsyncService) and when they're made
+through the async services ("after"). Every message reads its author's profile and saves it, like
+the commands that change a profile do. The database is mongomock with some latency per call
+(`pip install mongomock`), nothing talks to Discord. mongomock scans every document on each query,
+so with many more authors it, rather than the event loop, becomes the bottleneck.
+
+    python3 loop_lag_bench.py --rate 500 --duration 10 --db-latency 0.002
+"""
+
+MODES = ["before", "after"]
+USER_IDS = 300_000
+
+
+async def run(mode: str, rate: float, duration: float, users: int, seed: int) -> dict:
+    from data.services.user_service import async_user_service, user_service
+
+    rng = random.Random(seed)
+
+    async def on_message(user_id: int) -> None:
+        if mode == "before":
+            db_user = user_service.get_user(user_id)
+            db_user.is_xp_frozen = not db_user.is_xp_frozen
+            db_user.save()
+        else:
+            db_user = await async_user_service.get_user(user_id)
+            db_user.is_xp_frozen = not db_user.is_xp_frozen
+            await async_user_service.run(db_user.save)
+
+    stats.loop_lag.clear()
+    handler_times = []
+
+    async def handle(user_id: int) -> None:
+        start = time.perf_counter()
+        await on_message(user_id)
+        handler_times.append(time.perf_counter() - start)
+
+    lag_monitor = asyncio.create_task(monitor_loop_lag())
+    tasks = []
+    start = time.perf_counter()
+    t = 0.0
+    while True:
+        t += rng.expovariate(rate)
+        if t >= duration:
+            break
+        delay = t - (time.perf_counter() - start)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        # like the gateway, every message gets its own task
+        tasks.append(asyncio.create_task(handle(USER_IDS + rng.randrange(users))))
+
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    lag_monitor.cancel()
+
+    return {
+        "messages": len(tasks),
+        "achieved_rate": len(tasks) / elapsed,
+        "handler_ms": {"avg": sum(handler_times) / len(handler_times) * 1000, "p99": percentile(handler_times, 0.99) * 1000},
+        "loop_lag_ms": {"p50": percentile(stats.loop_lag, 0.5) * 1000, "p99": percentile(stats.loop_lag, 0.99) * 1000, "max": max(stats.loop_lag, default=0.0) * 1000},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure event loop lag with blocking and with async database calls.")
+    parser.add_argument("--mode", choices=MODES, help="only measure one of them (default: both)")
+    parser.add_argument("--rate", type=float, default=500.0, help="messages per second (default: 500)")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to send messages for (default: 10)")
+    parser.add_argument("--users", type=int, default=100, help="distinct authors (default: 100)")
+    parser.add_argument("--db-latency", type=float, default=0.002, help="seconds each database call takes (default: 0.002)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # the bot's logger parses the command line when it's imported
+    sys.argv = [sys.argv[0], "--disable-webhook-logging"]
+
+    setup_database(args.db_latency)
+    seed_guild(int(os.environ["MAIN_GUILD_ID"]))
+
+    for mode in [args.mode] if args.mode else MODES:
+        result = asyncio.run(run(mode, args.rate, args.duration, args.users, args.seed))
+        lag = result["loop_lag_ms"]
+        print(f"{mode + ':':<8}{result['messages']} messages at {result['achieved_rate']:.0f}/s, "
+              f"handler avg {result['handler_ms']['avg']:.2f}ms p99 {result['handler_ms']['p99']:.2f}ms, "
+              f"loop lag p50 {lag['p50']:.2f}ms p99 {lag['p99']:.2f}ms max {lag['max']:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,19 @@
 import discord
 from discord.ext import commands
 
+import importlib.machinery
 import os
 
-from data.services.user_service import user_service
+from data.services.guild_service import async_guild_service, guild_service
+from data.services.user_service import async_user_service
+from utils.appledb import appledb
 from utils.config import cfg
 from utils.context import BlooContext
+from utils.cpu_pool import CPUPool
 from utils.database import db
+from utils.http_session import http_sessions
 from utils.logger import logger
+from utils.message_pipeline import MessagePipeline
 from utils.misc import IssueCache, RuleCache
 from utils.mod.filter import find_triggered_filters
 from utils.misc import BanCache
@@ -66,11 +72,34 @@ class Bot(commands.Bot):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.tasks = Tasks(self)
+        # for CPU-bound work that shouldn't run on the event loop
+        self.cpu_pool = CPUPool(cfg.cpu_pool_processes, cfg.cpu_pool_threads)
+        # cogs handle messages through the pipeline rather than their own on_message listeners
+        self.message_pipeline = MessagePipeline()
+        self.add_listener(self.message_pipeline.dispatch, "on_message")
 
         # force the config object and database connection to be loaded
         if cfg and db and permissions:
             logger.info("Presetup phase completed! Connecting to Discord...")
 
+        if cfg.guild_cache_watch:
+            guild_service.watch_changes()
+
+    def add_cog(self, cog: commands.Cog, *args, **kwargs) -> None:
+        super().add_cog(cog, *args, **kwargs)
+        self.message_pipeline.add_cog(cog)
+
+    def remove_cog(self, name: str) -> commands.Cog:
+        cog = super().remove_cog(name)
+        if cog is not None:
+            self.message_pipeline.remove_cog(cog)
+        return cog
+
+    async def close(self) -> None:
+        await super().close()
+        self.cpu_pool.shutdown()
+        await http_sessions.close()
+
     async def get_application_context(self, interaction: discord.Interaction, *, cls=BlooContext) -> BlooContext:
         return await super().get_application_context(interaction, cls=cls)
 
@@ -81,7 +110,7 @@ class Bot(commands.Bot):
         if permissions.has(interaction.user.guild, interaction.user, 6):
             return await super().process_application_commands(interaction)
 
-        db_user = user_service.get_user(interaction.user.id)
+        db_user = await async_user_service.get_user(interaction.user.id)
         if db_user.command_bans.get(interaction.data.get("name")):
             ctx = await self.get_application_context(interaction)
             await ctx.send_error("You are not allowed to use that command!")
@@ -95,7 +124,7 @@ class Bot(commands.Bot):
             [str(option.get("value") or "") for option in options])
 
         triggered_words = find_triggered_filters(
-            message_content, interaction.user)
+            message_content, interaction.user, await async_guild_service.get_guild())
 
         if triggered_words:
             ctx = await self.get_application_context(interaction)
@@ -104,16 +133,13 @@ class Bot(commands.Bot):
 
         return await super().process_application_commands(interaction)
 
-
-bot = Bot(intents=intents, allowed_mentions=mentions)
-
-
-@bot.event
-async def on_ready():
-    bot.ban_cache = BanCache(bot)
-    bot.issue_cache = IssueCache(bot)
-    bot.rule_cache = RuleCache(bot)
-    print("""
+    async def on_ready(self):
+        self.ban_cache = BanCache(self)
+        self.issue_cache = IssueCache(self)
+        self.rule_cache = RuleCache(self)
+        # load the appledb snapshot now rather than on the first autocomplete
+        self.loop.create_task(appledb.get())
+        print("""
             88          88                          
             88          88                          
             88          88                          
@@ -123,15 +149,31 @@ async def on_ready():
             88b,   ,a8" 88 "8a,   ,a8" "8a,   ,a8"  
             8Y"Ybbd8"'  88  `"YbbdP"'   `"YbbdP"'   
                 """)
-    logger.info(f'Logged in as: {bot.user.name} (ID: {bot.user.id})')
-    logger.info(f'Version: {discord.__version__}')
-    logger.info(
-        f'Made with ❤️ by SlimShadyIAm#9999 and the Bloo development team. Enjoy!')
+        logger.info(f'Logged in as: {self.user.name} (ID: {self.user.id})')
+        logger.info(f'Version: {discord.__version__}')
+        logger.info(
+            f'Made with ❤️ by SlimShadyIAm#9999 and the Bloo development team. Enjoy!')
+
+    async def on_member_update(self, _, member: discord.Member):
+        permissions.invalidate(member.id)
+
+    async def on_member_remove(self, member: discord.Member):
+        permissions.invalidate(member.id)
 
+    async def on_guild_update(self, _, guild: discord.Guild):
+        # the guild owner may have changed
+        permissions.invalidate()
 
+
+# the CPU pool's worker processes import this module too, so only start the bot when it's run directly
 if __name__ == '__main__':
+    # worker processes (see utils/cpu_pool.py) run the main module again when they start, unless
+    # it's named __main__. they only need utils.cpu_jobs, not the bot, its config and the database
+    __spec__ = importlib.machinery.ModuleSpec("__main__", None)
+
+    bot = Bot(intents=intents, allowed_mentions=mentions)
     bot.remove_command("help")
     for extension in initial_extensions:
         bot.load_extension(extension)
 
-bot.run(os.environ.get("BLOO_TOKEN"), reconnect=True)
+    bot.run(os.environ.get("BLOO_TOKEN"), reconnect=True)
@@ -0,0 +1,55 @@
+import os
+
+import mongoengine
+from dotenv import find_dotenv, load_dotenv
+
+from data.model.guild import Guild
+from data.model.tag import Tag
+
+load_dotenv(find_dotenv())
+
+"""
+Tags and memes used to be stored as lists inside the guild document. This moves them into the tags collection
+and removes the lists from the guild. Run it once after updating: `python3 migrate_tags.py`.
+It's safe to run again, tags that were already moved are skipped.
+"""
+
+
+def migrate():
+    print("MIGRATING TAGS...")
+    guild_id = int(os.environ.get("MAIN_GUILD_ID"))
+    guilds = Guild._get_collection()
+
+    guild = guilds.find_one({"_id": guild_id}, {"tags": 1, "memes": 1})
+    if guild is None:
+        print(f"Guild {guild_id} not found, has the database been set up?")
+        return
+
+    # make sure the unique (kind, name) index exists before inserting anything
+    Tag.ensure_indexes()
+    for kind, field in (("tag", "tags"), ("meme", "memes")):
+        moved = skipped = 0
+        for son in guild.get(field) or []:
+            if Tag.objects(kind=kind, name=son.get("name")).first() is not None:
+                skipped += 1
+                continue
+
+            tag = Tag._from_son(son)
+            tag.kind = kind
+            tag.save(force_insert=True)
+            moved += 1
+
+        print(f"{field}: moved {moved}, skipped {skipped} that already existed")
+
+    guilds.update_one({"_id": guild_id}, {"$unset": {"tags": "", "memes": ""}})
+    print("DONE")
+
+
+if __name__ == "__main__":
+    if os.environ.get("DB_CONNECTION_STRING") is None:
+        mongoengine.register_connection(
+            host=os.environ.get("DB_HOST"), port=int(os.environ.get("DB_PORT")), alias="default", name="botty")
+    else:
+        mongoengine.register_connection(
+            host=os.environ.get("DB_CONNECTION_STRING"), alias="default", name="botty")
+    migrate()
@@ -0,0 +1,533 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import mongoengine
+
+"""
+Replays a raid against the antiraid monitor without Discord or a database, so antiraid changes
+can be measured before they're deployed. Events (members joining, messages) come from a synthetic
+scenario or a recorded JSON lines file, and go through AntiRaidMonitor.on_member_join and the
+message pipeline in real time. Discord is replaced by fake guilds, members and channels that just
+record what was done to them, and the database by mongomock (`pip install mongomock`).
+
+    python3 raid_replay.py join --raiders 200 --duration 10
+    python3 raid_replay.py spam --background 50 --record spam.jsonl
+    python3 raid_replay.py --file spam.jsonl --output results.json
+
+Each line of a recorded file is one event:
+    {"t": 0.25, "type": "join", "user": 100001, "raider": true, "created_at": "2021-07-01T10:00:00+00:00"}
+    {"t": 0.50, "type": "message", "user": 100001, "raider": true, "content": "hi", "mentions": 0, "role_mentions": 0}
+`t` is seconds since the start of the replay. Members who send a message without joining first
+are treated as members who joined a year ago, unless the message has a `joined_at` (and `created_at`).
+
+Reports, mutes' public logs and DMs are not sent anywhere. Mod reports are counted instead of
+being posted, since they wait for a moderator to press a button.
+"""
+
+SCENARIOS = ["join", "spam", "ping", "phrase", "duplicate"]
+RAID_PHRASE = "steam-gift.example"
+BOT_ID = 2
+RAIDER_IDS = 100_000
+BACKGROUND_IDS = 200_000
+# mongomock methods that count as a database call
+DB_METHODS = ["find", "find_one", "insert_one", "insert_many", "update_one", "update_many", "replace_one",
+              "delete_one", "delete_many", "find_one_and_update", "bulk_write", "count_documents", "aggregate"]
+
+# utils.config needs these to be set. Nothing here talks to Discord, so placeholders are fine
+for key, value in (("MAIN_GUILD_ID", "1"), ("OWNER_ID", "3"), ("AARON_ID", "4")):
+    os.environ.setdefault(key, value)
+
+
+class Stats:
+    def __init__(self):
+        self.start = 0.0
+        self.raid_start = None
+        self.raid_events = 0
+        self.raid_events_at_first_ban = None
+
+        self.bans = {}
+        self.mutes = {}
+        self.reports = Counter()
+        self.freezes = 0
+        self.db_calls = Counter()
+        self.handler_times = {"on_member_join": [], "on_message": []}
+        self.loop_lag = []
+        self.errors = 0
+
+    def now(self) -> float:
+        return time.perf_counter() - self.start
+
+
+stats = Stats()
+
+
+class FakeChannel:
+    def __init__(self, id: int):
+        self.id = id
+        self.name = f"channel-{id}"
+        self.mention = f"<#{id}>"
+        self.sent = 0
+
+    async def send(self, *args, **kwargs):
+        await asyncio.sleep(api_latency)
+        self.sent += 1
+
+    def overwrites_for(self, target):
+        import discord
+        return discord.PermissionOverwrite()
+
+    async def set_permissions(self, target, **kwargs):
+        await asyncio.sleep(api_latency)
+
+
+class FakeMember:
+    def __init__(self, guild: "FakeGuild", id: int, created_at: datetime, joined_at: datetime, raider: bool, bot: bool = False):
+        self.guild = guild
+        self.id = id
+        self.name = f"{'raider' if raider else 'member'}{id}"
+        self.discriminator = "0001"
+        self.created_at = created_at
+        self.joined_at = joined_at
+        self.raider = raider
+        self.bot = bot
+        self._roles = ()
+        self.display_avatar = "https://cdn.discordapp.com/embed/avatars/0.png"
+        self.mention = f"<@{id}>"
+
+    def __str__(self):
+        return f"{self.name}#{self.discriminator}"
+
+    def __eq__(self, other):
+        return isinstance(other, FakeMember) and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    async def send(self, *args, **kwargs):
+        await asyncio.sleep(api_latency)
+
+    async def ban(self, reason=None):
+        await self.guild.ban(self, reason=reason)
+
+    async def timeout(self, until=None, reason=None):
+        await asyncio.sleep(api_latency)
+        stats.mutes[self.id] = self.raider
+
+
+class FakeGuild:
+    def __init__(self, id: int):
+        self.id = id
+        self.name = "Replay guild"
+        self.owner_id = 0
+        self.members = {}
+        self.raiders = set()
+        self.channels = {}
+        self.default_role = FakeRole(id)
+
+    def get_member(self, id: int):
+        return self.members.get(id)
+
+    def get_channel(self, id: int):
+        if id is None:
+            return None
+        if id not in self.channels:
+            self.channels[id] = FakeChannel(id)
+        return self.channels[id]
+
+    def get_role(self, id: int):
+        return FakeRole(id)
+
+    async def ban(self, user, reason=None):
+        await asyncio.sleep(api_latency)
+        raider = user.id in self.raiders
+        if user.id not in stats.bans:
+            stats.bans[user.id] = (raider, stats.now())
+            if raider and stats.raid_events_at_first_ban is None:
+                stats.raid_events_at_first_ban = stats.raid_events
+        self.members.pop(user.id, None)
+
+
+class FakeRole:
+    def __init__(self, id: int):
+        self.id = id
+        self.mention = f"<@&{id}>"
+
+
+class FakeMessage:
+    _next_id = 1
+
+    def __init__(self, author: FakeMember, content: str, mentions: list, role_mentions: list):
+        self.id = FakeMessage._next_id
+        FakeMessage._next_id += 1
+        self.author = author
+        self.guild = author.guild
+        self.channel = author.guild.get_channel(10)
+        self.content = content
+        self.created_at = datetime.now(timezone.utc)
+        self.mentions = mentions
+        self.role_mentions = role_mentions
+        self.raw_role_mentions = [role.id for role in role_mentions]
+        self.jump_url = f"https://discord.com/channels/{self.guild.id}/{self.channel.id}/{self.id}"
+
+    async def delete(self):
+        await asyncio.sleep(api_latency)
+
+
+class FakeContext:
+    def __init__(self, bot: "FakeBot", message: FakeMessage):
+        self.bot = bot
+        self.message = message
+        self.guild = message.guild
+        self.channel = message.channel
+        self.author = message.author
+        self.me = bot.member
+
+    async def send(self, *args, **kwargs):
+        await self.channel.send(*args, **kwargs)
+
+
+class FakeBanCache:
+    def __init__(self):
+        self.cache = set()
+
+    def is_banned(self, user_id):
+        return user_id in self.cache
+
+    def ban(self, user_id):
+        self.cache.add(user_id)
+
+    def unban(self, user_id):
+        self.cache.discard(user_id)
+
+
+class FakeBot:
+    def __init__(self, guild: FakeGuild):
+        self.guild = guild
+        self.member = FakeMember(guild, BOT_ID, datetime(2020, 1, 1, tzinfo=timezone.utc), datetime(2020, 1, 1, tzinfo=timezone.utc), raider=False, bot=True)
+        self.user = self.member
+        self.ban_cache = FakeBanCache()
+        # only used to schedule unmutes
+        self.tasks = type("Tasks", (), {"schedule_untimeout": lambda *args: None})()
+        self.loop = asyncio.get_running_loop()
+
+    def get_guild(self, id: int):
+        return self.guild if id == self.guild.id else None
+
+    async def get_context(self, message, cls=None):
+        return FakeContext(self, message)
+
+
+def setup_database(db_latency: float) -> None:
+    """Connect mongoengine to mongomock, count every call and give it some latency.
+    mongomock isn't thread-safe, so a lock makes each call atomic, like a single operation on the server is.
+    """
+
+    try:
+        import mongomock
+    except ImportError:
+        sys.exit("raid_replay.py needs mongomock: pip install mongomock")
+
+    lock = threading.RLock()
+    # mongomock's methods call each other, only the outermost call is a call to the database
+    state = threading.local()
+
+    def counted(name, method):
+        def wrapper(*args, **kwargs):
+            depth = getattr(state, "depth", 0)
+            if depth == 0:
+                stats.db_calls[name] += 1
+                if db_latency:
+                    time.sleep(db_latency)
+
+            state.depth = depth + 1
+            try:
+                with lock:
+                    return method(*args, **kwargs)
+            finally:
+                state.depth = depth
+        return wrapper
+
+    for name in DB_METHODS:
+        setattr(mongomock.collection.Collection, name, counted(name, getattr(mongomock.collection.Collection, name)))
+
+    mongoengine.connect("botty", host="mongomock://localhost", alias="default")
+
+
+def seed_guild(guild_id: int) -> None:
+    from data.model.filterword import FilterWord
+    from data.model.guild import Guild
+
+    guild = Guild(_id=guild_id, case_id=1)
+    for i, role in enumerate(["role_memberplus", "role_memberpro", "role_memberedition", "role_genius", "role_moderator", "role_administrator"]):
+        setattr(guild, role, 50 + i)
+    guild.channel_public = 20
+    guild.channel_reports = 21
+    guild.raid_phrases = [FilterWord(word=RAID_PHRASE, bypass=5, notify=True)]
+    guild.save()
+
+
+def generate(scenario: str, raiders: int, duration: float, background: int, background_rate: float, seed: int) -> list:
+    """Events for a synthetic raid, along with background members joining and chatting
+    """
+
+    rng = random.Random(seed)
+    events = []
+
+    # raiders' accounts were all made on the same day, a month ago
+    created = (datetime.now(timezone.utc) - timedelta(days=30)).replace(hour=10, minute=0, second=0, microsecond=0)
+    for i in range(raiders):
+        user = RAIDER_IDS + i
+        start = rng.uniform(0, duration)
+        if scenario == "join":
+            events.append({"t": start, "type": "join", "user": user, "raider": True, "created_at": (created + timedelta(minutes=i)).isoformat()})
+        elif scenario == "spam":
+            # every raider posts the same scam a few times, quickly
+            for j in range(10):
+                events.append({"t": start + j * 0.3, "type": "message", "user": user, "raider": True, "content": "FREE NITRO for everyone, claim it before it's gone"})
+        elif scenario == "ping":
+            events.append({"t": start, "type": "message", "user": user, "raider": True, "content": "look at this", "mentions": 6})
+        elif scenario == "phrase":
+            events.append({"t": start, "type": "message", "user": user, "raider": True, "content": f"free skins at https://{RAID_PHRASE}/claim"})
+        elif scenario == "duplicate":
+            # the raiders joined over the last few hours, so join spam didn't catch them.
+            # every one of them posts the same scam once or twice, each time dressed up a little differently
+            joined = datetime.now(timezone.utc) - timedelta(minutes=rng.uniform(10, 360))
+            for j in range(rng.randint(1, 2)):
+                content = f"<@{BACKGROUND_IDS + rng.randrange(max(background, 1))}> {rng.choice(['Free', 'FREE', 'free'])} nitro for everyone{rng.choice(['!', '!!', ''])} get it at https://nitro-gift.example/claim"
+                events.append({"t": start + j * 2, "type": "message", "user": user, "raider": True, "content": content,
+                               "created_at": created.isoformat(), "joined_at": joined.isoformat()})
+
+    # when the members who join during the raid join, the others were already here
+    joins = {}
+    for i in range(background):
+        user = BACKGROUND_IDS + i
+        if rng.random() < 0.2:
+            # a few legitimate members join during the raid, with accounts from all over the last few years
+            joined = joins[user] = rng.uniform(0, duration)
+            created = datetime.now(timezone.utc) - timedelta(days=rng.randint(60, 2000))
+            events.append({"t": joined, "type": "join", "user": user, "raider": False, "created_at": created.isoformat()})
+
+    if background:
+        t = 0.0
+        while t < duration:
+            t += rng.expovariate(background_rate)
+            user = BACKGROUND_IDS + rng.randrange(background)
+            if joins.get(user, 0.0) > t:
+                # they can't talk before they've joined
+                continue
+            content = f"message {rng.randrange(10**6)}"
+            if scenario == "duplicate" and rng.random() < 0.3:
+                # members, old and new, saying the same thing as each other is normal
+                content = rng.choice(["good morning everyone, how is it going", "is there a jailbreak for iOS 15.4 yet?"])
+            events.append({"t": t, "type": "message", "user": user, "raider": False, "content": content})
+
+    events.sort(key=lambda event: event["t"])
+    return events
+
+
+async def monitor_loop_lag(interval: float = 0.01):
+    while True:
+        before = time.perf_counter()
+        await asyncio.sleep(interval)
+        stats.loop_lag.append(time.perf_counter() - before - interval)
+
+
+async def replay(events: list, settle: float) -> None:
+    from cogs.monitors.antiraid import AntiRaidMonitor
+    import cogs.monitors.antiraid as antiraid
+    from utils.config import cfg
+    from utils.message_pipeline import MessagePipeline
+
+    guild = FakeGuild(cfg.guild_id)
+    bot = FakeBot(guild)
+    guild.members[BOT_ID] = bot.member
+    cog = AntiRaidMonitor(bot)
+    pipeline = MessagePipeline()
+    pipeline.add_cog(cog)
+
+    # reports wait for a moderator to act on them, so they're only counted
+    def report(kind):
+        async def record(*args, **kwargs):
+            stats.reports[kind] += 1
+        return record
+
+    antiraid.report_raid = report("raid")
+    antiraid.report_spam = report("spam")
+    antiraid.report_raid_phrase = report("raid phrase")
+
+    freeze_server = cog.freeze_server
+
+    async def count_freezes(*args, **kwargs):
+        stats.freezes += 1
+        await freeze_server(*args, **kwargs)
+
+    cog.freeze_server = count_freezes
+
+    def get_member(event: dict) -> FakeMember:
+        member = guild.members.get(event["user"])
+        if member is None:
+            now = datetime.now(timezone.utc)
+            created = datetime.fromisoformat(event["created_at"]) if event.get("created_at") else now - timedelta(days=730)
+            if event.get("joined_at"):
+                joined = datetime.fromisoformat(event["joined_at"])
+            else:
+                joined = now if event["type"] == "join" else now - timedelta(days=365)
+            member = FakeMember(guild, event["user"], created, joined, raider=event.get("raider", False))
+            guild.members[member.id] = member
+        if member.raider:
+            guild.raiders.add(member.id)
+        return member
+
+    async def handle(event: dict) -> None:
+        start = time.perf_counter()
+        try:
+            if event["type"] == "join":
+                name = "on_member_join"
+                await cog.on_member_join(get_member(event))
+            else:
+                name = "on_message"
+                author = get_member(event)
+                if author.id in stats.bans:
+                    # banned members can't talk
+                    return
+                others = [member for member in guild.members.values() if member.id != author.id][:event.get("mentions", 0)]
+                roles = [FakeRole(60 + i) for i in range(event.get("role_mentions", 0))]
+                await pipeline.dispatch(FakeMessage(author, event.get("content", ""), others, roles))
+        except Exception:
+            stats.errors += 1
+            raise
+        stats.handler_times[name].append(time.perf_counter() - start)
+
+    lag_monitor = asyncio.create_task(monitor_loop_lag())
+    tasks = []
+    stats.start = time.perf_counter()
+    for event in events:
+        delay = event["t"] - stats.now()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if event.get("raider"):
+            stats.raid_events += 1
+            if stats.raid_start is None:
+                stats.raid_start = stats.now()
+        # like the gateway, every event gets its own task
+        tasks.append(asyncio.create_task(handle(event)))
+
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await asyncio.sleep(settle)
+    lag_monitor.cancel()
+
+
+def percentile(values: list, p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def summarize(events: list) -> dict:
+    raiders = {event["user"] for event in events if event.get("raider")}
+    raid_bans = sorted(at for raider, at in stats.bans.values() if raider)
+
+    summary = {
+        "events": dict(Counter(event["type"] for event in events)),
+        "raiders": len(raiders),
+        "raiders_banned": len(raid_bans),
+        "innocents_banned": sum(1 for raider, _ in stats.bans.values() if not raider),
+        "raiders_muted": sum(1 for raider in stats.mutes.values() if raider),
+        "innocents_muted": sum(1 for raider in stats.mutes.values() if not raider),
+        "detection_latency": raid_bans[0] - stats.raid_start if raid_bans else None,
+        "raid_events_before_detection": stats.raid_events_at_first_ban,
+        "last_raider_banned_after": raid_bans[-1] - stats.raid_start if raid_bans else None,
+        "reports": dict(stats.reports),
+        "freezes": stats.freezes,
+        "db_calls": sum(stats.db_calls.values()),
+        "db_calls_by_method": dict(stats.db_calls),
+        "handler_ms": {
+            name: {"calls": len(times), "avg": sum(times) / len(times) * 1000 if times else 0.0, "p99": percentile(times, 0.99) * 1000, "max": max(times, default=0.0) * 1000}
+            for name, times in stats.handler_times.items()
+        },
+        "loop_lag_ms": {"p50": percentile(stats.loop_lag, 0.5) * 1000, "p99": percentile(stats.loop_lag, 0.99) * 1000, "max": max(stats.loop_lag, default=0.0) * 1000},
+        "errors": stats.errors,
+    }
+    return summary
+
+
+def print_summary(summary: dict) -> None:
+    def seconds(value):
+        return f"{value:.2f}s"
+
+    print(f"Events:             {', '.join(f'{count} {kind}s' for kind, count in summary['events'].items())}")
+    if summary["detection_latency"] is None:
+        print("Detection latency:  no raider was banned")
+    else:
+        print(f"Detection latency:  first raider banned {seconds(summary['detection_latency'])} after the raid started "
+              f"({summary['raid_events_before_detection']} raid events in), last one after {seconds(summary['last_raider_banned_after'])}")
+    print(f"Bans:               {summary['raiders_banned']}/{summary['raiders']} raiders, {summary['innocents_banned']} innocent members")
+    print(f"Mutes:              {summary['raiders_muted']} raiders, {summary['innocents_muted']} innocent members")
+    print(f"Reports:            {', '.join(f'{kind} {count}' for kind, count in summary['reports'].items()) or 'none'}; froze the server {summary['freezes']} time(s)")
+    print(f"Database calls:     {summary['db_calls']} ({', '.join(f'{method} {count}' for method, count in sorted(summary['db_calls_by_method'].items()))})")
+    for name, times in summary["handler_ms"].items():
+        print(f"{name + ':':<20}{times['calls']} calls, avg {times['avg']:.2f}ms, p99 {times['p99']:.2f}ms, max {times['max']:.2f}ms")
+    lag = summary["loop_lag_ms"]
+    print(f"Event loop lag:     p50 {lag['p50']:.2f}ms, p99 {lag['p99']:.2f}ms, max {lag['max']:.2f}ms")
+    if summary["errors"]:
+        print(f"Errors:             {summary['errors']} events raised, see the log")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a raid against the antiraid monitor, offline.")
+    parser.add_argument("scenario", nargs="?", choices=SCENARIOS, default="join", help="synthetic raid to replay (default: join)")
+    parser.add_argument("--file", help="replay a recorded JSON lines file instead of a scenario")
+    parser.add_argument("--record", help="save the events of the scenario to this file")
+    parser.add_argument("--raiders", type=int, default=50, help="raider accounts (default: 50)")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds the raid lasts (default: 5)")
+    parser.add_argument("--background", type=int, default=20, help="legitimate members chatting meanwhile (default: 20)")
+    parser.add_argument("--background-rate", type=float, default=5.0, help="their messages per second (default: 5)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--api-latency", type=float, default=0.05, help="seconds each fake Discord call takes (default: 0.05)")
+    parser.add_argument("--db-latency", type=float, default=0.002, help="seconds each database call takes (default: 0.002)")
+    parser.add_argument("--settle", type=float, default=3.0, help="seconds to wait for bans after the last event (default: 3)")
+    parser.add_argument("--output", help="also save the results to this file, as JSON")
+    args = parser.parse_args()
+
+    global api_latency
+    api_latency = args.api_latency
+
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            events = sorted((json.loads(line) for line in f if line.strip()), key=lambda event: event["t"])
+    else:
+        events = generate(args.scenario, args.raiders, args.duration, args.background, args.background_rate, args.seed)
+
+    if args.record:
+        with open(args.record, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(event) + "\n" for event in events)
+
+    # the bot's logger parses the command line when it's imported. nothing should be posted to the logging webhook
+    sys.argv = [sys.argv[0], "--disable-webhook-logging"]
+
+    setup_database(args.db_latency)
+    # the permissions framework reads the guild from the database as soon as it's imported,
+    # so it has to be set up before anything from the bot is imported
+    seed_guild(int(os.environ["MAIN_GUILD_ID"]))
+
+    asyncio.run(replay(events, args.settle))
+    summary = summarize(events)
+    print_summary(summary)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+
+api_latency = 0.05
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import argparse
+import random
+import time
+
+from discord.ext import commands
+from expiringdict import ExpiringDict
+
+from utils.sliding_window import SlidingWindow
+
+"""
+Compares the antiraid detectors before and after SlidingWindow, on synthetic streams of joins and
+messages with timestamps 1/rate apart (10k events/s by default). "before" is what AntiRaidMonitor
+used to do: a CooldownMapping for the count, plus an ExpiringDict of at most 100 members to know
+who to ban. "after" is a SlidingWindow with the same limits. Only the detectors are measured,
+nothing is banned, and neither Discord nor the database is involved.
+
+    python3 sliding_window_bench.py --events 200000 --rate 10000
+"""
+
+MODES = ["before", "after"]
+GUILD_ID = 1
+
+
+class FakeGuild:
+    id = GUILD_ID
+
+
+class FakeMessage:
+    """What CooldownMapping's guild and member buckets read from a message or member
+    """
+
+    guild = FakeGuild()
+
+    def __init__(self, id: int):
+        self.id = id
+        self.author = self
+
+
+def stream(events: int, users: int, rate: float, rng: random.Random) -> list:
+    start = time.time()
+    return [(start + i / rate, rng.randrange(users)) for i in range(events)]
+
+
+def joins_before(events: list) -> dict:
+    # more than 10 joins in 8 seconds, per guild
+    mapping = commands.CooldownMapping.from_cooldown(rate=10, per=8, type=commands.BucketType.guild)
+    joined = ExpiringDict(max_len=100, max_age_seconds=10)
+    trips = most = 0
+    for now, user in events:
+        member = FakeMessage(user)
+        joined[user] = member
+        if mapping.get_bucket(member, now).update_rate_limit(now):
+            trips += 1
+            users = [joined.get(key) for key in list(joined.keys())]
+            most = max(most, len(users))
+    return {"trips": trips, "most_members_per_trip": most}
+
+
+def joins_after(events: list) -> dict:
+    window = SlidingWindow(rate=10, per=8)
+    trips = most = 0
+    for now, user in events:
+        if window.hit(GUILD_ID, FakeMessage(user), now=now):
+            trips += 1
+            users = window.members(GUILD_ID, now=now)
+            window.discard(GUILD_ID, users)
+            most = max(most, len(users))
+    return {"trips": trips, "most_members_per_trip": most}
+
+
+def messages_before(events: list) -> dict:
+    # more than 7 messages in 6 seconds, per member
+    mapping = commands.CooldownMapping.from_cooldown(rate=7, per=6.0, type=commands.BucketType.member)
+    trips = 0
+    for now, user in events:
+        if mapping.get_bucket(FakeMessage(user), now).update_rate_limit(now):
+            trips += 1
+    return {"trips": trips, "keys": len(mapping._cache)}
+
+
+def messages_after(events: list) -> dict:
+    window = SlidingWindow(rate=7, per=6.0)
+    trips = 0
+    for now, user in events:
+        if window.hit(user, now=now):
+            trips += 1
+    return {"trips": trips, "keys": len(window)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the antiraid detectors before and after SlidingWindow.")
+    parser.add_argument("--mode", choices=MODES, help="only measure one of them (default: both)")
+    parser.add_argument("--events", type=int, default=200_000, help="events per stream (default: 200,000)")
+    parser.add_argument("--rate", type=float, default=10_000.0, help="events per second of the streams (default: 10,000)")
+    parser.add_argument("--join-users", type=int, default=50_000, help="distinct accounts joining (default: 50,000)")
+    parser.add_argument("--message-users", type=int, default=2_000, help="distinct members sending messages (default: 2,000)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    streams = {
+        "joins": (stream(args.events, args.join_users, args.rate, rng), {"before": joins_before, "after": joins_after}),
+        "messages": (stream(args.events, args.message_users, args.rate, rng), {"before": messages_before, "after": messages_after}),
+    }
+
+    print(f"{args.events} events per stream, {args.events / args.rate:.0f}s of traffic at {args.rate:.0f} events/s")
+    for name, (events, detectors) in streams.items():
+        for mode in [args.mode] if args.mode else MODES:
+            start = time.perf_counter()
+            result = detectors[mode](events)
+            elapsed = time.perf_counter() - start
+            print(f"{name + ' ' + mode + ':':<18}{len(events) / elapsed:>10,.0f} events/s, {elapsed / len(events) * 1e6:.2f}us per event, "
+                  f"{', '.join(f'{key} {value}' for key, value in result.items())}")
+
+
+if __name__ == "__main__":
+    main()
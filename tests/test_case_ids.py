@@ -0,0 +1,81 @@
+import asyncio
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+"""
+Checks that cases created at the same time, from the commands and from a raid ban, never share an ID.
+Uses an in-memory database (`pip install mongomock`), like raid_replay.py.
+
+    python3 -m pytest tests
+    python3 -m tests.test_case_ids
+"""
+
+pytest.importorskip("mongomock")
+
+# the config reads these, and the logger parses the command line, when they're imported
+os.environ.setdefault("MAIN_GUILD_ID", "123")
+os.environ.setdefault("OWNER_ID", "1")
+os.environ.setdefault("AARON_ID", "1")
+argv, sys.argv = sys.argv, [sys.argv[0], "--disable-webhook-logging"]
+try:
+    from data.model.case import Case
+    from data.model.cases import Cases
+    from data.services.guild_service import async_guild_service, guild_service
+    from data.services.user_service import async_user_service, user_service
+    from raid_replay import seed_guild, setup_database
+finally:
+    sys.argv = argv
+
+THREADS = 16
+CALLS = 100
+
+
+def setup_module():
+    # a small latency gives the threads a chance to interleave
+    setup_database(0.0005)
+    seed_guild(int(os.environ["MAIN_GUILD_ID"]))
+
+
+def make_case(reason: str) -> Case:
+    return Case(_type="WARN", mod_id=1, mod_tag="mod#0001", reason=reason, punishment="50")
+
+
+def test_allocate_case_ids_from_threads():
+    counts = [1 + i % 5 for i in range(THREADS * CALLS)]
+    with ThreadPoolExecutor(THREADS) as pool:
+        firsts = list(pool.map(guild_service.allocate_case_ids, counts))
+
+    # every call got its own range, and together they leave no gaps
+    ids = [first + i for first, count in zip(firsts, counts) for i in range(count)]
+    assert len(set(ids)) == len(ids)
+    assert sorted(ids) == list(range(min(ids), min(ids) + sum(counts)))
+
+
+def test_concurrent_cases_are_unique():
+    async def create_cases():
+        # single cases from the commands, interleaved with batches reserved by raid bans
+        single = [async_user_service.create_case(1000 + i % 20, make_case(f"single {i}")) for i in range(CALLS)]
+        batches = [async_guild_service.allocate_case_ids(10) for _ in range(CALLS // 10)]
+        results = await asyncio.gather(*single, *batches)
+        return [case._id for case in results[:CALLS]], results[CALLS:]
+
+    case_ids, batch_firsts = asyncio.run(create_cases())
+    batch_ids = [first + i for first in batch_firsts for i in range(10)]
+
+    assert len(set(case_ids)) == len(case_ids)
+    assert not set(case_ids) & set(batch_ids)
+
+    # and they were stored under those ids
+    stored = [case._id for cases in Cases.objects(_id__in=list(range(1000, 1020))) for case in cases.cases]
+    assert sorted(stored) == sorted(case_ids)
+    assert user_service.get_cases(1000).cases
+
+
+if __name__ == "__main__":
+    setup_module()
+    test_allocate_case_ids_from_threads()
+    test_concurrent_cases_are_unique()
+    print("OK")
@@ -0,0 +1,54 @@
+import math
+import random
+
+from utils.levels import level_for_xp, xp_for_level
+
+"""
+Checks that the precomputed level table gives the same levels as the loop the XP monitor used before it.
+
+    python3 -m pytest tests
+    python3 -m tests.test_levels
+"""
+
+# several million XP is well past the most XP anyone has
+MAX_XP = 5_000_000
+
+
+def get_level_loop(current_xp):
+    level = 0
+    xp = 0
+    while xp <= current_xp:
+        xp = xp + 45 * level * (math.floor(level / 10) + 1)
+        level += 1
+    return level
+
+
+def test_level_boundaries():
+    # the level only changes at the thresholds, so check each side of every one of them
+    level = 1
+    while xp_for_level(level) <= MAX_XP:
+        threshold = xp_for_level(level)
+        for xp in (threshold - 1, threshold, threshold + 1):
+            assert level_for_xp(xp) == get_level_loop(xp), xp
+        level += 1
+
+
+def test_levels_match_loop():
+    for xp in range(0, 100_000):
+        assert level_for_xp(xp) == get_level_loop(xp), xp
+
+    rng = random.Random(0)
+    for xp in (rng.randrange(MAX_XP) for _ in range(20_000)):
+        assert level_for_xp(xp) == get_level_loop(xp), xp
+
+
+def test_table_grows_past_its_size():
+    xp = 10 ** 12
+    assert level_for_xp(xp) == get_level_loop(xp)
+
+
+if __name__ == "__main__":
+    test_level_boundaries()
+    test_levels_match_loop()
+    test_table_grows_past_its_size()
+    print("OK")
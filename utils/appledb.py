@@ -0,0 +1,304 @@
+import asyncio
+import json
+import os
+import time
+import traceback
+from itertools import groupby
+from typing import Dict, List, Optional, Tuple
+
+from utils.http_session import http_sessions
+from utils.logger import logger
+from utils.search_index import PrefixIndex, SubstringIndex
+
+"""
+The appledb data (iOS versions, devices, jailbreaks and bypasses) behind the ios.cfw commands and autocompleters.
+It's a large download, so callers are never made to wait for it once we have any copy of the data:
+stale data is returned straight away and refreshed in the background. The refresh is a conditional request
+(If-None-Match / If-Modified-Since), so most of them are an empty 304. The last good copy is saved to disk,
+so after a restart the data is available before the first refresh has finished.
+
+Along with the data, the store keeps an AppleDBIndex of it for the autocompleters, rebuilt whenever the data changes.
+"""
+
+APPLEDB_URL = "https://api.appledb.dev/main.json"
+APPLEDB_SNAPSHOT_PATH = "appledb/main.json"
+# how long data is considered fresh before it's refreshed in the background
+MAX_AGE = 3600
+# wait this long before trying again after a failed refresh
+RETRY_AFTER = 300
+
+
+def sort_versions(version):
+    v = version.split(' ')
+    v[0] = list(map(int, v[1].split('.')))
+    return v
+
+
+def transform_groups(groups):
+    final_groups = []
+    groups = [g for _, g in groups.items()]
+    for group in groups:
+        if group.get("subgroup") is not None:
+            for subgroup in group.get("subgroup"):
+                subgroup["order"] = group.get("order")
+                final_groups.append(subgroup)
+        else:
+            final_groups.append(group)
+
+    return final_groups
+
+
+def _version_key(version):
+    try:
+        return sort_versions(version)
+    except (ValueError, IndexError):
+        # sorts after every version that can be parsed
+        return [[], version]
+
+
+class AppleDBIndex:
+    """What the autocompleters search, sorted the way they show it, so that a keystroke
+    is a lookup rather than a pass over all of main.json
+    """
+
+    def __init__(self, data: dict):
+        versions = [v for _, v in data.get("ios", {}).items()]
+        by_release = sorted(versions, key=lambda x: x.get("released") or "1970-01-01", reverse=True)
+        self.ios_versions = SubstringIndex([v for v in by_release if not v['beta']], keys=lambda v: (v['version'], v['build']))
+        self.ios_betas = SubstringIndex([v for v in by_release if v['beta']], keys=lambda v: (v['version'], v['build']))
+
+        groups = transform_groups(data.get("group", {}))
+        # grouped by type, then newest first within each type
+        devices = []
+        for _, group in groupby(sorted(groups, key=lambda x: x.get('type') or "zzz"), lambda x: x.get('type')):
+            group = list(group)
+            group.sort(key=lambda x: x.get('order'), reverse=True)
+            devices.extend(group)
+
+        self.devices = SubstringIndex(devices, keys=lambda d: [d.get('name'), *d.get('devices')])
+        self.jailbreakable_devices = SubstringIndex([d for d in devices if d.get('type') not in ["TV", "Watch"]], keys=lambda d: [d.get('name'), *d.get('devices')])
+
+        # lowercased device name or identifier -> the first group with that name or identifier
+        self.device_groups: Dict[str, dict] = {}
+        for group in groups:
+            for key in [group.get('name'), *group.get('devices')]:
+                self.device_groups.setdefault(key.lower(), group)
+
+        # device identifier -> ("iOS 15.4", "15.4") for every version that supports it, newest first.
+        # built in main.json's order so that versions that sort the same (iOS and iPadOS 15.4) keep their order
+        self.device_versions: Dict[str, List[Tuple[str, str]]] = {}
+        for version in versions:
+            entry = (f'{version.get("osStr")} {version.get("version")}', version.get("version").lower())
+            for device in version.get('devices'):
+                self.device_versions.setdefault(device, []).append(entry)
+        for entries in self.device_versions.values():
+            entries.sort(key=lambda entry: _version_key(entry[0]), reverse=True)
+
+        self.jailbreaks = PrefixIndex([jb for _, jb in data.get("jailbreak", {}).items()], key=lambda jb: jb["name"])
+        bypasses = [b.get("name") for _, b in data.get("bypass", {}).items()]
+        bypasses.sort(key=lambda x: x.lower())
+        self.bypasses = SubstringIndex(bypasses, keys=lambda name: (name,))
+
+    def versions_for_device(self, device: str, query: str, limit: int = 25) -> List[str]:
+        """Versions that support a device, newest first
+
+        Parameters
+        ----------
+        device : str
+            Name or identifier of the device
+        query : str
+            Only versions containing this
+        limit : int, optional
+            Most versions to return, by default 25
+        """
+
+        group = self.device_groups.get(device.lower())
+        if group is None:
+            return []
+
+        query = query.lower()
+        results = []
+        for label, version in self.device_versions.get(group.get("devices")[0], []):
+            if query in version:
+                results.append(label)
+                if len(results) == limit:
+                    break
+        return results
+
+
+class AppleDBStore:
+    def __init__(self, url: Optional[str] = APPLEDB_URL, path: Optional[str] = APPLEDB_SNAPSHOT_PATH, max_age: float = MAX_AGE):
+        """
+        Parameters
+        ----------
+        url : Optional[str], optional
+            Where to download the data from, by default APPLEDB_URL. If None, the store only ever
+            serves the snapshot at `path`, which is handy for working offline against a saved main.json.
+        path : Optional[str], optional
+            Where the last good copy is saved, by default APPLEDB_SNAPSHOT_PATH. If None, nothing is saved.
+        max_age : float, optional
+            Seconds before the data is refreshed, by default MAX_AGE
+        """
+
+        self.url = url
+        self.path = path
+        self.max_age = max_age
+
+        self.data: Optional[dict] = None
+        self.index: Optional[AppleDBIndex] = None
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        # when the data was last confirmed to be current, as a unix timestamp
+        self.checked_at = 0.0
+
+        self._loaded_snapshot = False
+        self._next_attempt = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._load_lock = asyncio.Lock()
+
+    @property
+    def stale(self) -> bool:
+        return time.time() - self.checked_at > self.max_age
+
+    async def get(self) -> Optional[dict]:
+        """The appledb data. Only waits for a download if there's no copy at all yet.
+
+        Returns
+        -------
+        Optional[dict]
+            main.json, or None if it has never been loaded
+        """
+
+        if self.data is None:
+            async with self._load_lock:
+                if self.data is None:
+                    await self.load_snapshot()
+                if self.data is None:
+                    await self.refresh()
+
+        if self.data is not None and self.stale:
+            self.refresh_in_background()
+
+        return self.data
+
+    async def get_index(self) -> Optional[AppleDBIndex]:
+        """The search index over the data, see `get`
+        """
+
+        await self.get()
+        return self.index
+
+    def refresh_in_background(self) -> None:
+        if self.url is None or time.time() < self._next_attempt:
+            return
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+
+        self._refresh_task = asyncio.get_running_loop().create_task(self.refresh())
+
+    async def load_snapshot(self) -> bool:
+        """Load the copy saved on disk, once
+
+        Returns
+        -------
+        bool
+            Whether there was a usable snapshot
+        """
+
+        if self._loaded_snapshot or self.path is None:
+            return False
+        self._loaded_snapshot = True
+
+        try:
+            snapshot = await asyncio.to_thread(self._read_snapshot)
+            # a plain main.json (a test fixture, for example) has no metadata around it
+            if "data" not in snapshot:
+                snapshot = {"data": snapshot}
+            index = await asyncio.to_thread(AppleDBIndex, snapshot["data"])
+        except FileNotFoundError:
+            return False
+        except Exception:
+            logger.error(f"Failed to load appledb snapshot: {traceback.format_exc()}")
+            return False
+
+        self.data = snapshot["data"]
+        self.index = index
+        self.etag = snapshot.get("etag")
+        self.last_modified = snapshot.get("last_modified")
+        self.checked_at = snapshot.get("checked_at", 0.0)
+        logger.info(f"Loaded appledb snapshot from {self.path}")
+        return True
+
+    async def refresh(self) -> bool:
+        """Download the data if it changed since we last got it
+
+        Returns
+        -------
+        bool
+            Whether the data changed
+        """
+
+        if self.url is None:
+            return False
+
+        headers = {}
+        if self.data is not None:
+            if self.etag is not None:
+                headers["If-None-Match"] = self.etag
+            if self.last_modified is not None:
+                headers["If-Modified-Since"] = self.last_modified
+
+        try:
+            async with http_sessions.session.get(self.url, headers=headers) as resp:
+                if resp.status == 304:
+                    self.checked_at = time.time()
+                    return False
+                resp.raise_for_status()
+
+                body = await resp.read()
+                etag = resp.headers.get("ETag")
+                last_modified = resp.headers.get("Last-Modified")
+
+            # a few MB of JSON takes long enough to parse and index that it shouldn't happen on the event loop
+            data = await asyncio.to_thread(json.loads, body)
+            index = await asyncio.to_thread(AppleDBIndex, data)
+        except Exception:
+            self._next_attempt = time.time() + RETRY_AFTER
+            logger.error(f"Failed to refresh appledb, serving the last good copy: {traceback.format_exc()}")
+            return False
+
+        self.data = data
+        self.index = index
+        self.etag = etag
+        self.last_modified = last_modified
+        self.checked_at = time.time()
+
+        if self.path is not None:
+            try:
+                await asyncio.to_thread(self._write_snapshot)
+            except OSError:
+                logger.error(f"Failed to save appledb snapshot: {traceback.format_exc()}")
+        return True
+
+    def _read_snapshot(self) -> dict:
+        with open(self.path, mode="r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_snapshot(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        snapshot = {
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "checked_at": self.checked_at,
+            "data": self.data,
+        }
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, mode="w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        os.replace(temp_path, self.path)
+
+
+appledb = AppleDBStore()
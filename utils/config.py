@@ -1,6 +1,6 @@
 import os
 from dotenv.main import load_dotenv
-from utils.logger import logger
+from utils.logger import logger, webhook_handler
 
 
 class Config:
@@ -44,7 +44,7 @@ class Config:
             self.ban_appeal_mod_role = int(
                 os.environ.get("BAN_APPEAL_MOD_ROLE"))
 
-        if os.environ.get("LOGGING_WEBHOOK_URL") is not None:
+        if webhook_handler is not None:
             logger.info("Discord webhook logging is ENABLED!")
         else:
             logger.info("Discord webhook logging is DISABLED!")
@@ -61,6 +61,16 @@ class Config:
 
         self.dev = os.environ.get("DEV") is not None
 
+        # how long (in seconds) a cached copy of the Guild document may be served
+        # before it is re-read from the database
+        self.guild_cache_ttl = float(os.environ.get("GUILD_CACHE_TTL") or 30)
+        # requires MongoDB to be running as a replica set
+        self.guild_cache_watch = os.environ.get("GUILD_CACHE_WATCH") == "True"
+
+        # workers for CPU-bound jobs, see utils/cpu_pool.py
+        self.cpu_pool_processes = int(os.environ.get("CPU_POOL_PROCESSES") or 2)
+        self.cpu_pool_threads = int(os.environ.get("CPU_POOL_THREADS") or 4)
+
         logger.info(
             f"Bloo will be running in: {self.guild_id} in \033[1m{'DEVELOPMENT' if self.dev else 'PRODUCTION'}\033[0m mode")
         logger.info(f"Bot owned by: {self.owner_id}")
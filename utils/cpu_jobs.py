@@ -0,0 +1,20 @@
+import base64
+import io
+
+from PIL import Image
+
+"""
+Jobs for the CPU pool's worker processes. The workers import this module to run them, so keep
+it small: only import what the jobs themselves need, and nothing that touches the bot, the
+database or the config.
+"""
+
+
+def emoji_to_png(emoji_file: str) -> bytes:
+    """Convert a base64 encoded emoji image to PNG
+    """
+
+    im = Image.open(io.BytesIO(base64.b64decode(emoji_file)))
+    image_container = io.BytesIO()
+    im.save(image_container, 'png')
+    return image_container.getvalue()
@@ -0,0 +1,122 @@
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Optional
+
+from utils.logger import logger
+
+"""
+Somewhere to run CPU-bound work so that it doesn't hold up the event loop (and with it the gateway heartbeat).
+
+Heavy, self-contained jobs (image processing and the like) go to a process pool, so they don't compete
+with the bot for the GIL. Their function and arguments must be picklable, so put them in utils/cpu_jobs.py
+as functions that take and return plain data. Light jobs, and jobs that need the bot's in-memory state,
+go to a thread pool.
+"""
+
+DEFAULT_TIMEOUT = 30
+# the worker processes are started by a fork server that has already imported these
+WORKER_PRELOAD = ["utils.cpu_jobs"]
+
+
+class PoolStats:
+    def __init__(self, workers: int):
+        self.workers = workers
+        # jobs submitted that haven't finished yet, queued or running
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+
+    @property
+    def queued(self) -> int:
+        """Jobs waiting for a free worker
+        """
+
+        return max(self.in_flight - self.workers, 0)
+
+
+class CPUPool:
+    def __init__(self, processes: int, threads: int):
+        """Create the pools. Worker processes and threads are only started once there's work for them.
+
+        Parameters
+        ----------
+        processes : int
+            Number of worker processes for heavy jobs
+        threads : int
+            Number of worker threads for light jobs
+        """
+
+        # forking the bot itself isn't safe, since its other threads (the database pools, the scheduler...)
+        # could be holding locks that would never be released in the child. workers are forked from a
+        # single-threaded fork server instead, which only imports WORKER_PRELOAD. main.py names itself
+        # __main__ so the workers don't import it too.
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(WORKER_PRELOAD)
+        self.process_pool = ProcessPoolExecutor(max_workers=processes, mp_context=context)
+        self.thread_pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="cpu")
+        self.stats: Dict[str, PoolStats] = {
+            "process": PoolStats(processes),
+            "thread": PoolStats(threads),
+        }
+
+    async def run(self, func, *args, timeout: Optional[float] = DEFAULT_TIMEOUT, **kwargs):
+        """Run a heavy job in the process pool and wait for its result.
+
+        Parameters
+        ----------
+        func : Callable
+            The function to run. It, its arguments and its result must be picklable.
+        timeout : Optional[float], optional
+            How long to wait for the result, by default DEFAULT_TIMEOUT
+
+        Returns
+        -------
+        Any
+            Whatever `func` returns
+
+        Raises
+        ------
+        asyncio.TimeoutError
+            The job took longer than `timeout`
+        """
+
+        return await self._submit("process", self.process_pool, func, args, kwargs, timeout)
+
+    async def run_light(self, func, *args, timeout: Optional[float] = DEFAULT_TIMEOUT, **kwargs):
+        """Run a light job in the thread pool and wait for its result.
+        See `run` for the parameters.
+        """
+
+        return await self._submit("thread", self.thread_pool, func, args, kwargs, timeout)
+
+    async def _submit(self, name: str, executor: Executor, func, args, kwargs, timeout: Optional[float]):
+        stats = self.stats[name]
+        stats.in_flight += 1
+        stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+        if stats.queued:
+            logger.debug(f"{stats.queued} jobs waiting for the CPU {name} pool")
+
+        future = executor.submit(functools.partial(func, *args, **kwargs))
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            stats.timed_out += 1
+            # this only helps if the job hadn't started yet, running jobs can't be stopped
+            future.cancel()
+            raise
+        except Exception:
+            stats.failed += 1
+            raise
+        else:
+            stats.completed += 1
+            return result
+        finally:
+            stats.in_flight -= 1
+
+    def shutdown(self) -> None:
+        self.process_pool.shutdown(wait=False, cancel_futures=True)
+        self.thread_pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,110 @@
+import time
+from types import SimpleNamespace
+from typing import Dict, Optional
+
+import aiohttp
+
+"""
+One long-lived aiohttp session for all outbound HTTP, so that connections (and their TLS handshakes)
+are reused between requests instead of being thrown away with a new session every time.
+Use it like a normal session:
+
+    async with http_sessions.session.get(url, headers=...) as resp:
+        ...
+
+Headers that used to be set on a per-call session (API tokens and the like) are passed per request instead.
+"""
+
+# connections kept open per host, so one slow API can't hog the whole pool
+LIMIT_PER_HOST = 10
+LIMIT = 100
+DNS_CACHE_TTL = 300
+KEEPALIVE_TIMEOUT = 60
+TIMEOUT = aiohttp.ClientTimeout(total=60, connect=10)
+
+
+class HostStats:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        # requests that got a connection from the pool instead of opening a new one
+        self.reused_connections = 0
+        self.new_connections = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    @property
+    def average_time(self) -> float:
+        return self.total_time / self.requests if self.requests else 0.0
+
+
+class HTTPSessions:
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.stats: Dict[str, HostStats] = {}
+
+        self._trace_config = aiohttp.TraceConfig()
+        self._trace_config.on_request_start.append(self._on_request_start)
+        self._trace_config.on_connection_create_end.append(self._on_connection_create_end)
+        self._trace_config.on_connection_reuseconn.append(self._on_connection_reuseconn)
+        self._trace_config.on_request_end.append(self._on_request_end)
+        self._trace_config.on_request_exception.append(self._on_request_exception)
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """The shared session, created the first time it's needed. It must be used from the bot's event loop.
+        """
+
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=LIMIT,
+                limit_per_host=LIMIT_PER_HOST,
+                use_dns_cache=True,
+                ttl_dns_cache=DNS_CACHE_TTL,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=TIMEOUT, trace_configs=[self._trace_config])
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _host_stats(self, url) -> HostStats:
+        host = url.host or ""
+        stats = self.stats.get(host)
+        if stats is None:
+            stats = self.stats[host] = HostStats()
+        return stats
+
+    async def _on_request_start(self, _, context: SimpleNamespace, params: aiohttp.TraceRequestStartParams) -> None:
+        context.start = time.perf_counter()
+        context.reused = None
+
+    async def _on_connection_create_end(self, _, context: SimpleNamespace, params) -> None:
+        context.reused = False
+
+    async def _on_connection_reuseconn(self, _, context: SimpleNamespace, params) -> None:
+        context.reused = True
+
+    async def _on_request_end(self, _, context: SimpleNamespace, params: aiohttp.TraceRequestEndParams) -> None:
+        stats = self._record(context, params.url)
+        if context.reused:
+            stats.reused_connections += 1
+        elif context.reused is False:
+            stats.new_connections += 1
+
+    async def _on_request_exception(self, _, context: SimpleNamespace, params: aiohttp.TraceRequestExceptionParams) -> None:
+        self._record(context, params.url).errors += 1
+
+    def _record(self, context: SimpleNamespace, url) -> HostStats:
+        elapsed = time.perf_counter() - context.start
+        stats = self._host_stats(url)
+        stats.requests += 1
+        stats.total_time += elapsed
+        stats.max_time = max(stats.max_time, elapsed)
+        return stats
+
+
+http_sessions = HTTPSessions()
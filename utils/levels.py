@@ -0,0 +1,61 @@
+from bisect import bisect_right
+from typing import List
+
+"""
+XP thresholds for each level. The XP needed to get from level `n` to level `n + 1`
+is 45 * n * (floor(n / 10) + 1). Rather than walking that curve on every message,
+we precompute the cumulative thresholds once and look levels up with a binary search.
+"""
+
+# level 1000 needs over a billion XP; the table is extended if anyone gets that far
+LEVEL_TABLE_SIZE = 1000
+
+_thresholds: List[int] = [0]
+
+
+def _extend_table(level: int) -> None:
+    xp = _thresholds[-1]
+    for _level in range(len(_thresholds) - 1, level):
+        xp = xp + 45 * _level * (_level // 10 + 1)
+        _thresholds.append(xp)
+
+
+_extend_table(LEVEL_TABLE_SIZE)
+
+
+def xp_for_level(level: int) -> int:
+    """Returns the total amount of XP needed for a level
+
+    Parameters
+    ----------
+    level : int
+        The level to look up
+
+    Returns
+    -------
+    int
+        The XP threshold for that level
+    """
+
+    if level >= len(_thresholds):
+        _extend_table(level)
+    return _thresholds[level]
+
+
+def level_for_xp(xp: int) -> int:
+    """Returns the level that a user with `xp` XP should be
+
+    Parameters
+    ----------
+    xp : int
+        The user's total XP
+
+    Returns
+    -------
+    int
+        The user's level
+    """
+
+    while xp >= _thresholds[-1]:
+        _extend_table(len(_thresholds) * 2)
+    return bisect_right(_thresholds, xp)
@@ -3,10 +3,14 @@ import os
 import argparse
 import logging
 import sys
-import aiohttp
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from typing import List, Optional
 from dotenv.main import load_dotenv
-import discord
-import asyncio
 
 load_dotenv()
 
@@ -64,12 +68,35 @@ class Formatter(logging.Formatter):
 
 
 class WebhookLogger(logging.Handler):
-    def __init__(self):
+    """Sends log records to a Discord webhook. emit only queues the record, so it's safe to log from
+    any thread (APScheduler runs jobs on a thread pool) and never waits on the network. A background thread
+    sends whatever has queued up every FLUSH_INTERVAL seconds, packed into as few messages as possible.
+    """
+
+    FLUSH_INTERVAL = 2
+    # webhooks are limited to 5 requests every 2 seconds, leave some room for retries
+    MAX_MESSAGES_PER_FLUSH = 4
+    # once this many chunks are waiting, new records are dropped (and counted) instead
+    MAX_PENDING = 1000
+    MAX_LENGTH = 1950
+
+    def __init__(self, webhook_url: str):
         self.level = logging.INFO
         super().__init__(self.level)
-        self.webhook_url = os.environ.get("LOGGING_WEBHOOK_URL")
+        self.webhook_url = webhook_url
         self.record_formatter = logging.Formatter()
-        
+
+        # (chunk of a record wrapped in its code block, whether to ping the owner)
+        self.pending = deque()
+        self.sent = 0
+        self.dropped = 0
+        self.failed = 0
+        self._dropped_reported = 0
+
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="webhook-logger", daemon=True)
+        self._thread.start()
+
     def prefixcalc(self, levelname: str):
         if levelname == 'DEBUG':
             return '```bash#| '
@@ -93,37 +120,99 @@ class WebhookLogger(logging.Handler):
             return '```'
 
     def emit(self, record: logging.LogRecord):
-        self.send(self.record_formatter.format(record), record)
-            
-    def send(self, formatted, record):
-        if self.webhook_url is None:
+        # called with the handler's lock held
+        if self._stopping.is_set():
             return
 
+        formatted = self.record_formatter.format(record)
         parts = [formatted[i:i+1900] for i in range(0, len(formatted), 1900)]
+        if len(self.pending) + len(parts) > self.MAX_PENDING:
+            self.dropped += 1
+            return
+
+        mention = record.levelname == 'ERROR' or record.levelname == 'CRITICAL'
         for i, part in enumerate(parts):
             content = f"{self.prefixcalc(record.levelname)}{part}{self.suffixcalc(record.levelname)}"
-            if i == len(parts) - 1:
-                if record.levelname == 'ERROR' or record.levelname == 'CRITICAL':
-                    content += f'<@{os.environ.get("OWNER_ID")}>'
-            message_body = {
-                "content": content
-            }
+            self.pending.append((content, mention and i == len(parts) - 1))
 
-            try:
-                loop = asyncio.get_event_loop()
-                asyncio.ensure_future(post_content(self.webhook_url, message_body))
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                loop.run_until_complete(post_content(self.webhook_url, message_body))
-
-async def post_content(webhook_url, message_body):
-    async with aiohttp.ClientSession() as session:
-        the_webhook: discord.Webhook = discord.Webhook.from_url(webhook_url, session=session)
+    def flush(self):
+        """Send everything that's queued, ignoring the rate limit. Used on shutdown.
+        """
+
+        while self.pending or self.dropped != self._dropped_reported:
+            self._send_pending(limit=None)
+
+    def close(self):
+        self._stopping.set()
+        self._thread.join(timeout=5)
+        self.flush()
+        super().close()
+
+    def _run(self):
+        while not self._stopping.wait(self.FLUSH_INTERVAL):
+            self._send_pending(limit=self.MAX_MESSAGES_PER_FLUSH)
+
+    def _send_pending(self, limit: Optional[int]):
+        for content in self._take_messages(limit):
+            if self._post(content):
+                self.sent += 1
+            else:
+                self.failed += 1
+
+    def _take_messages(self, limit: Optional[int]) -> List[str]:
+        messages = []
+        self.acquire()
+        try:
+            dropped = self.dropped - self._dropped_reported
+            self._dropped_reported = self.dropped
+            if dropped:
+                self.pending.appendleft((f"{self.prefixcalc('WARNING')}{dropped} log records were dropped because the webhook couldn't keep up{self.suffixcalc('WARNING')}", False))
+
+            chunks, length, mention = [], 0, False
+            while self.pending and (limit is None or len(messages) < limit):
+                content, chunk_mention = self.pending[0]
+                if chunks and length + len(content) + 1 > self.MAX_LENGTH:
+                    messages.append(self._join(chunks, mention))
+                    chunks, length, mention = [], 0, False
+                    continue
+
+                self.pending.popleft()
+                chunks.append(content)
+                length += len(content) + 1
+                mention = mention or chunk_mention
+
+            if chunks:
+                messages.append(self._join(chunks, mention))
+        finally:
+            self.release()
+        return messages
+
+    def _join(self, chunks: List[str], mention: bool) -> str:
+        content = "\n".join(chunks)
+        if mention:
+            content += f'<@{os.environ.get("OWNER_ID")}>'
+        return content
+
+    def _post(self, content: str, retries: int = 2) -> bool:
+        request = urllib.request.Request(
+            self.webhook_url,
+            data=json.dumps({"content": content}).encode(),
+            headers={"Content-Type": "application/json", "User-Agent": "DiscordBot (Bloo, 1.0)"},
+        )
         try:
-            await the_webhook.send(**message_body)
+            with urllib.request.urlopen(request, timeout=10):
+                return True
+        except urllib.error.HTTPError as e:
+            if e.code != 429 or not retries:
+                return False
+            try:
+                retry_after = float(json.loads(e.read()).get("retry_after", 1))
+            except (ValueError, AttributeError):
+                retry_after = 1
+            time.sleep(min(retry_after, 10))
+            return self._post(content, retries - 1)
         except Exception:
-            pass
+            return False
 
 class Logger:
     def __init__(self):
@@ -136,22 +225,33 @@ class Logger:
 
         self.HNDLR = logging.StreamHandler(sys.stdout)
         self.HNDLR.formatter = Formatter()
+        # one handler for all the loggers, so their records are batched together.
+        # .env.example sets the URL to an empty string, which means there isn't one
+        webhook_url = os.environ.get("LOGGING_WEBHOOK_URL")
+        self.webhook_handler = None
+        if webhook_url and not args.disable_webhook_logging:
+            self.webhook_handler = WebhookLogger(webhook_url)
+
         if not args.disable_discord_logs:
             discord_logger = logging.getLogger('discord')
             discord_logger.setLevel(logging.INFO)
             discord_logger.addHandler(self.HNDLR)
-            if not args.disable_webhook_logging:
-                discord_logger.addHandler(WebhookLogger())
+            if self.webhook_handler is not None:
+                discord_logger.addHandler(self.webhook_handler)
         if not args.disable_scheduler_logs:
             ap_logger = logging.getLogger('apscheduler')
             ap_logger.setLevel(logging.INFO)
             ap_logger.addHandler(self.HNDLR)
-            if not args.disable_webhook_logging:
-                ap_logger.addHandler(WebhookLogger())
+            if self.webhook_handler is not None:
+                ap_logger.addHandler(self.webhook_handler)
         self.logger = logging.Logger(__name__)
         self.logger.setLevel(logging.INFO)
         self.logger.addHandler(self.HNDLR)
-        if not args.disable_webhook_logging:
-            self.logger.addHandler(WebhookLogger())
-        
-logger = Logger().logger
\ No newline at end of file
+        if self.webhook_handler is not None:
+            self.logger.addHandler(self.webhook_handler)
+
+
+_logger = Logger()
+logger = _logger.logger
+# None if webhook logging is off
+webhook_handler: Optional[WebhookLogger] = _logger.webhook_handler
\ No newline at end of file
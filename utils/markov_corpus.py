@@ -0,0 +1,212 @@
+import json
+import os
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+
+from utils.logger import logger
+
+"""
+The chat history that the Markov commands learn from. Messages are kept in memory in the order
+they were sent, and every change is appended to a log file so that the corpus survives restarts:
+
+    {"id": 123, "text": "hello"}    a message was added
+    {"id": 123}                     a message was deleted (a tombstone)
+
+Adding and deleting are O(1) and never rewrite the file. Once the log holds more dead records
+(deleted or evicted messages) than the corpus size, it is compacted by rewriting only the live messages.
+"""
+
+MARKOV_CORPUS_PATH = "markov/corpus.jsonl"
+# the corpus used to be a plain text file with one message per line
+LEGACY_CORPUS_PATH = "bloo_ai.txt"
+MARKOV_CORPUS_SIZE = 50_000
+
+
+class MarkovCorpus:
+    def __init__(self, path: str = MARKOV_CORPUS_PATH, max_size: int = MARKOV_CORPUS_SIZE, legacy_path: Optional[str] = LEGACY_CORPUS_PATH):
+        """Load the corpus from disk.
+
+        Parameters
+        ----------
+        path : str, optional
+            Where the log is stored, by default MARKOV_CORPUS_PATH
+        max_size : int, optional
+            How many messages to keep. Once the corpus is full, the oldest message is dropped
+            for every new one, by default MARKOV_CORPUS_SIZE
+        legacy_path : Optional[str], optional
+            Plain text corpus to import if there is no log yet, by default LEGACY_CORPUS_PATH
+        """
+
+        self.path = path
+        self.max_size = max_size
+        # message ID -> text, oldest first
+        self._messages = OrderedDict()
+        # records in the log that are no longer part of the corpus
+        self._dead_records = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if os.path.exists(path):
+            self._replay()
+        elif legacy_path is not None and os.path.exists(legacy_path):
+            self._import_legacy(legacy_path)
+
+        if self._dead_records > self.max_size:
+            self.compact()
+
+        self._file = open(self.path, mode="a", encoding="utf-8")
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def __contains__(self, message_id: int) -> bool:
+        return message_id in self._messages
+
+    def texts(self) -> List[str]:
+        """All messages in the corpus, oldest first
+        """
+
+        return list(self._messages.values())
+
+    def items(self) -> List[Tuple[int, str]]:
+        """All (message ID, text) pairs in the corpus, oldest first
+        """
+
+        return list(self._messages.items())
+
+    def add(self, message_id: int, text: str) -> Optional[int]:
+        """Add a message to the corpus, dropping the oldest one if it's full.
+
+        Parameters
+        ----------
+        message_id : int
+            ID of the message, used to delete it later
+        text : str
+            Content of the message
+
+        Returns
+        -------
+        Optional[int]
+            ID of the message that was dropped to make room, if any
+        """
+
+        if message_id in self._messages:
+            return None
+
+        evicted = self._append(message_id, text)
+        self._write({"id": message_id, "text": text})
+        return evicted
+
+    def remove(self, message_id: int) -> bool:
+        """Delete a message from the corpus.
+
+        Parameters
+        ----------
+        message_id : int
+            ID of the message to delete
+
+        Returns
+        -------
+        bool
+            Whether the message was in the corpus
+        """
+
+        return self.remove_many([message_id]) > 0
+
+    def remove_many(self, message_ids: Iterable[int]) -> int:
+        """Delete several messages from the corpus.
+
+        Parameters
+        ----------
+        message_ids : Iterable[int]
+            IDs of the messages to delete
+
+        Returns
+        -------
+        int
+            How many of them were in the corpus
+        """
+
+        tombstones = []
+        for message_id in message_ids:
+            if self._messages.pop(message_id, None) is not None:
+                tombstones.append({"id": message_id})
+
+        if tombstones:
+            # both the message's record and its tombstone are dead now
+            self._dead_records += 2 * len(tombstones)
+            self._write(*tombstones)
+        return len(tombstones)
+
+    def compact(self) -> None:
+        """Rewrite the log so that it only contains the messages currently in the corpus
+        """
+
+        file = getattr(self, "_file", None)
+        if file is not None:
+            file.close()
+
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, mode="w", encoding="utf-8") as f:
+            for message_id, text in self._messages.items():
+                f.write(json.dumps({"id": message_id, "text": text}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        # replacing the file is atomic, so a crash leaves either the old log or the new one
+        os.replace(temp_path, self.path)
+        self._dead_records = 0
+
+        if file is not None:
+            self._file = open(self.path, mode="a", encoding="utf-8")
+
+    def close(self) -> None:
+        self._file.close()
+
+    def _append(self, message_id: int, text: str) -> Optional[int]:
+        self._messages[message_id] = text
+        if len(self._messages) > self.max_size:
+            evicted, _ = self._messages.popitem(last=False)
+            self._dead_records += 1
+            return evicted
+        return None
+
+    def _write(self, *records: dict) -> None:
+        self._file.write("".join(json.dumps(record) + "\n" for record in records))
+        self._file.flush()
+
+        if self._dead_records > self.max_size:
+            self.compact()
+
+    def _replay(self) -> None:
+        with open(self.path, mode="r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # most likely a write that was cut off when the bot stopped
+                    self._dead_records += 1
+                    continue
+
+                message_id = record.get("id")
+                if "text" in record:
+                    self._append(message_id, record["text"])
+                elif self._messages.pop(message_id, None) is not None:
+                    self._dead_records += 2
+                else:
+                    self._dead_records += 1
+
+        logger.info(f"Loaded {len(self._messages)} messages into the Markov corpus")
+
+    def _import_legacy(self, legacy_path: str) -> None:
+        with open(legacy_path, mode="r", encoding="utf-8") as f:
+            lines = [line for line in f.read().split("\n") if line]
+
+        # we don't know which messages these lines came from, so they can't be deleted,
+        # only aged out. negative IDs can't clash with real message IDs.
+        for i, line in enumerate(lines[-self.max_size:]):
+            self._append(-(i + 1), line)
+
+        self.compact()
+        logger.info(f"Imported {len(self._messages)} messages into the Markov corpus from {legacy_path}")
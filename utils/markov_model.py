@@ -0,0 +1,293 @@
+import bisect
+import os
+import random
+import re
+import threading
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import msgpack
+from fold_to_ascii import fold
+from markovify.chain import BEGIN, END
+from markovify.splitters import split_into_sentences
+
+"""
+A Markov chain over the chat history that is updated one message at a time, rather than rebuilt
+with markovify.Text every time someone wants a sentence. Sentences are split, filtered and
+generated the same way markovify does it, so the output is the same as before.
+"""
+
+MARKOV_MODEL_PATH = "markov/model.msgpack"
+# bump this when the snapshot format changes, older snapshots are then rebuilt from the corpus
+SNAPSHOT_VERSION = 1
+
+# markovify's default: sentences with quotes or brackets look odd when they're cut up
+REJECT_PATTERN = re.compile(r"(^')|('$)|\s'|'\s|[\"(\(\)\[\])]")
+DEFAULT_TRIES = 10
+DEFAULT_MAX_OVERLAP_RATIO = 0.7
+DEFAULT_MAX_OVERLAP_TOTAL = 15
+
+
+def parse_sentences(text: str) -> List[str]:
+    """Split a message into the sentences the model learns from. Each sentence has its words
+    separated by single spaces.
+
+    Parameters
+    ----------
+    text : str
+        Content of the message
+
+    Returns
+    -------
+    List[str]
+        The sentences that passed the filter
+    """
+
+    sentences = []
+    for line in text.split("\n"):
+        for sentence in split_into_sentences(line):
+            if not sentence.strip() or REJECT_PATTERN.search(fold(sentence)):
+                continue
+            sentences.append(" ".join(sentence.split()))
+    return sentences
+
+
+def write_snapshot(path: str, data: bytes) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, mode="wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+class MarkovModel:
+    def __init__(self, state_size: int = 2):
+        self.state_size = state_size
+        # state -> {next word: count}
+        self.transitions: Dict[Tuple[str, ...], Dict[str, int]] = {}
+        # message ID -> the sentences it added, so that they can be taken out again
+        self.messages: Dict[int, Sequence[str]] = {}
+        # bumped on every change, so the owner knows when the model needs saving
+        self.changes = 0
+
+        # state -> (choices, cumulative weights), thrown away when the state changes
+        self._compiled: Dict[Tuple[str, ...], Tuple[List[str], List[int]]] = {}
+        # all sentences joined together, to reject output that copies the chat history,
+        # along with the value of `changes` it was built at
+        self._rejoined_text: Optional[Tuple[int, str]] = None
+        # sentences are generated on a worker thread while the bot keeps adding messages. the lock
+        # is only held while the chain is changed or walked, never while the overlap text is built
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def __contains__(self, message_id: int) -> bool:
+        return message_id in self.messages
+
+    def add(self, message_id: int, text: str) -> None:
+        """Learn from a message
+
+        Parameters
+        ----------
+        message_id : int
+            ID of the message, used to forget it later
+        text : str
+            Content of the message
+        """
+
+        if message_id in self.messages:
+            return
+
+        sentences = parse_sentences(text)
+        with self._lock:
+            self.messages[message_id] = sentences
+            for sentence in sentences:
+                for state, word in self._steps(sentence):
+                    follow = self.transitions.setdefault(state, {})
+                    follow[word] = follow.get(word, 0) + 1
+                    self._compiled.pop(state, None)
+
+            self._changed()
+
+    def remove(self, message_id: int) -> bool:
+        """Forget a message
+
+        Parameters
+        ----------
+        message_id : int
+            ID of the message
+
+        Returns
+        -------
+        bool
+            Whether the model knew about the message
+        """
+
+        with self._lock:
+            sentences = self.messages.pop(message_id, None)
+            if sentences is None:
+                return False
+
+            for sentence in sentences:
+                for state, word in self._steps(sentence):
+                    follow = self.transitions[state]
+                    follow[word] -= 1
+                    if not follow[word]:
+                        del follow[word]
+                        if not follow:
+                            del self.transitions[state]
+                    self._compiled.pop(state, None)
+
+            self._changed()
+            return True
+
+    def sync(self, messages: Iterable[Tuple[int, str]]) -> None:
+        """Add and remove messages so that the model matches the corpus
+
+        Parameters
+        ----------
+        messages : Iterable[Tuple[int, str]]
+            (message ID, content) of every message in the corpus
+        """
+
+        message_ids = set()
+        for message_id, text in messages:
+            message_ids.add(message_id)
+            if message_id not in self.messages:
+                self.add(message_id, text)
+
+        for message_id in [message_id for message_id in self.messages if message_id not in message_ids]:
+            self.remove(message_id)
+
+    def make_sentence(self, tries: int = DEFAULT_TRIES, max_overlap_ratio: float = DEFAULT_MAX_OVERLAP_RATIO, max_overlap_total: int = DEFAULT_MAX_OVERLAP_TOTAL) -> Optional[str]:
+        """Generate a sentence, the same way markovify.Text.make_sentence does
+
+        Parameters
+        ----------
+        tries : int, optional
+            How many sentences to try before giving up, by default 10
+        max_overlap_ratio : float, optional
+            Reject sentences that copy more than this share of their words from a single place
+            in the chat history, by default 0.7
+        max_overlap_total : int, optional
+            Reject sentences that copy more than this many words from a single place
+            in the chat history, by default 15
+
+        Returns
+        -------
+        Optional[str]
+            The sentence, or None if no good sentence was made
+        """
+
+        for _ in range(tries):
+            with self._lock:
+                if not self.transitions:
+                    return None
+                words = self._walk()
+
+            if self._test_output(words, max_overlap_ratio, max_overlap_total):
+                return " ".join(words)
+        return None
+
+    def dumps(self) -> bytes:
+        with self._lock:
+            # states are tuples, which msgpack stores as arrays
+            return msgpack.packb({
+                "version": SNAPSHOT_VERSION,
+                "state_size": self.state_size,
+                "messages": self.messages,
+                "transitions": self.transitions,
+            })
+
+    @classmethod
+    def loads(cls, data: bytes) -> Optional["MarkovModel"]:
+        """Restore a model from a snapshot made with `dumps`
+
+        Returns
+        -------
+        Optional[MarkovModel]
+            The model, or None if the snapshot is from an older version
+        """
+
+        # use_list=False gives us the states back as tuples, so they can be used as keys again
+        snapshot = msgpack.unpackb(data, use_list=False, strict_map_key=False)
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            return None
+
+        model = cls(snapshot["state_size"])
+        model.messages = snapshot["messages"]
+        model.transitions = snapshot["transitions"]
+        return model
+
+    def save(self, path: str = MARKOV_MODEL_PATH) -> None:
+        write_snapshot(path, self.dumps())
+
+    @classmethod
+    def load(cls, path: str = MARKOV_MODEL_PATH, state_size: int = 2) -> "MarkovModel":
+        """Load the model saved at `path`, or start an empty one if there isn't a usable snapshot
+        """
+
+        try:
+            with open(path, mode="rb") as f:
+                model = cls.loads(f.read())
+        except (OSError, ValueError, KeyError, TypeError, msgpack.UnpackException):
+            model = None
+
+        if model is None or model.state_size != state_size:
+            return cls(state_size)
+        return model
+
+    def _steps(self, sentence: str):
+        items = [BEGIN] * self.state_size + sentence.split(" ") + [END]
+        for i in range(len(items) - self.state_size):
+            yield tuple(items[i:i + self.state_size]), items[i + self.state_size]
+
+    def _changed(self) -> None:
+        self.changes += 1
+
+    def _walk(self) -> List[str]:
+        words = []
+        state = (BEGIN,) * self.state_size
+        while True:
+            compiled = self._compiled.get(state)
+            if compiled is None:
+                follow = self.transitions[state]
+                compiled = self._compiled[state] = (list(follow.keys()), list(accumulate(follow.values())))
+
+            choices, cumdist = compiled
+            word = choices[bisect.bisect(cumdist, random.random() * cumdist[-1])]
+            if word == END:
+                return words
+
+            words.append(word)
+            state = state[1:] + (word,)
+
+    def _get_rejoined_text(self) -> str:
+        with self._lock:
+            rejoined = self._rejoined_text
+            changes = self.changes
+            if rejoined is not None and rejoined[0] == changes:
+                return rejoined[1]
+            # the sentence lists themselves are never changed, so a copy of the references is enough
+            messages = list(self.messages.values())
+
+        text = " ".join(sentence for sentences in messages for sentence in sentences)
+        with self._lock:
+            # another thread may have built a newer one meanwhile
+            if self._rejoined_text is None or self._rejoined_text[0] < changes:
+                self._rejoined_text = (changes, text)
+        return text
+
+    def _test_output(self, words: List[str], max_overlap_ratio: float, max_overlap_total: int) -> bool:
+        rejoined_text = self._get_rejoined_text()
+
+        overlap_max = min(max_overlap_total, round(max_overlap_ratio * len(words)))
+        overlap_over = overlap_max + 1
+        for i in range(max(len(words) - overlap_max, 1)):
+            if " ".join(words[i:i + overlap_over]) in rejoined_text:
+                return False
+        return True
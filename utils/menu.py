@@ -1,10 +1,10 @@
 import json
 
-import aiohttp
 import discord
 from aiocache.decorators import cached
 
 from utils.context import BlooContext, PromptData
+from utils.http_session import http_sessions
 from utils.permissions.permissions import permissions
 from utils.views.menu import Menu
 
@@ -153,10 +153,10 @@ async def get_jailbreaks_jba():
         "Apps"
     """
     res_apps = []
-    async with aiohttp.ClientSession() as session:
-        async with session.get("https://jailbreaks.app/json/apps.json") as resp:
-            if resp.status == 200:
-                res_apps = await resp.json()
+    session = http_sessions.session
+    async with session.get("https://jailbreaks.app/json/apps.json") as resp:
+        if resp.status == 200:
+            res_apps = await resp.json()
     return res_apps
 
 
@@ -164,11 +164,11 @@ async def get_jailbreaks_jba():
 async def get_signed_status():
     """Gets Jailbreaks.app's signed status"""
     signed = []
-    async with aiohttp.ClientSession() as session:
-        async with session.get("https://jailbreaks.app/status.php") as resp:
-            if resp.status == 200:
-                res = await resp.text()
-                signed = json.loads(res)
+    session = http_sessions.session
+    async with session.get("https://jailbreaks.app/status.php") as resp:
+        if resp.status == 200:
+            res = await resp.text()
+            signed = json.loads(res)
     return signed
 
 
@@ -0,0 +1,207 @@
+import asyncio
+import time
+import traceback
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import discord
+from data.model.guild import Guild
+from data.services.guild_service import async_guild_service
+from utils.config import cfg
+from utils.logger import logger
+from utils.permissions.permissions import permissions
+
+"""
+Every message in the main guild goes through one pipeline instead of a listener per cog.
+Cogs mark methods as stages with `message_stage`. Stages are grouped by priority.
+The groups run in order, and the stages within a group run concurrently.
+If any stage in a group returns True, the message was consumed (for example the filter deleted it),
+and the later groups don't see it. Slow side effects, like reporting a message to the mods, should be
+passed to `MessageContext.defer` so that they don't hold up the later groups.
+"""
+
+# deferred side effects that are still running. the event loop only keeps weak references to tasks
+_background_tasks: Set[asyncio.Task] = set()
+
+
+class StagePriority:
+    # filters and anything else that has to see every message before it can be deleted
+    MODERATION = 0
+    # everything that reacts to a message: xp, markov, link previews...
+    FEATURES = 10
+
+
+class MessageContext:
+    """What the stages need to know about a message, resolved once before any stage runs
+    """
+
+    def __init__(self, message: discord.Message, db_guild: Guild, level: int):
+        self.message = message
+        self.db_guild = db_guild
+        # the permission level of the author
+        self.level = level
+
+    def defer(self, *coros: Awaitable) -> None:
+        """Run side effects of handling the message in the background, one after the other,
+        instead of making the rest of the pipeline wait for them
+
+        Parameters
+        ----------
+        *coros : Awaitable
+            The coroutines to run, in order
+        """
+
+        task = asyncio.get_running_loop().create_task(_run_deferred(coros))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+
+async def _run_deferred(coros: Tuple[Awaitable, ...]) -> None:
+    for coro in coros:
+        try:
+            await coro
+        except Exception:
+            logger.error(f"Deferred message side effect failed: {traceback.format_exc()}")
+
+
+StageCallback = Callable[[discord.Message, MessageContext], Awaitable[Optional[bool]]]
+
+
+class Stage:
+    def __init__(self, name: str, callback: StageCallback, priority: int, include_bots: bool):
+        self.name = name
+        self.callback = callback
+        self.priority = priority
+        self.include_bots = include_bots
+
+        self.calls = 0
+        self.consumed = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def record(self, elapsed: float) -> None:
+        self.calls += 1
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+
+    @property
+    def average_time(self) -> float:
+        return self.total_time / self.calls if self.calls else 0.0
+
+
+def message_stage(priority: int = StagePriority.FEATURES, *, include_bots: bool = False):
+    """Marks a cog method as a message pipeline stage. The method is called with the message
+    and its MessageContext, and should return True if it consumed the message.
+
+    Parameters
+    ----------
+    priority : int, optional
+        Which group the stage runs in, by default StagePriority.FEATURES
+    include_bots : bool, optional
+        Whether the stage also gets messages sent by bots and webhooks, by default False
+    """
+
+    def decorator(func):
+        func.__message_stage__ = (priority, include_bots)
+        return func
+
+    return decorator
+
+
+class MessagePipeline:
+    def __init__(self):
+        self.stages: Dict[str, Stage] = {}
+        # stages grouped by priority, in the order the groups run
+        self._groups: List[Tuple[int, List[Stage]]] = []
+
+        self.messages = 0
+        self.consumed = 0
+
+    def register(self, name: str, callback: StageCallback, priority: int = StagePriority.FEATURES, include_bots: bool = False) -> None:
+        """Add a stage to the pipeline. A stage with the same name is replaced.
+
+        Parameters
+        ----------
+        name : str
+            Name of the stage, shown in the metrics
+        callback : StageCallback
+            Coroutine called with the message and its MessageContext
+        priority : int, optional
+            Which group the stage runs in, by default StagePriority.FEATURES
+        include_bots : bool, optional
+            Whether the stage also gets messages sent by bots, by default False
+        """
+
+        self.stages[name] = Stage(name, callback, priority, include_bots)
+        self._regroup()
+
+    def unregister(self, name: str) -> None:
+        if self.stages.pop(name, None) is not None:
+            self._regroup()
+
+    def add_cog(self, cog) -> None:
+        """Register every method of `cog` marked with `message_stage`
+        """
+
+        for name, method in self._cog_stages(cog):
+            priority, include_bots = method.__message_stage__
+            self.register(name, method, priority, include_bots)
+
+    def remove_cog(self, cog) -> None:
+        for name, _ in self._cog_stages(cog):
+            self.unregister(name)
+
+    def _cog_stages(self, cog):
+        for attr in dir(type(cog)):
+            method = getattr(cog, attr, None)
+            if hasattr(method, "__message_stage__"):
+                yield f"{cog.qualified_name}.{attr}", method
+
+    def _regroup(self) -> None:
+        groups = {}
+        for stage in self.stages.values():
+            groups.setdefault(stage.priority, []).append(stage)
+        self._groups = sorted(groups.items(), key=lambda group: group[0])
+
+    async def dispatch(self, message: discord.Message) -> None:
+        """Run a message through the pipeline. This is the bot's on_message listener.
+        """
+
+        if message.guild is None or message.guild.id != cfg.guild_id:
+            return
+
+        self.messages += 1
+        db_guild = await async_guild_service.get_guild()
+        context = MessageContext(message, db_guild, permissions.get_level(message.guild, message.author))
+
+        is_bot = message.author.bot
+        for _, stages in self._groups:
+            stages = [stage for stage in stages if stage.include_bots or not is_bot]
+            if not stages:
+                continue
+
+            results = await asyncio.gather(*[self._run_stage(stage, message, context) for stage in stages])
+            if any(results):
+                self.consumed += 1
+                return
+
+    async def _run_stage(self, stage: Stage, message: discord.Message, context: MessageContext) -> bool:
+        start = time.perf_counter()
+        try:
+            consumed = bool(await stage.callback(message, context))
+        except Exception:
+            # one broken stage shouldn't stop the others
+            stage.errors += 1
+            consumed = False
+            logger.error(f"Message stage {stage.name} failed: {traceback.format_exc()}")
+
+        stage.record(time.perf_counter() - start)
+        if consumed:
+            stage.consumed += 1
+        return consumed
+
+    def metrics(self) -> List[Stage]:
+        """The stages in the order they run, with their timings
+        """
+
+        return [stage for _, stages in self._groups for stage in stages]
@@ -1,11 +1,11 @@
 import asyncio
 import json
 
-import aiohttp
 import discord
-from data.services.guild_service import guild_service
+from data.services.guild_service import async_guild_service
 
 from utils.config import cfg
+from utils.http_session import http_sessions
 from utils.logger import logger
 
 class BanCache:
@@ -59,7 +59,7 @@ async def fetch_issue_cache(bot, cache):
         return
 
     channel = guild.get_channel(
-        guild_service.get_guild().channel_common_issues)
+        (await async_guild_service.get_guild()).channel_common_issues)
     if channel is None:
         logger.warn("#rules-and-info channel not found! The /issue command will not work! Make sure to set `channel_common_issues` in the database if you want it.")
         return
@@ -96,7 +96,7 @@ async def fetch_rule_cache(bot, cache):
         return
 
     channel = guild.get_channel(
-        guild_service.get_guild().channel_rules)
+        (await async_guild_service.get_guild()).channel_rules)
     if channel is None:
         logger.warn("#rules-and-info channel not found! The /rule command will not work! Make sure to set `channel_rules` in the database if you want it.")
         return
@@ -119,17 +119,17 @@ class ScamCache:
 
 
 async def fetch_scam_cache(cache: ScamCache):
-    async with aiohttp.ClientSession() as client:
-        async with client.get("https://raw.githubusercontent.com/SlimShadyIAm/Anti-Scam-Json-List/main/antiscam.json") as resp:
-            if resp.status == 200:
-                obj = json.loads(await resp.text())
-
-                scam_jb_urls = obj.get("scamjburls")
-                if scam_jb_urls is not None:
-                    cache.scam_jb_urls = scam_jb_urls
+    client = http_sessions.session
+    async with client.get("https://raw.githubusercontent.com/SlimShadyIAm/Anti-Scam-Json-List/main/antiscam.json") as resp:
+        if resp.status == 200:
+            obj = json.loads(await resp.text())
+
+            scam_jb_urls = obj.get("scamjburls")
+            if scam_jb_urls is not None:
+                cache.scam_jb_urls = scam_jb_urls
                 
-                scam_unlock_urls = obj.get("scamideviceunlockurls")
-                if scam_unlock_urls is not None:
-                    cache.scam_unlock_urls = scam_unlock_urls
+            scam_unlock_urls = obj.get("scamideviceunlockurls")
+            if scam_unlock_urls is not None:
+                cache.scam_unlock_urls = scam_unlock_urls
 
 scam_cache = ScamCache()
\ No newline at end of file
@@ -1,73 +1,111 @@
 import discord
 import string
+from functools import cached_property, lru_cache
 from typing import List
 from fold_to_ascii import fold
 from data.model.filterword import FilterWord
-from data.services.guild_service import guild_service
+from utils.mod.word_matcher import WordMatcherCache
 from utils.permissions.permissions import permissions
 
-def find_triggered_filters(input, member: discord.Member) -> List[FilterWord]:
+symbols = (u"абвгдеёжзийклмнопрстуфхцчшщъыьэюяАБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ",
+           u"abBrdeex3nnKnmHonpcTyoxu4wwbbbeoRABBrDEEX3NNKNMHONPCTyOXU4WWbbbEOR")
+cyrillic_translation = {ord(a): ord(b) for a, b in zip(*symbols)}
+punctuation_translation = str.maketrans('', '', string.punctuation)
+
+# the word lists are compiled once and only recompiled when they change
+filter_words_matcher = WordMatcherCache(check_without_spaces=True)
+raid_phrases_matcher = WordMatcherCache(check_without_spaces=False)
+
+
+class NormalizedText:
+    """The forms of a piece of text that the filters search through.
+    Each form is only computed the first time it's needed.
     """
-    BAD WORD FILTER
+
+    def __init__(self, text: str):
+        self.text = text
+
+    @cached_property
+    def lowered(self) -> str:
+        return self.text.lower()
+
+    @cached_property
+    def folded(self) -> str:
+        """Lowercased, with Cyrillic lookalikes and accented characters replaced by plain ascii"""
+        return fold(self.text.translate(cyrillic_translation).lower()).lower()
+
+    @cached_property
+    def folded_tokens(self) -> List[str]:
+        return self.folded.split()
+
+    @cached_property
+    def folded_without_spaces(self) -> str:
+        return "".join(self.folded_tokens)
+
+    @cached_property
+    def folded_without_spaces_and_punctuation(self) -> str:
+        return self.folded_without_spaces.translate(punctuation_translation)
+
+
+@lru_cache(maxsize=256)
+def normalize(text: str) -> NormalizedText:
+    """Get the normalized forms of `text`. The same message usually goes through
+    several filters, so recent results are cached and shared between them.
+
+    Parameters
+    ----------
+    text : str
+        The text to normalize, for example a message's content
+
+    Returns
+    -------
+    NormalizedText
+        The normalized text
     """
-    symbols = (u"абвгдеёжзийклмнопрстуфхцчшщъыьэюяАБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ",
-               u"abBrdeex3nnKnmHonpcTyoxu4wwbbbeoRABBrDEEX3NNKNMHONPCTyOXU4WWbbbEOR")
 
-    tr = {ord(a): ord(b) for a, b in zip(*symbols)}
+    return NormalizedText(text)
 
-    input_lowercase = fold(input.translate(tr).lower()).lower()
-    folded_without_spaces = "".join(input_lowercase.split())
-    folded_without_spaces_and_punctuation = folded_without_spaces.translate(
-        str.maketrans('', '', string.punctuation))
 
-    db_guild = guild_service.get_guild()
+def find_triggered_filters(input, member: discord.Member, db_guild) -> List[FilterWord]:
+    """
+    BAD WORD FILTER. `db_guild` is the guild the filter words are taken from,
+    usually the message pipeline's, so checking a message doesn't touch the database.
+    """
+    text = normalize(input)
 
-    if not input_lowercase:
+    if not text.folded:
         return []
     # reported = False
 
+    matcher = filter_words_matcher.get(db_guild.filter_words)
+
     words_found = []
-    for word in db_guild.filter_words:
+    for word in matcher.find(text.folded, text.folded_without_spaces, text.folded_without_spaces_and_punctuation):
         if permissions.has(member.guild, member, word.bypass):
             continue
 
-        filter_word_without_spaces = "".join(word.word.lower().split())
-        if (word.word.lower() in input_lowercase) or \
-            (not word.false_positive and word.word.lower() in folded_without_spaces) or \
-                (not word.false_positive and word.word.lower() in folded_without_spaces_and_punctuation or \
-                    (not word.false_positive and filter_word_without_spaces in folded_without_spaces_and_punctuation)):
-
-            # remove all whitespace, punctuation in message and run filter again
-            if word.false_positive and word.word.lower() not in input_lowercase.split():
-                continue
+        # remove all whitespace, punctuation in message and run filter again
+        if word.false_positive and word.word.lower() not in text.folded_tokens:
+            continue
 
-            if word.notify:
-                return [word]
+        if word.notify:
+            return [word]
 
-            words_found.append(word)
+        words_found.append(word)
     return words_found
 
-def find_triggered_raid_phrases(input, member):
-    symbols = (u"абвгдеёжзийклмнопрстуфхцчшщъыьэюяАБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ",
-        u"abBrdeex3nnKnmHonpcTyoxu4wwbbbeoRABBrDEEX3NNKNMHONPCTyOXU4WWbbbEOR")
-
-    tr = {ord(a): ord(b) for a, b in zip(*symbols)}
+def find_triggered_raid_phrases(input, member, db_guild):
+    text = normalize(input)
 
-    folded_message = fold(input.translate(tr).lower()).lower()
-    folded_without_spaces = "".join(folded_message.split())
-    folded_without_spaces_and_punctuation = folded_without_spaces.translate(str.maketrans('', '', string.punctuation))
-
-    if folded_message:
-        for word in guild_service.get_guild().raid_phrases:
+    if text.folded:
+        matcher = raid_phrases_matcher.get(db_guild.raid_phrases)
+        for word in matcher.find(text.folded, text.folded_without_spaces, text.folded_without_spaces_and_punctuation):
             if not permissions.has(member.guild, member, word.bypass):
-                if (word.word.lower() in folded_message) or \
-                    (not word.false_positive and word.word.lower() in folded_without_spaces) or \
-                    (not word.false_positive and word.word.lower() in folded_without_spaces_and_punctuation):
-                    # remove all whitespace, punctuation in message and run filter again
-                    if word.false_positive and word.word.lower() not in folded_message.split():
-                        continue
-
-                    return word
+                # remove all whitespace, punctuation in message and run filter again
+                if word.false_positive and word.word.lower() not in text.folded_tokens:
+                    continue
+
+                return word
     #                 await self.raid_ban(message.author)
     #                 return True
-    # return False
\ No newline at end of file
+    # return False
@@ -3,8 +3,8 @@ from datetime import datetime, timedelta
 import discord
 import humanize
 from data.model.case import Case
-from data.services.guild_service import guild_service
-from data.services.user_service import user_service
+from data.services.guild_service import async_guild_service
+from data.services.user_service import async_user_service
 from discord.utils import escape_markdown
 from utils.config import cfg
 from utils.context import BlooContext
@@ -39,9 +39,8 @@ async def mute(ctx, member, dur_seconds=None, reason="No reason."):
     else:
         time = now + timedelta(days=14)
 
-    db_guild = guild_service.get_guild()
+    db_guild = await async_guild_service.get_guild()
     case = Case(
-        _id=db_guild.case_id,
         _type="MUTE",
         date=now,
         mod_id=ctx.author.id,
@@ -59,8 +58,7 @@ async def mute(ctx, member, dur_seconds=None, reason="No reason."):
     except Exception:
         return
 
-    guild_service.inc_caseid()
-    user_service.add_case(member.id, case)
+    await async_user_service.create_case(member.id, case)
 
     log = prepare_mute_log(ctx.author, member, case)
     await ctx.send(embed=log, delete_after=10)
@@ -88,7 +86,7 @@ async def unmute(ctx, member, reason: str = "No reason.") -> None:
 
     """
 
-    db_guild = guild_service.get_guild()
+    db_guild = await async_guild_service.get_guild()
 
     try:
         await member.remove_timeout()
@@ -97,15 +95,13 @@ async def unmute(ctx, member, reason: str = "No reason.") -> None:
         pass
 
     case = Case(
-        _id=db_guild.case_id,
         _type="UNMUTE",
         mod_id=ctx.author.id,
         mod_tag=str(ctx.author),
         reason=reason,
     )
 
-    guild_service.inc_caseid()
-    user_service.add_case(member.id, case)
+    await async_user_service.create_case(member.id, case)
 
     log = prepare_unmute_log(ctx.author, member, case)
 
@@ -131,7 +127,7 @@ async def ban(ctx, user, reason="No reason."):
 
     """
 
-    db_guild = guild_service.get_guild()
+    db_guild = await async_guild_service.get_guild()
 
     member_is_external = isinstance(user, discord.User)
 
@@ -154,13 +150,12 @@ async def ban(ctx, user, reason="No reason."):
 
 
 async def warn(ctx, user, points, reason):
-    db_guild = guild_service.get_guild()
+    db_guild = await async_guild_service.get_guild()
 
     reason = escape_markdown(reason)
 
     # prepare the case object for database
     case = Case(
-        _id=db_guild.case_id,
         _type="WARN",
         mod_id=ctx.author.id,
         mod_tag=str(ctx.author),
@@ -168,15 +163,13 @@ async def warn(ctx, user, points, reason):
         punishment=str(points)
     )
 
-    # increment case ID in database for next available case ID
-    guild_service.inc_caseid()
-    # add new case to DB
-    user_service.add_case(user.id, case)
+    # add case to db, which also gives it the next case ID
+    await async_user_service.create_case(user.id, case)
     # add warnpoints to the user in DB
-    user_service.inc_points(user.id, points)
+    await async_user_service.inc_points(user.id, points)
 
     # fetch latest document about user from DB
-    db_user = user_service.get_user(user.id)
+    db_user = await async_user_service.get_user(user.id)
     cur_points = db_user.warn_points
 
     # prepare log embed, send to #public-mod-logs, user, channel where invoked
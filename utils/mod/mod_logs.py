@@ -121,6 +121,47 @@ def prepare_ban_log(author, user, case):
     embed.timestamp = case.date
     return embed
 
+def prepare_mass_ban_log(author, bans, reason):
+    """Prepares one log for a batch of bans
+
+    Parameters
+    ----------
+    author : discord.Member
+        "Mod who banned the members"
+    bans : List[Tuple[discord.Member, Case]]
+        "Members who were banned, with their cases"
+    reason : str
+        "Reason for the bans"
+
+    Returns
+    -------
+    List[discord.Embed]
+        "The log, split into several embeds if it doesn't fit in one"
+    """
+    lines = [f"{user} ({user.mention}) | Case #{case._id}" for user, case in bans]
+    pages = [[]]
+    length = 0
+    for line in lines:
+        # embed descriptions are limited to 4096 characters
+        if pages[-1] and length + len(line) + 1 > 4096:
+            pages.append([])
+            length = 0
+        pages[-1].append(line)
+        length += len(line) + 1
+
+    embeds = []
+    for i, page in enumerate(pages):
+        embed = discord.Embed(description="\n".join(page))
+        embed.color = discord.Color.blue()
+        if i == 0:
+            embed.title = f"{len(bans)} Members Banned"
+            embed.add_field(name="Mod", value=f'{author} ({author.mention})', inline=True)
+            embed.add_field(name="Reason", value=reason, inline=True)
+        embed.set_footer(text=f"Cases #{bans[0][1]._id}-#{bans[-1][1]._id}")
+        embed.timestamp = bans[0][1].date
+        embeds.append(embed)
+    return embeds
+
 def prepare_unban_log(author, user, case):
     """Prepares unban log
     
@@ -3,8 +3,7 @@ import discord
 from typing import Union
 from data.model.case import Case
 from data.model.guild import Guild
-from data.services.guild_service import guild_service
-from data.services.user_service import user_service
+from data.services.user_service import async_user_service
 from utils.context import BlooContext
 from utils.mod.mod_logs import prepare_ban_log, prepare_kick_log
 
@@ -28,17 +27,14 @@ async def add_kick_case(ctx: BlooContext, user, reason, db_guild):
     """
     # prepare case for DB
     case = Case(
-        _id=db_guild.case_id,
         _type="KICK",
         mod_id=ctx.author.id,
         mod_tag=str(ctx.author),
         reason=reason,
     )
 
-    # increment max case ID for next case
-    guild_service.inc_caseid()
-    # add new case to DB
-    user_service.add_case(user.id, case)
+    # add case to db, which also gives it the next case ID
+    await async_user_service.create_case(user.id, case)
 
     return prepare_kick_log(ctx.author, user, case)
 
@@ -96,7 +92,7 @@ async def notify_user_warn(ctx: BlooContext, user: discord.User, db_user, db_gui
         ctx.bot.ban_cache.ban(user.id)
     elif cur_points >= 400 and not db_user.was_warn_kicked and isinstance(user, discord.Member):
         # kick user if >= 400 points and wasn't previously kicked
-        user_service.set_warn_kicked(user.id)
+        await async_user_service.set_warn_kicked(user.id)
 
         dmed = await notify_user(user, f"You were kicked from {ctx.guild.name} for reaching 400 or more points. Please note that you will be banned at 600 points.", log)
         log_kickban = await add_kick_case(ctx, user, "400 or more warn points reached.", db_guild)
@@ -157,7 +153,6 @@ async def add_ban_case(ctx: BlooContext, user: discord.User, reason, db_guild: G
     """
     # prepare the case to store in DB
     case = Case(
-        _id=db_guild.case_id,
         _type="BAN",
         mod_id=ctx.author.id,
         mod_tag=str(ctx.author),
@@ -165,9 +160,7 @@ async def add_ban_case(ctx: BlooContext, user: discord.User, reason, db_guild: G
         reason=reason,
     )
 
-    # increment DB's max case ID for next case
-    guild_service.inc_caseid()
-    # add case to db
-    user_service.add_case(user.id, case)
+    # add case to db, which also gives it the next case ID
+    await async_user_service.create_case(user.id, case)
     # prepare log embed to send to #public-mod-logs, user and context
     return prepare_ban_log(ctx.author, user, case)
@@ -1,8 +1,8 @@
 from typing import Union
 import discord
-from data.services import user_service
-from data.services.guild_service import guild_service
-from data.services.user_service import user_service
+import asyncio
+from data.services.guild_service import async_guild_service
+from data.services.user_service import async_user_service
 from discord.utils import format_dt
 from utils.config import cfg
 from utils.context import BlooOldContext
@@ -25,17 +25,17 @@ async def report(bot: discord.Client, message: discord.Message, word: str, invit
         "Was the filtered word an invite?"
 
     """
-    db_guild = guild_service.get_guild()
+    db_guild = await async_guild_service.get_guild()
     channel = message.guild.get_channel(db_guild.channel_reports)
 
-    ping_string = prepare_ping_string(db_guild, message)
+    ping_string = await prepare_ping_string(db_guild, message)
     view = ReportActions(message.author)
 
     if invite:
-        embed = prepare_embed(message, word, title="Invite filter")
+        embed = await prepare_embed(message, word, title="Invite filter")
         report_msg = await channel.send(f"{ping_string}\nMessage contained invite: {invite}", embed=embed, view=view)
     else:
-        embed = prepare_embed(message, word)
+        embed = await prepare_embed(message, word)
         report_msg = await channel.send(ping_string, embed=embed, view=view)
 
     ctx = await bot.get_context(report_msg)
@@ -54,7 +54,7 @@ async def manual_report(bot: discord.Client, mod: discord.Member, target: Union[
         "The moderator that started this report
 
     """
-    db_guild = guild_service.get_guild()
+    db_guild = await async_guild_service.get_guild()
     channel = target.guild.get_channel(db_guild.channel_reports)
 
     ping_string = f"{mod.mention} reported a member"
@@ -63,7 +63,7 @@ async def manual_report(bot: discord.Client, mod: discord.Member, target: Union[
     else:
         view = ReportActions(target)
 
-    embed = prepare_embed(target, title="A moderator reported a member")
+    embed = await prepare_embed(target, title="A moderator reported a member")
     report_msg = await channel.send(ping_string, embed=embed, view=view)
 
     ctx = await bot.get_context(report_msg)
@@ -85,13 +85,13 @@ async def report_raid_phrase(bot: discord.Client, message: discord.Message, doma
         "Was the filtered word an invite?"
 
     """
-    db_guild = guild_service.get_guild()
+    db_guild = await async_guild_service.get_guild()
     channel = message.guild.get_channel(db_guild.channel_reports)
 
-    ping_string = prepare_ping_string(db_guild, message)
+    ping_string = await prepare_ping_string(db_guild, message)
     view = RaidPhraseReportActions(message.author, domain)
 
-    embed = prepare_embed(
+    embed = await prepare_embed(
         message, domain, title=f"Possible new raid phrase detected\n{domain}")
     report_msg = await channel.send(ping_string, embed=embed, view=view)
 
@@ -100,12 +100,12 @@ async def report_raid_phrase(bot: discord.Client, message: discord.Message, doma
 
 
 async def report_spam(bot, msg, user, title):
-    db_guild = guild_service.get_guild()
+    db_guild = await async_guild_service.get_guild()
     channel = msg.guild.get_channel(db_guild.channel_reports)
-    ping_string = prepare_ping_string(db_guild, msg)
+    ping_string = await prepare_ping_string(db_guild, msg)
 
     view = SpamReportActions(user)
-    embed = prepare_embed(msg, title=title)
+    embed = await prepare_embed(msg, title=title)
 
     report_msg = await channel.send(ping_string, embed=embed, view=view)
 
@@ -123,12 +123,12 @@ async def report_raid(user, msg=None):
     if msg is not None:
         embed.add_field(name="Message", value=msg.content, inline=False)
 
-    db_guild = guild_service.get_guild()
+    db_guild = await async_guild_service.get_guild()
     reports_channel = user.guild.get_channel(db_guild.channel_reports)
     await reports_channel.send(f"<@&{db_guild.role_moderator}>", embed=embed, allowed_mentions=discord.AllowedMentions(roles=True))
 
 
-def prepare_ping_string(db_guild, message):
+async def prepare_ping_string(db_guild, message):
     """Prepares modping string
 
     Parameters
@@ -144,15 +144,18 @@ def prepare_ping_string(db_guild, message):
         return ping_string
     
     role = message.guild.get_role(db_guild.role_moderator)
+    # online moderators are always pinged, so only look up the others' settings
+    offline = [member for member in role.members if member.status != discord.Status.online]
+    db_users = await asyncio.gather(*[async_user_service.get_user(member.id) for member in offline])
+    offline_ping = {member.id for member, db_user in zip(offline, db_users) if db_user.offline_report_ping}
     for member in role.members:
-        offline_ping = (user_service.get_user(member.id)).offline_report_ping
-        if member.status == discord.Status.online or offline_ping:
+        if member.status == discord.Status.online or member.id in offline_ping:
             ping_string += f"{member.mention} "
 
     return ping_string
 
 
-def prepare_embed(target: Union[discord.Message, discord.Member], word: str = None, title="Word filter"):
+async def prepare_embed(target: Union[discord.Message, discord.Member], word: str = None, title="Word filter"):
     """Prepares embed
 
     Parameters
@@ -170,8 +173,7 @@ def prepare_embed(target: Union[discord.Message, discord.Member], word: str = No
     else:
         member = target
 
-    user_info = user_service.get_user(member.id)
-    rd = user_service.rundown(member.id)
+    user_info, rd = await asyncio.gather(async_user_service.get_user(member.id), async_user_service.rundown(member.id))
     rd_text = ""
     for r in rd:
         if r._type == "WARN":
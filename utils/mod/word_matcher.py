@@ -0,0 +1,174 @@
+from collections import deque
+from typing import Hashable, Iterable, List, Set, Tuple
+
+from data.model.filterword import FilterWord
+
+
+class Automaton:
+    """An Aho-Corasick automaton, which finds every occurence of a set of patterns
+    in a piece of text in a single pass, no matter how many patterns there are.
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, Hashable]]):
+        """Compile the automaton.
+
+        Parameters
+        ----------
+        patterns : Iterable[Tuple[str, Hashable]]
+            Pairs of (pattern, value). `search` returns the values of the patterns it finds.
+        """
+
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        # an empty pattern is in every string
+        self._always = set()
+
+        for pattern, value in patterns:
+            if not pattern:
+                self._always.add(value)
+                continue
+
+            node = 0
+            for char in pattern:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                    self._goto[node][char] = next_node
+                node = next_node
+            self._out[node] += (value,)
+
+        # breadth-first, so that a node's fail link is always computed before its children's
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, next_node in self._goto[node].items():
+                queue.append(next_node)
+
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+
+                fail = self._goto[fallback].get(char, 0)
+                self._fail[next_node] = fail
+                self._out[next_node] += self._out[fail]
+
+    def search(self, text: str) -> Set[Hashable]:
+        """Find which patterns occur in `text`
+
+        Parameters
+        ----------
+        text : str
+            The text to search
+
+        Returns
+        -------
+        Set[Hashable]
+            The values of all patterns found in the text
+        """
+
+        found = set(self._always)
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+
+class WordMatcher:
+    """Finds which words of a filter list occur in a message. Matching follows the same
+    rules as the filter always has: every word is checked against the lowercased message,
+    and words that aren't marked as false positives are also checked against the message
+    with whitespace removed, and with whitespace and punctuation removed.
+    """
+
+    def __init__(self, words: List[FilterWord], check_without_spaces: bool):
+        """Compile the word list.
+
+        Parameters
+        ----------
+        words : List[FilterWord]
+            The filter words to look for
+        check_without_spaces : bool
+            Whether to also check for the word with its own whitespace removed
+            in the message with whitespace and punctuation removed
+        """
+
+        self.words = words
+        self.signature = WordMatcher.signature_of(words)
+
+        lowercase = []
+        without_spaces = []
+        without_punctuation = []
+        for i, word in enumerate(words):
+            lowered = word.word.lower()
+            lowercase.append((lowered, i))
+            if word.false_positive:
+                continue
+
+            without_spaces.append((lowered, i))
+            without_punctuation.append((lowered, i))
+            if check_without_spaces:
+                without_punctuation.append(("".join(lowered.split()), i))
+
+        self._lowercase = Automaton(lowercase)
+        self._without_spaces = Automaton(without_spaces)
+        self._without_punctuation = Automaton(without_punctuation)
+
+    @staticmethod
+    def signature_of(words: List[FilterWord]) -> tuple:
+        # everything that affects which words get matched
+        return tuple((word.word, word.false_positive) for word in words)
+
+    def find(self, lowercase: str, without_spaces: str, without_punctuation: str) -> List[FilterWord]:
+        """Find the words that occur in a message
+
+        Parameters
+        ----------
+        lowercase : str
+            The lowercased, ascii-folded message
+        without_spaces : str
+            `lowercase` with all whitespace removed
+        without_punctuation : str
+            `without_spaces` with all punctuation removed
+
+        Returns
+        -------
+        List[FilterWord]
+            The words found, in the order of the word list
+        """
+
+        found = self._lowercase.search(lowercase)
+        found |= self._without_spaces.search(without_spaces)
+        found |= self._without_punctuation.search(without_punctuation)
+        return [self.words[i] for i in sorted(found)]
+
+
+class WordMatcherCache:
+    """Holds the WordMatcher for a word list, and only recompiles it when the word list changes.
+    """
+
+    def __init__(self, check_without_spaces: bool):
+        self.check_without_spaces = check_without_spaces
+        self.matcher = None
+
+    def get(self, words: List[FilterWord]) -> WordMatcher:
+        matcher = self.matcher
+        # we get handed the same list until the guild document is re-read from the database
+        if matcher is not None and matcher.words is words:
+            return matcher
+
+        if matcher is not None and matcher.signature == WordMatcher.signature_of(words):
+            # same words, so only the FilterWord objects we return need to change
+            matcher.words = words
+            return matcher
+
+        self.matcher = WordMatcher(words, self.check_without_spaces)
+        return self.matcher
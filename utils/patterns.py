@@ -0,0 +1,105 @@
+import re
+from functools import cached_property, lru_cache
+from typing import List, Optional
+
+"""
+Precompiled regular expressions used by the monitors, and a cached extraction pass
+so that a message's links, invites and emojis are only searched for once, no matter
+how many listeners need them.
+"""
+
+URL = re.compile(r'(https?://\S+)')
+# looser than URL, matches anything that looks like a scheme
+SCHEME_LINK = re.compile(r'((https|http)?://\S+)')
+WEB_LINK = re.compile(
+    r"(https?:\/\/(www\.)?[-a-zA-Z0-9@:%._\+~#=]{1,256}\.[a-zA-Z0-9()]{1,6}\b([-a-zA-Z0-9()@:%_\+.~#?&//=]*))")
+INVITE = re.compile(r'(?:https?://)?discord(?:(?:app)?\.com/invite|\.gg)\/{1,}[a-zA-Z0-9]+/?', flags=re.S)
+SPOILER = re.compile(r'\|\|(.*?)\|\|', flags=re.S)
+SONG_LINK = re.compile(r"(https://open.spotify.com/track/[A-Za-z0-9]+|https://music.apple.com/[[a-zA-Z][a-zA-Z]]?/album/[a-zA-Z\d%\(\)-]+/[\d]{1,10}\?i=[\d]{1,15})")
+TWEET = re.compile(r"https://twitter\.com/[a-z0-9_]{1,15}/status/[\d+]{15,}")
+SILEO_PACKAGE = re.compile(r"sileo:\/\/package\/([a-zA-Z0-9]+(\.[a-zA-Z0-9]+)+(\.[a-zA-Z0-9]+)+)")
+# user, role and channel mentions
+MENTION = re.compile(r'<(?:@[!&]?|#)\d+>')
+CUSTOM_EMOJI = re.compile(r'<:\d+>|<:.+?:\d+>')
+CUSTOM_EMOJI_ANIMATED = re.compile(r'<a:.+:\d+>|<:.+?:\d+>')
+EMOJI_NAME = re.compile(r"^[a-zA-Z0-9_]*$")
+PRINTABLE_ASCII = re.compile(r'^[\x20-\x7E]*$')
+# [[package name]]
+PACKAGE_SEARCH = re.compile(
+    r".*?(?<!\[)+\[\[((?!\s+)([\w+\ \&\+\-\<\>\#\:\;\%\(\)]){2,})\]\](?!\])+.*")
+
+
+class ExtractedContent:
+    """Links, invites and emojis found in a piece of text.
+    Each one is only searched for the first time it's needed.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+
+    @cached_property
+    def urls(self) -> List[str]:
+        return URL.findall(self.text)
+
+    @property
+    def first_url(self) -> Optional[str]:
+        return self.urls[0] if self.urls else None
+
+    @cached_property
+    def has_link(self) -> bool:
+        return SCHEME_LINK.search(self.text) is not None
+
+    @cached_property
+    def web_link(self) -> Optional[str]:
+        link = WEB_LINK.search(self.text)
+        return link.group(0) if link else None
+
+    @cached_property
+    def invites(self) -> List[str]:
+        return INVITE.findall(self.text)
+
+    @cached_property
+    def has_spoiler(self) -> bool:
+        return SPOILER.search(self.text) is not None
+
+    @cached_property
+    def tweet_link(self) -> Optional[str]:
+        link = TWEET.search(self.text)
+        return link.group(0) if link else None
+
+    @cached_property
+    def song_link(self) -> Optional[str]:
+        link = SONG_LINK.search(self.text)
+        return link.group(0) if link else None
+
+    @cached_property
+    def sileo_package(self) -> Optional[str]:
+        package = SILEO_PACKAGE.search(self.text)
+        return package.group(1) if package else None
+
+    @cached_property
+    def custom_emojis(self) -> List[str]:
+        return CUSTOM_EMOJI.findall(self.text)
+
+    @cached_property
+    def custom_emojis_animated(self) -> List[str]:
+        return CUSTOM_EMOJI_ANIMATED.findall(self.text)
+
+
+@lru_cache(maxsize=256)
+def extract(text: str) -> ExtractedContent:
+    """Get the links, invites and emojis in `text`. Every monitor looks at the same
+    message, so recent results are cached and shared between them.
+
+    Parameters
+    ----------
+    text : str
+        The text to search, for example a message's content
+
+    Returns
+    -------
+    ExtractedContent
+        What was found in the text
+    """
+
+    return ExtractedContent(text)
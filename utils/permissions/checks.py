@@ -1,6 +1,6 @@
 from discord.ext import commands
 
-from data.services.guild_service import guild_service
+from data.services.guild_service import async_guild_service
 from utils.context import BlooContext
 from utils.permissions.permissions import permissions
 
@@ -18,7 +18,7 @@ def always_whisper():
 def whisper():
     """If the user is not a moderator and the invoked channel is not #bot-commands, send the response to the command ephemerally"""
     async def predicate(ctx: BlooContext):
-        if not permissions.has(ctx.guild, ctx.author, 5) and ctx.channel.id != guild_service.get_guild().channel_botspam:
+        if not permissions.has(ctx.guild, ctx.author, 5) and ctx.channel.id != (await async_guild_service.get_guild()).channel_botspam:
             ctx.whisper = True
         else:
             ctx.whisper = False
@@ -28,7 +28,7 @@ def whisper():
 def whisper_in_general():
     """If the user is not a moderator and the invoked channel is #general, send the response to the command ephemerally"""
     async def predicate(ctx: BlooContext):
-        if not permissions.has(ctx.guild, ctx.author, 5) and ctx.channel.id == guild_service.get_guild().channel_general:
+        if not permissions.has(ctx.guild, ctx.author, 5) and ctx.channel.id == (await async_guild_service.get_guild()).channel_general:
             ctx.whisper = True
         else:
             ctx.whisper = False
@@ -78,7 +78,7 @@ def genius_and_up():
 def submod_or_admin_and_up():
     """If the user is not a submod OR is not at least an Administrator, deny command access"""
     async def predicate(ctx: BlooContext):
-        db = guild_service.get_guild()
+        db = await async_guild_service.get_guild()
         submod = ctx.guild.get_role(db.role_sub_mod)
         if not submod:
             return
@@ -93,7 +93,7 @@ def submod_or_admin_and_up():
 def genius_or_submod_and_up():
     """If the user is not at least a Genius™️ or a submod, deny command access"""
     async def predicate(ctx: BlooContext):
-        db = guild_service.get_guild()
+        db = await async_guild_service.get_guild()
         submod = ctx.guild.get_role(db.role_sub_mod)
         if not submod:
             return
@@ -1,7 +1,7 @@
 import discord
 from discord.commands.permissions import CommandPermission
 
-from typing import List
+from typing import Iterable, List
 from data.model.guild import Guild
 from data.services.guild_service import guild_service
 from utils.config import cfg
@@ -61,36 +61,13 @@ class Permissions:
         # This dict maps a permission level to a lambda function which, when given the right paramters,
         # will return True or False if a user has that permission level.
         self._permissions = {
-            0: lambda x, y: True,
-
-            1: (lambda guild, m: self.has(guild, m, 2) or (guild.id == cfg.guild_id
-                and guild.get_role(the_guild.role_memberplus) in m.roles)),
-
-            2: (lambda guild, m: self.has(guild, m, 3) or (guild.id == cfg.guild_id
-                and guild.get_role(the_guild.role_memberpro) in m.roles)),
-
-            3: (lambda guild, m: self.has(guild, m, 4) or (guild.id == cfg.guild_id
-                and guild.get_role(the_guild.role_memberedition) in m.roles)),
-
-            4: (lambda guild, m: self.has(guild, m, 5) or (guild.id == cfg.guild_id
-                and guild.get_role(the_guild.role_genius) in m.roles)),
-
-            5: (lambda guild, m: self.has(guild, m, 6) or (guild.id == cfg.guild_id
-                and guild.get_role(the_guild.role_moderator) in m.roles)),
-
-            6: (lambda guild, m: self.has(guild, m, 7) or (guild.id == cfg.guild_id
-                and guild.get_role(the_guild.role_administrator) in m.roles)),
-
-            7: (lambda guild, m: self.has(guild, m, 9) or (guild.id == cfg.guild_id
-                and m == guild.owner)),
-
-            9: (lambda guild, m: guild.id == cfg.guild_id
-                and m.id == cfg.owner_id),
-
-            10: (lambda guild, m: guild.id == cfg.guild_id
-                 and m.id == cfg.owner_id),
+            level: (lambda guild, m, level=level: self.get_level(guild, m) >= level)
+            for level in [0, 1, 2, 3, 4, 5, 6, 7, 9, 10]
         }
 
+        # caches each member's permission level, along with the roles it was calculated from
+        self._level_cache = {}
+
         self._permission_names = {
             0: "Everyone and up",
             1: "Member Plus and up",
@@ -104,6 +81,82 @@ class Permissions:
             10: "Bot owner",
         }
 
+    def calculate_level(self, guild: discord.Guild, member_id: int, role_ids: Iterable[int]) -> int:
+        """Calculates the permission level of a member from their ID and the IDs of their roles
+
+        Parameters
+        ----------
+        guild : discord.Guild
+            The guild the member is in
+        member_id : int
+            The ID of the member
+        role_ids : Iterable[int]
+            The IDs of the roles the member has
+
+        Returns
+        -------
+        int
+            The highest permission level the member has
+        """
+
+        if guild.id != cfg.guild_id:
+            return 0
+        if member_id == cfg.owner_id:
+            return 10
+        if member_id == guild.owner_id:
+            return 7
+
+        role_ids = set(role_ids)
+        for level in range(6, 0, -1):
+            if self._role_permission_mapping[level] in role_ids:
+                return level
+        return 0
+
+    def get_level(self, guild: discord.Guild, member: discord.Member) -> int:
+        """Returns the permission level of a member. The level is cached until the member's roles change.
+
+        Parameters
+        ----------
+        guild : discord.Guild
+            The guild the member is in
+        member : discord.Member
+            The member whose permission level we want
+
+        Returns
+        -------
+        int
+            The highest permission level the member has
+        """
+
+        if guild.id != cfg.guild_id:
+            return 0
+
+        # Member._roles is the list of the member's role IDs; unlike Member.roles,
+        # it doesn't need to look up and sort all the Role objects.
+        # Users don't have roles at all.
+        role_ids = tuple(getattr(member, "_roles", ()))
+        cached = self._level_cache.get(member.id)
+        if cached is not None and cached[0] == role_ids:
+            return cached[1]
+
+        level = self.calculate_level(guild, member.id, role_ids)
+        self._level_cache[member.id] = (role_ids, level)
+        return level
+
+    def invalidate(self, member_id: int = None) -> None:
+        """Forget the cached permission level of a member, or of everyone if `member_id` is None.
+
+        Parameters
+        ----------
+        member_id : int, optional
+            The ID of the member, by default None
+        """
+
+        if member_id is None:
+            self._level_cache.clear()
+        else:
+            self._level_cache.pop(member_id, None)
+
     def has(self, guild: discord.Guild, member: discord.Member, level: int) -> bool:
         """Checks whether a user given by `member` has at least the permission level `level`
         in guild `guild`. Using the `self.permissions` dict-lambda thing.
@@ -0,0 +1,166 @@
+import threading
+from bisect import bisect_left
+from difflib import get_close_matches
+from typing import Callable, Dict, Generic, Iterable, List, Optional, Sequence, TypeVar
+
+"""
+Indexes for autocompleters that search the same list on every keystroke.
+They are built when the list changes (NameIndex can also be updated, by swapping in a new list),
+so a keystroke is a lookup rather than a pass over the whole list.
+"""
+
+T = TypeVar("T")
+
+
+class SubstringIndex(Generic[T]):
+    """Finds the items that have a key containing the query, like `query.lower() in key.lower()`.
+    Every substring of up to GRAM_SIZE characters of every key is indexed, so a short query
+    is a single lookup, and a longer one only checks the items that contain its rarest trigram.
+    """
+
+    GRAM_SIZE = 3
+
+    def __init__(self, items: Sequence[T], keys: Callable[[T], Iterable[str]]):
+        """
+        Parameters
+        ----------
+        items : Sequence[T]
+            The items, in the order results should be returned in
+        keys : Callable[[T], Iterable[str]]
+            The strings to search for an item
+        """
+
+        self.items = list(items)
+        self._keys = [tuple(key.lower() for key in keys(item)) for item in self.items]
+        # substring -> positions of the items that contain it, in order
+        self._postings: Dict[str, List[int]] = {}
+
+        for position, item_keys in enumerate(self._keys):
+            grams = set()
+            for key in item_keys:
+                for size in range(1, self.GRAM_SIZE + 1):
+                    grams.update(key[i:i + size] for i in range(len(key) - size + 1))
+
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(position)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def search(self, query: str, limit: int = 25) -> List[T]:
+        query = query.lower()
+        if not query:
+            return self.items[:limit]
+
+        if len(query) <= self.GRAM_SIZE:
+            return [self.items[position] for position in self._postings.get(query, [])[:limit]]
+
+        grams = {query[i:i + self.GRAM_SIZE] for i in range(len(query) - self.GRAM_SIZE + 1)}
+        candidates = min((self._postings.get(gram, []) for gram in grams), key=len)
+
+        results = []
+        for position in candidates:
+            if any(query in key for key in self._keys[position]):
+                results.append(self.items[position])
+                if len(results) == limit:
+                    break
+        return results
+
+
+class PrefixIndex(Generic[T]):
+    """Finds the items whose key starts with the query, like `key.lower().startswith(query.lower())`.
+    Items are sorted by their lowercased key.
+    """
+
+    def __init__(self, items: Iterable[T], key: Callable[[T], str]):
+        entries = sorted(((key(item).lower(), item) for item in items), key=lambda entry: entry[0])
+        self._keys = [entry[0] for entry in entries]
+        self.items = [entry[1] for entry in entries]
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def search(self, query: str, limit: int = 25) -> List[T]:
+        query = query.lower()
+        results = []
+        # keys with this prefix are next to each other, starting where the prefix would be inserted
+        for position in range(bisect_left(self._keys, query), len(self._keys)):
+            if not self._keys[position].startswith(query) or len(results) == limit:
+                break
+            results.append(self.items[position])
+        return results
+
+
+class NameIndex:
+    """A sorted set of names that can be searched by rank: the exact name first, then names starting
+    with the query, then names containing it, then names that are close to it (typos).
+    Names are kept lowercase, and can be added and removed as they change.
+
+    Updates come from the database threads while the event loop searches, so the sorted list is
+    never changed in place: an update builds a new one and swaps it in, and a search keeps using
+    the list it started with.
+    """
+
+    FUZZY_CUTOFF = 0.6
+    # shorter queries match too much by accident to be worth a fuzzy search
+    FUZZY_MIN_LENGTH = 3
+
+    def __init__(self, names: Iterable[str] = ()):
+        self._names: List[str] = sorted({name.lower() for name in names})
+        # only one update at a time, so two updates can't each drop the other's name
+        self._update_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name: str) -> bool:
+        return self._find(self._names, name.lower()) is not None
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def add(self, name: str) -> None:
+        name = name.lower()
+        with self._update_lock:
+            names = self._names
+            position = bisect_left(names, name)
+            if position == len(names) or names[position] != name:
+                self._names = names[:position] + [name] + names[position:]
+
+    def remove(self, name: str) -> None:
+        name = name.lower()
+        with self._update_lock:
+            names = self._names
+            position = self._find(names, name)
+            if position is not None:
+                self._names = names[:position] + names[position + 1:]
+
+    @staticmethod
+    def _find(names: List[str], name: str) -> Optional[int]:
+        position = bisect_left(names, name)
+        return position if position < len(names) and names[position] == name else None
+
+    def search(self, query: str, limit: int = 25) -> List[str]:
+        query = query.lower()
+        names = self._names
+        if not query:
+            return names[:limit]
+
+        # names starting with the query are next to each other, and the exact name comes first
+        results = []
+        start = bisect_left(names, query)
+        for name in names[start:]:
+            if not name.startswith(query) or len(results) == limit:
+                break
+            results.append(name)
+
+        if len(results) < limit:
+            seen = set(results)
+            results.extend([name for name in names if query in name and name not in seen][:limit - len(results)])
+
+        if len(results) < limit and len(query) >= self.FUZZY_MIN_LENGTH:
+            seen = set(results)
+            candidates = [name for name in names if name not in seen]
+            results.extend(get_close_matches(query, candidates, n=limit - len(results), cutoff=self.FUZZY_CUTOFF))
+
+        return results
@@ -0,0 +1,156 @@
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Generic, Hashable, Iterable, List, Optional, TypeVar
+
+"""
+A sliding window counter for "more than N events in T seconds" detection, like the antiraid filters.
+Unlike a commands.CooldownMapping, the window slides instead of resetting, and it remembers who was
+in it, so that whoever tripped the limit can be acted on without keeping a separate mapping.
+Memory is bounded: each key keeps at most `max_events` events, and at most `max_keys` keys are
+kept, dropping the ones that were hit longest ago.
+"""
+
+K = TypeVar("K", bound=Hashable)
+M = TypeVar("M", bound=Hashable)
+
+
+class _Window(Generic[M]):
+    __slots__ = ("times", "members", "last_hit")
+
+    def __init__(self, max_events: int):
+        # timestamps of the events in the window, oldest first
+        self.times: Deque[float] = deque(maxlen=max_events)
+        # member -> when they were last seen in the window, oldest first
+        self.members: Dict[M, float] = {}
+        self.last_hit = 0.0
+
+    def expire(self, cutoff: float) -> None:
+        times = self.times
+        while times and times[0] <= cutoff:
+            times.popleft()
+
+        members = self.members
+        while members:
+            member = next(iter(members))
+            if members[member] > cutoff:
+                break
+            del members[member]
+
+
+class SlidingWindow(Generic[K, M]):
+    def __init__(self, rate: int, per: float, max_keys: int = 10_000, max_events: int = 1000):
+        """
+        Parameters
+        ----------
+        rate : int
+            How many events are allowed in the window before it's tripped
+        per : float
+            Length of the window, in seconds
+        max_keys : int, optional
+            Most keys to keep track of, by default 10,000
+        max_events : int, optional
+            Most events (and members) to keep per key, by default 1000. Past this, the count
+            stays at max_events and the oldest members are forgotten first.
+        """
+
+        if max_events <= rate:
+            raise ValueError("max_events must be larger than rate, or the window can never be tripped")
+
+        self.rate = rate
+        self.per = per
+        self.max_keys = max_keys
+        self.max_events = max_events
+        # ordered by when each key was last hit, so expired and evicted keys are always at the front
+        self._windows: OrderedDict[K, _Window[M]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def hit(self, key: K, member: Optional[M] = None, now: Optional[float] = None) -> bool:
+        """Record an event
+
+        Parameters
+        ----------
+        key : K
+            What the event is counted under, for example the guild, or an account creation date
+        member : Optional[M], optional
+            Who caused the event, to be returned by `members`
+        now : Optional[float], optional
+            When the event happened, as a unix timestamp, by default the current time
+
+        Returns
+        -------
+        bool
+            Whether there are now more than `rate` events in the window
+        """
+
+        if now is None:
+            now = time.time()
+        cutoff = now - self.per
+        self._expire_keys(cutoff)
+
+        window = self._windows.get(key)
+        if window is None:
+            window = self._windows[key] = _Window(self.max_events)
+            if len(self._windows) > self.max_keys:
+                self._windows.popitem(last=False)
+        else:
+            self._windows.move_to_end(key)
+            window.expire(cutoff)
+
+        window.times.append(now)
+        window.last_hit = now
+        if member is not None:
+            # re-insert, so members stay ordered by when they were last seen
+            window.members.pop(member, None)
+            window.members[member] = now
+            if len(window.members) > self.max_events:
+                del window.members[next(iter(window.members))]
+
+        return len(window.times) > self.rate
+
+    def count(self, key: K, now: Optional[float] = None) -> int:
+        """How many events are in the window for a key
+        """
+
+        window = self._get(key, now)
+        return len(window.times) if window is not None else 0
+
+    def members(self, key: K, now: Optional[float] = None) -> List[M]:
+        """The distinct members of the events in the window for a key, the least recently seen first
+        """
+
+        window = self._get(key, now)
+        return list(window.members) if window is not None else []
+
+    def has_member(self, key: K, member: M, now: Optional[float] = None) -> bool:
+        window = self._get(key, now)
+        return window is not None and member in window.members
+
+    def discard(self, key: K, members: Iterable[M]) -> None:
+        """Forget members of a key (for example after banning them), while still counting their events
+        """
+
+        window = self._windows.get(key)
+        if window is None:
+            return
+
+        for member in members:
+            window.members.pop(member, None)
+
+    def clear(self, key: K) -> None:
+        self._windows.pop(key, None)
+
+    def _get(self, key: K, now: Optional[float]) -> Optional[_Window[M]]:
+        window = self._windows.get(key)
+        if window is not None:
+            window.expire((time.time() if now is None else now) - self.per)
+        return window
+
+    def _expire_keys(self, cutoff: float) -> None:
+        windows = self._windows
+        while windows:
+            key = next(iter(windows))
+            if windows[key].last_hit > cutoff:
+                break
+            del windows[key]
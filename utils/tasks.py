@@ -6,8 +6,8 @@ from apscheduler.executors.pool import ThreadPoolExecutor
 from apscheduler.jobstores.mongodb import MongoDBJobStore
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from data.model.case import Case
-from data.services.guild_service import guild_service
-from data.services.user_service import user_service
+from data.services.guild_service import async_guild_service
+from data.services.user_service import async_user_service
 from utils.config import cfg
 from utils.mod.mod_logs import prepare_unmute_log
 from pytz import utc
@@ -180,17 +180,15 @@ async def remove_timeout(id: int) -> None:
 
     """
 
-    db_guild = guild_service.get_guild()
+    db_guild = await async_guild_service.get_guild()
 
     case = Case(
-        _id=db_guild.case_id,
         _type="UNMUTE",
         mod_id=BOT_GLOBAL.user.id,
         mod_tag=str(BOT_GLOBAL.user),
         reason="Temporary mute expired.",
     )
-    guild_service.inc_caseid()
-    user_service.add_case(id, case)
+    await async_user_service.create_case(id, case)
 
     guild = BOT_GLOBAL.get_guild(cfg.guild_id)
     user: discord.Member = guild.get_member(id)
@@ -244,7 +242,7 @@ async def remind(id, reminder):
         await member.send(embed=embed)
     except Exception:
         channel = guild.get_channel(
-            guild_service.get_guild().channel_botspam)
+            (await async_guild_service.get_guild()).channel_botspam)
         await channel.send(member.mention, embed=embed)
 
 
@@ -272,7 +270,7 @@ async def remove_bday(id: int) -> None:
 
     """
 
-    db_guild = guild_service.get_guild()
+    db_guild = await async_guild_service.get_guild()
     guild = BOT_GLOBAL.get_guild(cfg.guild_id)
     if guild is None:
         return
@@ -358,11 +356,11 @@ async def end_giveaway(channel_id: int, message_id: int, winners: int) -> None:
             mentions.append(member.mention)
             winner_ids.append(member.id)
 
-    g = guild_service.get_giveaway(_id=message.id)
+    g = await async_guild_service.get_giveaway(_id=message.id)
     g.entries = reacted_ids
     g.is_ended = True
     g.previous_winners = winner_ids
-    g.save()
+    await async_guild_service.run(g.save)
 
     await message.edit(embed=embed)
     await message.clear_reactions()
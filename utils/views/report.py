@@ -2,7 +2,7 @@ import discord
 from discord import ui
 from discord.ext.commands import Context
 import pytimeparse
-from data.services.guild_service import guild_service
+from data.services.guild_service import async_guild_service
 from utils.context import BlooOldContext, PromptData
 from utils.mod.global_modactions import ban, mute, unmute
 from utils.permissions.permissions import permissions
@@ -116,7 +116,7 @@ class RaidPhraseReportActions(ui.View):
         except Exception:
             await self.ctx.send_warning("I wasn't able to ban them.", delete_after=5)
 
-        done = guild_service.add_raid_phrase(self.domain)
+        done = await async_guild_service.add_raid_phrase(self.domain)
         if done:
             await self.ctx.send_success(f"{self.domain} was added to the raid phrase list.", delete_after=5)
         else: